@@ -6,12 +6,15 @@ from typing import Any
 import structlog
 from fastapi import FastAPI, Request
 
+from app.tracing import add_trace_ids
+
 
 def setup_logging(level: str) -> None:
     logging.basicConfig(level=getattr(logging, level.upper(), logging.INFO), stream=sys.stdout)
     structlog.configure(
         processors=[
             structlog.processors.TimeStamper(fmt="iso"),
+            add_trace_ids,
             structlog.processors.JSONRenderer(),
         ],
         wrapper_class=structlog.make_filtering_bound_logger(getattr(logging, level.upper(), logging.INFO)),
@@ -1,37 +1,169 @@
-from sqlalchemy import create_engine
+import asyncio
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
 from urllib.parse import urlparse
 
-# Use connect_args={"check_same_thread": False} only for SQLite
-connect_args = {}
-if "sqlite" in settings.DATABASE_URL:
-    connect_args = {"check_same_thread": False}
-else:
+
+def _connect_args(url: str, connect_timeout: Optional[int] = None) -> dict:
+    # Use connect_args={"check_same_thread": False} only for SQLite
+    if "sqlite" in url:
+        return {"check_same_thread": False}
+    args = {}
     # Enable TLS for Railway MySQL proxy if detected
-    parsed = urlparse(settings.DATABASE_URL)
+    parsed = urlparse(url)
     host = parsed.hostname or ""
     if parsed.scheme.startswith("mysql+pymysql") and (
         "proxy.rlwy.net" in host or "railway" in host
     ):
-        connect_args = {"ssl": {}}
+        args["ssl"] = {}
+    if connect_timeout:
+        # Both pymysql and psycopg2 take whole seconds under this name
+        args["connect_timeout"] = int(connect_timeout)
+    return args
 
-engine = create_engine(
-    settings.DATABASE_URL, 
-    connect_args=connect_args,
-    pool_pre_ping=True,
-    pool_recycle=3600
-)
+
+def _make_engine(url: str, connect_timeout: Optional[int] = None) -> Engine:
+    return create_engine(
+        url,
+        connect_args=_connect_args(url, connect_timeout),
+        pool_pre_ping=True,
+        pool_recycle=3600
+    )
+
+
+engine = _make_engine(settings.DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+
+def replica_lag_seconds(conn) -> Optional[float]:
+    # None means replication is broken (or lag unknown) and the replica must not serve reads
+    if conn.dialect.name != "mysql":
+        conn.execute(text("SELECT 1"))
+        return 0.0
+    for stmt, column in (
+        ("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+        ("SHOW SLAVE STATUS", "Seconds_Behind_Master"),
+    ):
+        try:
+            row = conn.execute(text(stmt)).mappings().first()
+        except Exception:
+            continue
+        if row is None:
+            # Not a classic replica (e.g. a managed read endpoint): treat as current
+            return 0.0
+        lag = row.get(column)
+        return float(lag) if lag is not None else None
+    conn.execute(text("SELECT 1"))
+    return 0.0
+
+
+class ReplicaSet:
+    def __init__(self, engines: List[Engine], max_lag: float = 5.0, check_interval: float = 10.0):
+        self.engines = engines
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._status: Dict[int, dict] = {}
+        self._order = itertools.cycle(range(len(engines))) if engines else None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def check(self, index: int) -> dict:
+        eng = self.engines[index]
+        status = {"url": eng.url.render_as_string(hide_password=True), "ok": False, "lag": None, "error": None}
+        try:
+            with eng.connect() as conn:
+                lag = replica_lag_seconds(conn)
+            status["lag"] = lag
+            status["ok"] = lag is not None and lag <= self.max_lag
+        except Exception as exc:
+            status["error"] = str(exc)[:200]
+        status["checked_at"] = time.monotonic()
+        self._status[index] = status
+        return status
+
+    def check_all(self) -> None:
+        for index in range(len(self.engines)):
+            self.check(index)
+
+    def _usable(self, index: int) -> bool:
+        status = self._status.get(index)
+        if status is None:
+            return False
+        # A result the refresher has not renewed for several intervals is not trusted any more
+        return status["ok"] and time.monotonic() - status["checked_at"] < self.check_interval * 3
+
+    def pick(self) -> Optional[Engine]:
+        if not self.engines:
+            return None
+        with self._lock:
+            start = next(self._order)
+        for offset in range(len(self.engines)):
+            index = (start + offset) % len(self.engines)
+            if self._usable(index):
+                return self.engines[index]
+        return None
+
+    def statuses(self) -> List[dict]:
+        # What pick() is acting on, as left by the refresher; /health never probes a replica itself
+        now = time.monotonic()
+        out = []
+        for i, eng in enumerate(self.engines):
+            status = self._status.get(i)
+            if status is None:
+                out.append({"url": eng.url.render_as_string(hide_password=True), "ok": False, "lag": None, "error": None, "age": None})
+                continue
+            out.append({**{k: v for k, v in status.items() if k != "checked_at"}, "age": round(now - status["checked_at"], 1)})
+        return out
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.to_thread(self.check_all)
+            await asyncio.sleep(self.check_interval)
+
+    def start(self) -> None:
+        # Probes run here, off the request path; pick() and statuses() only read their results
+        if self.engines and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+replicas = ReplicaSet(
+    [_make_engine(url, settings.REPLICA_CONNECT_TIMEOUT) for url in settings.replica_urls()],
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_CHECK_INTERVAL,
+)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    # Lagging or unreachable replicas fall back to the primary, so reads never fail because of them
+    replica = replicas.pick()
+    db = SessionLocal(bind=replica) if replica is not None else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,4 +1,11 @@
-from fastapi import FastAPI
+import time
+
+_import_started = time.perf_counter()
+
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
@@ -6,15 +13,51 @@ from slowapi import _rate_limit_exceeded_handler
 
 from app.config import settings
 from sqlalchemy import text
-from app.database import SessionLocal
+from app.database import SessionLocal, replicas
 from app.app_logging import add_timing_middleware, setup_logging
 from app.rate_limit import limiter
+from app.tracing import add_tracing_middleware, configure_tracing
 from app.routers.monitor import router as monitor_router
+from app.routers.transactions import router as transactions_router
+from app.routers.users import router as users_router
 from app.routers.wallet_tracker import router as wallet_tracker_router
+from app.services.auto_import import auto_importer
+from app.services.block_scanner import block_scanner
+from app.services.etherscan_client import BASE_URL as ETHERSCAN_BASE_URL
+from app.services.http_pool import http_pool
+from app.services.key_pool import get_key_pool
+from app.services.ingest_jobs import ingest_queue
+from app.static_files import mount_spa
+from app.warmup import warmup
 
 
 setup_logging(settings.LOG_LEVEL)
-app = FastAPI(title="Sepolia Wallet Monitor", version="1.0.0")
+configure_tracing(settings.TRACING_EXPORTER, settings.TRACING_FILE)
+
+static_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend", "dist")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup.db_connections = settings.WARMUP_DB_CONNECTIONS
+    warmup.retry_base = settings.WARMUP_RETRY_BASE
+    warmup.retry_max = settings.WARMUP_RETRY_MAX
+    warmup.http_urls = [ETHERSCAN_BASE_URL] if settings.WARMUP_HTTP and (settings.ETHERSCAN_API_KEY or settings.ETHERSCAN_API_KEYS) else []
+    warmup.static_path = static_path if os.path.exists(static_path) else None
+    warmup.start()
+    replicas.start()
+    await ingest_queue.resume_pending()
+    if settings.BLOCK_SCAN_INTERVAL > 0:
+        block_scanner.start()
+    yield
+    await warmup.stop()
+    await block_scanner.stop()
+    await replicas.stop()
+    await ingest_queue.stop()
+    await http_pool.close()
+
+
+app = FastAPI(title="Sepolia Wallet Monitor", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -28,43 +71,26 @@ app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 app.add_middleware(SlowAPIMiddleware)
 add_timing_middleware(app)
+# Registered after the timing middleware so it wraps it and request_completed carries the trace id
+add_tracing_middleware(app)
+if settings.PROFILE_SECRET or settings.PROFILE_SAMPLE_RATE > 0:
+    # Imported only when enabled, so pyinstrument is never loaded on a normal boot
+    from app.profiling import add_profiling_middleware
 
-import os
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-
-# ... imports ...
+    add_profiling_middleware(app, settings.PROFILE_SECRET, settings.PROFILE_SAMPLE_RATE, settings.PROFILE_DIR)
 
 app.include_router(monitor_router)
 app.include_router(wallet_tracker_router)
-
-# Mount static files for frontend (Monolith Mode)
-# Ensure this is after API routers so API routes take precedence
-static_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend", "dist")
-
-if os.path.exists(static_path):
-    app.mount("/assets", StaticFiles(directory=os.path.join(static_path, "assets")), name="assets")
-    
-    # Catch-all route for SPA (Single Page Application)
-    @app.get("/{full_path:path}")
-    async def serve_spa(full_path: str):
-        # Check if file exists in root of dist (e.g. favicon.ico)
-        file_path = os.path.join(static_path, full_path)
-        if os.path.isfile(file_path):
-            return FileResponse(file_path)
-        # Otherwise return index.html for React Router
-        return FileResponse(os.path.join(static_path, "index.html"))
-else:
-    import structlog
-    logger = structlog.get_logger()
-    logger.warning("Frontend build not found. Run 'npm run build' in frontend/ directory to enable monolith mode.")
+app.include_router(users_router)
+app.include_router(transactions_router)
 
 import structlog
 logger = structlog.get_logger()
 logger.info("service_started", rate_limit=settings.rate_limit_str(), log_level=settings.LOG_LEVEL)
 
+# Plain def: the primary check blocks, so it runs in the threadpool instead of on the event loop
 @app.get("/health")
-async def health():
+def health(response: Response):
     db_ok = True
     try:
         db = SessionLocal()
@@ -76,9 +102,30 @@ async def health():
             db.close()
         except Exception:
             pass
+    # Load balancers keep traffic away until warm-up has opened the pool and primed the caches
+    if not warmup.ready:
+        response.status_code = 503
     return {
-        "status": "ok",
+        "status": "ok" if warmup.ready else "warming",
+        "warmup": warmup.status(),
         "db": db_ok,
-        "etherscan_key": bool(settings.ETHERSCAN_API_KEY),
+        "etherscan_key": bool(settings.ETHERSCAN_API_KEY or settings.ETHERSCAN_API_KEYS),
+        # Per-key usage, bench time and breaker state; keys are masked
+        "etherscan_keys": get_key_pool().stats(),
+        "replicas": replicas.statuses(),
+        "auto_import": auto_importer.metrics(),
     }
 
+
+# Serve the frontend build (Monolith Mode)
+# Registered last so API routes (including /health) take precedence over the catch-all
+if os.path.exists(static_path):
+    mount_spa(app, static_path, max_memory_bytes=settings.STATIC_MEMORY_MAX_BYTES)
+else:
+    logger.warning("Frontend build not found. Run 'npm run build' in frontend/ directory to enable monolith mode.")
+
+warmup.import_ms = round((time.perf_counter() - _import_started) * 1000, 1)
+if warmup.import_ms > settings.IMPORT_BUDGET_MS:
+    logger.warning("import_budget_exceeded", import_ms=warmup.import_ms, budget_ms=settings.IMPORT_BUDGET_MS)
+else:
+    logger.info("import_budget", import_ms=warmup.import_ms, budget_ms=settings.IMPORT_BUDGET_MS)
@@ -1,9 +1,22 @@
-from typing import List, Literal, Optional
+from decimal import Decimal
+from typing import List, Literal, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, SerializationInfo, SerializerFunctionWrapHandler, model_serializer
 
 
 ADDRESS_REGEX = r"^0x[a-fA-F0-9]{40}$"
+TX_HASH_REGEX = r"^0x[a-fA-F0-9]{64}$"
+
+WEI_PER_ETH = 10**18
+
+
+def format_eth(wei: Optional[int], exact: bool = False) -> Union[float, str]:
+    # The only wei -> ETH conversion; exact gives the full decimal string instead of a float
+    wei = int(wei or 0)
+    if exact:
+        text = format(Decimal(wei).scaleb(-18), "f")
+        return text.rstrip("0").rstrip(".") if "." in text else text
+    return wei / WEI_PER_ETH
 
 
 class TransactionItem(BaseModel):
@@ -12,7 +25,8 @@ class TransactionItem(BaseModel):
     timestamp: str
     from_address: str = Field(alias="from")
     to_address: str = Field(alias="to")
-    value_eth: float
+    value_wei: int = 0
+    fee_wei: int = 0
     status: Literal["success", "failed"]
     gas_used: int
 
@@ -20,11 +34,31 @@ class TransactionItem(BaseModel):
         "populate_by_name": True,
     }
 
+    @property
+    def value_eth(self) -> float:
+        return format_eth(self.value_wei)
+
+    @model_serializer(mode="wrap")
+    def _with_eth(self, handler: SerializerFunctionWrapHandler, info: SerializationInfo) -> dict:
+        data = handler(self)
+        exact = bool(info.context and info.context.get("exact_eth"))
+        data["value_eth"] = format_eth(self.value_wei, exact)
+        data["fee_eth"] = format_eth(self.fee_wei, exact)
+        # JSON numbers lose integer precision in JS clients past 2^53
+        data["value_wei"] = str(self.value_wei)
+        data["fee_wei"] = str(self.fee_wei)
+        return data
+
 
 class Metadata(BaseModel):
     count: int
     wallet: str
-    network: Literal["sepolia"]
+    network: str
+    # "upstream", "database" or "database+upstream"; stale means upstream failed and stored rows were served
+    source: str = "upstream"
+    stale: bool = False
+    # The upstream only scanned recent blocks (JSON-RPC node), so older transactions may be missing
+    truncated: bool = False
 
 
 class MonitorResponse(BaseModel):
@@ -44,7 +78,10 @@ class MonitorResponse(BaseModel):
                             "timestamp": "2025-11-27T12:00:00Z",
                             "from": "0x1111111111111111111111111111111111111111",
                             "to": "0x2222222222222222222222222222222222222222",
+                            "value_wei": "1000000000000000",
+                            "fee_wei": "21000000000000",
                             "value_eth": 0.001,
+                            "fee_eth": 0.000021,
                             "status": "success",
                             "gas_used": 21000,
                         }
@@ -77,9 +114,9 @@ class DbTransaction(BaseModel):
     time_stamp: str
     from_address: str
     to_address: str
-    value_eth: float
+    value_wei: int
     gas_used: int
-    tx_fee_eth: float
+    tx_fee_wei: int
     direction: Literal["in", "out", "self"]
     status: Literal["success", "failed"]
 
@@ -1,9 +1,10 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, DECIMAL, Enum, BigInteger, CHAR
+from sqlalchemy import DDL, event, Column, Integer, String, ForeignKey, DateTime, DECIMAL, Enum, BigInteger, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 
 from app.database import Base
+from app.models.types import Address, TxHash, Wei
 
 class DirectionEnum(enum.Enum):
     in_ = "in"
@@ -35,40 +36,88 @@ class User(Base):
 
     wallets = relationship("Wallet", back_populates="user", cascade="all, delete-orphan")
 
+    __table_args__ = (Index("ft_user_nama", "nama", mysql_prefix="FULLTEXT"),)
+
 class Wallet(Base):
     __tablename__ = "wallet"
 
     wallet_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("user.user_id", ondelete="CASCADE"), nullable=False)
     network_id = Column(Integer, ForeignKey("network.network_id"), nullable=False)
-    address = Column(CHAR(42), nullable=False)
+    address = Column(Address(), nullable=False)
     label = Column(String(100), default="main wallet")
     created_at = Column(DateTime, default=func.now())
 
     user = relationship("User", back_populates="wallets")
     network = relationship("Network", back_populates="wallets")
-    transactions = relationship("Transaction", back_populates="wallet", cascade="all, delete-orphan")
+    transaction_links = relationship("WalletTransaction", back_populates="wallet", cascade="all, delete-orphan")
     sync_logs = relationship("SyncLog", back_populates="wallet", cascade="all, delete-orphan")
+    ingest_jobs = relationship("IngestJob", back_populates="wallet", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        UniqueConstraint("network_id", "address", name="uk_wallet_net"),
+        Index("idx_wallet_address", "address"),
+        Index("ft_wallet_label", "label", mysql_prefix="FULLTEXT"),
+    )
 
+# Canonical, per-network copy of an on-chain transaction; shared by every tracked wallet it touches
 class Transaction(Base):
     __tablename__ = "transaction"
 
     tx_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     network_id = Column(Integer, ForeignKey("network.network_id"), nullable=False)
-    wallet_id = Column(Integer, ForeignKey("wallet.wallet_id", ondelete="CASCADE"), nullable=False)
-    tx_hash = Column(CHAR(66), nullable=False, index=True)
+    tx_hash = Column(TxHash(), nullable=False, index=True)
     block_number = Column(BigInteger, nullable=False)
     time_stamp = Column(DateTime, nullable=False, index=True)
-    from_address = Column(CHAR(42), nullable=False)
-    to_address = Column(CHAR(42))
-    value_eth = Column(DECIMAL(38, 18), default=0)
+    from_address = Column(Address(), nullable=False)
+    to_address = Column(Address())
+    value_wei = Column(Wei(), default=0)
     gas_used = Column(BigInteger, default=0)
-    tx_fee_eth = Column(DECIMAL(38, 18), default=0)
-    direction = Column(Enum(DirectionEnum), nullable=False)
+    tx_fee_wei = Column(Wei(), default=0)
     status = Column(String(20), default="success")
 
     network = relationship("Network", back_populates="transactions")
-    wallet = relationship("Wallet", back_populates="transactions")
+    wallet_links = relationship("WalletTransaction", back_populates="transaction", cascade="all, delete-orphan")
+
+    __table_args__ = (UniqueConstraint("network_id", "tx_hash", name="uk_network_hash"),)
+
+# Wallet <-> transaction membership. time_stamp is copied from the transaction so a
+# wallet's history pages straight off (wallet_id, time_stamp) without touching `transaction`.
+class WalletTransaction(Base):
+    __tablename__ = "wallet_transaction"
+
+    wallet_id = Column(Integer, ForeignKey("wallet.wallet_id", ondelete="CASCADE"), primary_key=True)
+    tx_id = Column(Integer, ForeignKey("transaction.tx_id", ondelete="CASCADE"), primary_key=True)
+    direction = Column(Enum(DirectionEnum, values_callable=lambda e: [m.value for m in e]), nullable=False)
+    time_stamp = Column(DateTime, nullable=False)
+
+    wallet = relationship("Wallet", back_populates="transaction_links")
+    transaction = relationship("Transaction", back_populates="wallet_links")
+
+    __table_args__ = (Index("idx_wallet_time", "wallet_id", "time_stamp"),)
+
+# Cold transactions moved out of the hot (partitioned) table by app.services.archive.
+# Same columns and tx_id as `transaction`, so wallet_transaction links keep resolving.
+class TransactionArchive(Base):
+    __tablename__ = "transaction_archive"
+
+    tx_id = Column(Integer, primary_key=True, autoincrement=False)
+    network_id = Column(Integer, nullable=False)
+    tx_hash = Column(TxHash(), nullable=False)
+    block_number = Column(BigInteger, nullable=False)
+    time_stamp = Column(DateTime, nullable=False)
+    from_address = Column(Address(), nullable=False)
+    to_address = Column(Address())
+    value_wei = Column(Wei(), default=0)
+    gas_used = Column(BigInteger, default=0)
+    tx_fee_wei = Column(Wei(), default=0)
+    status = Column(String(20), default="success")
+
+    __table_args__ = (
+        Index("idx_archive_hash", "tx_hash"),
+        Index("idx_archive_time", "time_stamp"),
+        {"mysql_engine": "InnoDB", "mysql_row_format": "COMPRESSED"},
+    )
 
 class SyncLog(Base):
     __tablename__ = "sync_log"
@@ -84,3 +133,77 @@ class SyncLog(Base):
 
     wallet = relationship("Wallet", back_populates="sync_logs")
     network = relationship("Network", back_populates="sync_logs")
+
+class IngestJob(Base):
+    __tablename__ = "ingest_job"
+
+    job_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    wallet_id = Column(Integer, ForeignKey("wallet.wallet_id", ondelete="CASCADE"), nullable=False)
+    network_id = Column(Integer, ForeignKey("network.network_id"), nullable=False)
+    status = Column(String(20), nullable=False, default="queued")
+    total = Column(Integer, default=0)
+    processed = Column(Integer, default=0)
+    added = Column(Integer, default=0)
+    error = Column(String(500))
+    # Worker process running the job and until when its claim holds; see ingest_jobs.claim_job
+    owner = Column(String(100))
+    lease_until = Column(DateTime)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    wallet = relationship("Wallet", back_populates="ingest_jobs")
+    network = relationship("Network")
+
+    __table_args__ = (Index("idx_ingest_job_wallet", "wallet_id", "status"),)
+
+class BlockCursor(Base):
+    __tablename__ = "block_cursor"
+
+    network_id = Column(Integer, ForeignKey("network.network_id", ondelete="CASCADE"), primary_key=True)
+    last_block = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+# Running totals per (wallet, counterparty), maintained by ingest as links are created, so
+# counterparty views read a handful of rows instead of grouping a wallet's whole history.
+class WalletCounterparty(Base):
+    __tablename__ = "wallet_counterparty"
+
+    wallet_id = Column(Integer, ForeignKey("wallet.wallet_id", ondelete="CASCADE"), primary_key=True)
+    counterparty = Column(Address(), primary_key=True)
+    tx_count = Column(Integer, nullable=False, default=0)
+    volume_in_wei = Column(Wei(), default=0)
+    volume_out_wei = Column(Wei(), default=0)
+    first_seen = Column(DateTime)
+    last_seen = Column(DateTime)
+
+    __table_args__ = (
+        Index("idx_counterparty_top", "wallet_id", "tx_count"),
+        Index("idx_counterparty_address", "counterparty"),
+    )
+
+
+# SQLite keeps wallet label + owner name in an FTS5 table whose rowid is wallet_id;
+# triggers keep it in step with wallet and user. MySQL uses FULLTEXT indexes instead.
+_SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS wallet_fts USING fts5(label, owner)",
+    """CREATE TRIGGER IF NOT EXISTS wallet_fts_ai AFTER INSERT ON wallet BEGIN
+        INSERT INTO wallet_fts(rowid, label, owner)
+        VALUES (NEW.wallet_id, NEW.label, (SELECT nama FROM "user" WHERE user_id = NEW.user_id));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS wallet_fts_au AFTER UPDATE ON wallet BEGIN
+        DELETE FROM wallet_fts WHERE rowid = OLD.wallet_id;
+        INSERT INTO wallet_fts(rowid, label, owner)
+        VALUES (NEW.wallet_id, NEW.label, (SELECT nama FROM "user" WHERE user_id = NEW.user_id));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS wallet_fts_ad AFTER DELETE ON wallet BEGIN
+        DELETE FROM wallet_fts WHERE rowid = OLD.wallet_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS user_fts_au AFTER UPDATE OF nama ON "user" BEGIN
+        DELETE FROM wallet_fts WHERE rowid IN (SELECT wallet_id FROM wallet WHERE user_id = NEW.user_id);
+        INSERT INTO wallet_fts(rowid, label, owner)
+        SELECT wallet_id, label, NEW.nama FROM wallet WHERE user_id = NEW.user_id;
+    END""",
+]
+
+for _stmt in _SQLITE_FTS_DDL:
+    event.listen(Wallet.__table__, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
@@ -0,0 +1,97 @@
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy.dialects import mysql
+from sqlalchemy.types import LargeBinary, Numeric, String, TypeDecorator
+
+
+def hex_to_bytes(value: str, length: int) -> bytes:
+    text = value.strip().lower()
+    if text.startswith("0x"):
+        text = text[2:]
+    raw = bytes.fromhex(text)
+    if len(raw) != length:
+        raise ValueError(f"expected {length} bytes, got {len(raw)} from {value!r}")
+    return raw
+
+
+def bytes_to_hex(value: bytes) -> str:
+    return "0x" + bytes(value).hex()
+
+
+# 0x-prefixed hex stored as raw BINARY(n): half the bytes of CHAR(2n+2) and
+# case-insensitive by construction, since every bind goes through hex_to_bytes.
+class HexBinary(TypeDecorator):
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, length: int):
+        super().__init__()
+        self.length = length
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "mysql":
+            return dialect.type_descriptor(mysql.BINARY(self.length))
+        return dialect.type_descriptor(LargeBinary(self.length))
+
+    def process_bind_param(self, value, dialect) -> Optional[bytes]:
+        if value is None or value == "":
+            return None
+        if isinstance(value, (bytes, bytearray)):
+            return bytes(value)
+        return hex_to_bytes(value, self.length)
+
+    def process_result_value(self, value, dialect) -> Optional[str]:
+        if value is None:
+            return None
+        return bytes_to_hex(value)
+
+
+class Address(HexBinary):
+    cache_ok = True
+
+    def __init__(self):
+        super().__init__(20)
+
+
+class TxHash(HexBinary):
+    cache_ok = True
+
+    def __init__(self):
+        super().__init__(32)
+
+
+# MySQL caps DECIMAL precision at 65 digits. Native ETH amounts are far below that (total supply
+# is ~1.2e26 wei), so anything wider is refused on write rather than silently truncated.
+WEI_DIGITS = 65
+WEI_MAX = 10**WEI_DIGITS - 1
+
+
+# Wei amounts as exact Python ints. MySQL/PostgreSQL hold them in DECIMAL(65,0);
+# SQLite has no exact type that wide, so the digits are kept as text there.
+class Wei(TypeDecorator):
+    impl = Numeric(WEI_DIGITS, 0)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name in ("mysql", "postgresql"):
+            return dialect.type_descriptor(Numeric(WEI_DIGITS, 0))
+        return dialect.type_descriptor(String(80))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        value = int(value)
+        if abs(value) > WEI_MAX:
+            raise ValueError(f"wei amount {value} does not fit DECIMAL({WEI_DIGITS},0)")
+        if dialect.name in ("mysql", "postgresql"):
+            return Decimal(value)
+        return str(value)
+
+    def process_result_value(self, value, dialect) -> Optional[int]:
+        if value is None:
+            return None
+        if isinstance(value, int):
+            return value
+        # Aggregates may come back as Decimal, float or text depending on the backend
+        return int(Decimal(str(value)))
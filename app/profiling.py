@@ -0,0 +1,114 @@
+import cProfile
+import hmac
+import io
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from typing import Any, Optional, Tuple
+
+import structlog
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, PlainTextResponse
+
+try:
+    from pyinstrument import Profiler  # optional: statistical profiler with async-aware call trees
+except ImportError:  # pragma: no cover - depends on environment
+    Profiler = None
+
+
+logger = structlog.get_logger()
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_QUERY = "__profile"
+PROFILE_FORMAT_QUERY = "__profile_format"
+
+# cProfile hooks the whole interpreter and pyinstrument allows one profiler per thread, so two
+# overlapping requests would record each other. Only one request is profiled at a time
+_active = threading.Lock()
+
+
+def _start() -> Any:
+    if Profiler is not None:
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        return profiler
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def _stop(profiler: Any) -> Tuple[str, str, Optional[bytes]]:
+    # Returns (text report, html report or "", raw .prof bytes for cProfile)
+    if Profiler is not None and isinstance(profiler, Profiler):
+        profiler.stop()
+        return profiler.output_text(unicode=True, color=False), profiler.output_html(), None
+    profiler.disable()
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats("cumulative").print_stats(60)
+    # Same bytes Stats.dump_stats writes, without a temp file
+    return out.getvalue(), "", marshal.dumps(stats.stats)
+
+
+def _save(out_dir: str, request: Request, text: str, html: str, raw: Optional[bytes]) -> str:
+    os.makedirs(out_dir, exist_ok=True)
+    slug = request.url.path.strip("/").replace("/", "_") or "root"
+    base = os.path.join(out_dir, f"{time.strftime('%Y%m%dT%H%M%S')}_{request.method}_{slug[:60]}_{uuid.uuid4().hex[:8]}")
+    with open(base + ".txt", "w", encoding="utf-8") as fh:
+        fh.write(text)
+    if html:
+        with open(base + ".html", "w", encoding="utf-8") as fh:
+            fh.write(html)
+    if raw:
+        # Load with pstats or snakeviz for a flame view
+        with open(base + ".prof", "wb") as fh:
+            fh.write(raw)
+    return base
+
+
+def _authorized(request: Request, secret: str) -> bool:
+    token = request.headers.get(PROFILE_HEADER) or request.query_params.get(PROFILE_QUERY)
+    return bool(token) and hmac.compare_digest(token, secret)
+
+
+def add_profiling_middleware(app: FastAPI, secret: str, sample_rate: float, out_dir: str) -> None:
+    if not secret and sample_rate <= 0:
+        # Nothing is registered, so a disabled profiler adds no per-request work at all
+        return
+
+    @app.middleware("http")
+    async def profiling_middleware(request: Request, call_next: Any):
+        on_demand = bool(secret) and _authorized(request, secret)
+        if not on_demand and not (sample_rate > 0 and random.random() < sample_rate):
+            return await call_next(request)
+
+        if not _active.acquire(blocking=False):
+            logger.info("profile_skipped_busy", path=request.url.path, on_demand=on_demand)
+            response = await call_next(request)
+            if on_demand:
+                response.headers["X-Profile-Skipped"] = "busy"
+            return response
+        try:
+            profiler = _start()
+            try:
+                response = await call_next(request)
+            finally:
+                text, html, raw = _stop(profiler)
+        finally:
+            _active.release()
+        base = _save(out_dir, request, text, html, raw)
+        logger.info("request_profiled", path=request.url.path, on_demand=on_demand, report=base)
+
+        if on_demand:
+            fmt = request.query_params.get(PROFILE_FORMAT_QUERY) or request.headers.get("X-Profile-Format")
+            headers = {"X-Profiled-Status": str(response.status_code), "X-Profile-Report": base}
+            if fmt == "html" and html:
+                return HTMLResponse(html, headers=headers)
+            if fmt == "text":
+                return PlainTextResponse(text, headers=headers)
+            response.headers["X-Profile-Report"] = base
+        return response
@@ -2,7 +2,19 @@ from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 from app.config import settings
+from app.rate_limit_storage import DEFAULT_SHARED_PATH
 
 
-limiter = Limiter(key_func=get_remote_address, default_limits=[settings.rate_limit_str()])
+def rate_limit_storage_uri() -> str:
+    uri = settings.RATE_LIMIT_STORAGE_URI
+    if settings.WEB_CONCURRENCY > 1 and uri.startswith("memory://"):
+        # Per-process memory counters would multiply the limit by the worker count
+        return f"sqlite://{DEFAULT_SHARED_PATH}"
+    return uri
 
+
+limiter = Limiter(
+    key_func=get_remote_address,
+    default_limits=[settings.rate_limit_str()],
+    storage_uri=rate_limit_storage_uri(),
+)
@@ -0,0 +1,98 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Optional, Tuple, Type, Union
+from urllib.parse import urlparse
+
+from limits.storage import Storage
+
+
+DEFAULT_SHARED_PATH = os.path.join(tempfile.gettempdir(), "fp_basdat_ratelimit.db")
+
+
+# Fixed-window counters in a WAL-mode SQLite file shared by every worker on the host.
+# Registered with `limits` under the sqlite:// scheme (e.g. sqlite:////tmp/ratelimit.db);
+# networked backends such as redis:// go through the same RATE_LIMIT_STORAGE_URI setting.
+class SQLiteStorage(Storage):
+    STORAGE_SCHEME = ["sqlite"]
+    PURGE_EVERY = 1000
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options: Union[float, str, bool]):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = urlparse(uri).path or DEFAULT_SHARED_PATH
+        self._local = threading.local()
+        self._writes = 0
+        with self._conn() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_counter ("
+                " key TEXT PRIMARY KEY,"
+                " value INTEGER NOT NULL,"
+                " expiry REAL NOT NULL)"
+            )
+
+    @property
+    def base_exceptions(self) -> Union[Type[Exception], Tuple[Type[Exception], ...]]:
+        return sqlite3.Error
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+        now = time.time()
+        conn = self._conn()
+        # BEGIN IMMEDIATE takes the write lock up front so read-modify-write is atomic across processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value, expiry FROM rate_limit_counter WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                value, expires_at = amount, now + expiry
+            else:
+                value = row[0] + amount
+                expires_at = now + expiry if elastic_expiry else row[1]
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit_counter (key, value, expiry) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM rate_limit_counter WHERE expiry <= ?", (now,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+    def get(self, key: str) -> int:
+        row = self._conn().execute(
+            "SELECT value FROM rate_limit_counter WHERE key = ? AND expiry > ?", (key, time.time())
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    def get_expiry(self, key: str) -> int:
+        now = time.time()
+        row = self._conn().execute(
+            "SELECT expiry FROM rate_limit_counter WHERE key = ? AND expiry > ?", (key, now)
+        ).fetchone()
+        return int(row[0]) if row else int(now)
+
+    def check(self) -> bool:
+        try:
+            self._conn().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+        cur = self._conn().execute("DELETE FROM rate_limit_counter")
+        return cur.rowcount
+
+    def clear(self, key: str) -> None:
+        self._conn().execute("DELETE FROM rate_limit_counter WHERE key = ?", (key,))
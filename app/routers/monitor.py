@@ -1,67 +1,152 @@
-from typing import List
+import asyncio
+from typing import List, Optional
 
 import structlog
-from fastapi import APIRouter, Request, status
+from fastapi import APIRouter, Depends, Request, status
 from fastapi.responses import JSONResponse
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
 
 from app.config import settings
+from app.database import get_db, get_read_db
 from app.models.schemas import Metadata, MonitorResponse, TransactionItem
+from app.models.sql_models import Wallet
 from app.rate_limit import limiter
-from app.services.etherscan_client import EtherscanClient
-from app.services.processor import is_valid_address, to_transaction_items
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.data_sources import source_for_network
+from app.services.ingest import ingest_transactions
+from app.services.processor import is_valid_address, record_to_item, to_transaction_items
+from app.services.read_through import known_chain_id, merge_items, resolve_network, stored_items, tracked_wallet
+from app.services.registration import DEFAULT_CHAIN_ID
 
 
 router = APIRouter(prefix="/monitor")
 logger = structlog.get_logger()
 
 
+def _error(code: int, address: str, network: str, headers: Optional[dict] = None) -> JSONResponse:
+    payload = MonitorResponse(
+        status="error",
+        data=[],
+        metadata=Metadata(count=0, wallet=address, network=network),
+    )
+    return JSONResponse(status_code=code, content=payload.model_dump(by_alias=True), headers=headers)
+
+
+def _success(
+    items: List[TransactionItem],
+    address: str,
+    network: str,
+    source: str,
+    exact: bool,
+    stale: bool = False,
+    truncated: bool = False,
+):
+    payload = MonitorResponse(
+        status="success",
+        data=items,
+        metadata=Metadata(
+            count=len(items), wallet=address, network=network, source=source, stale=stale, truncated=truncated
+        ),
+    )
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=payload.model_dump(by_alias=True, context={"exact_eth": exact}),
+    )
+
+
 @router.get("/wallet", response_model=MonitorResponse)
 @limiter.limit(settings.rate_limit_str())
-async def monitor_wallet(request: Request, address: str):
+async def monitor_wallet(
+    request: Request,
+    address: str,
+    network: Optional[str] = None,
+    exact: bool = False,
+    db: Session = Depends(get_read_db),
+    primary: Session = Depends(get_db),
+):
+    network_name = network or "sepolia"
     if not is_valid_address(address):
-        payload = MonitorResponse(
-            status="error",
-            data=[],
-            metadata=Metadata(count=0, wallet=address, network="sepolia"),
-        )
-        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content=payload.model_dump(by_alias=True))
-    client = EtherscanClient(settings.ETHERSCAN_API_KEY)
+        return _error(status.HTTP_400_BAD_REQUEST, address, network_name)
+
+    net_row, wallet, stored = None, None, []
     try:
-        resp = await client.get_txlist(address)
+        net_row, chain_id = resolve_network(db, network)
+        if net_row is not None:
+            network_name = net_row.name
+            wallet = tracked_wallet(db, address, net_row.network_id)
+            if wallet is not None:
+                stored = stored_items(db, wallet)
+    except SQLAlchemyError as exc:
+        # Without the database this degrades to the plain upstream proxy it used to be
+        logger.warning("monitor_db_unavailable", wallet=address, error=str(exc))
+        db.rollback()
+        net_row, wallet, stored = None, None, []
+        chain_id = known_chain_id(network) if network else DEFAULT_CHAIN_ID
+    if chain_id is None:
+        return _error(status.HTTP_400_BAD_REQUEST, address, network_name)
+
+    # Only blocks after the newest stored one are asked for; an untracked wallet gets its full history
+    start_block = max(i.block_number for i in stored) + 1 if stored else 0
+    # No registry row (or no database) means no node is configured for the chain: Etherscan
+    source = source_for_network(net_row)
+    try:
+        resp = await source.get_txlist(address, chain_id=chain_id, start_block=start_block)
+    except CircuitOpenError as exc:
+        logger.warning("etherscan_circuit_open", wallet=address, retry_after=exc.retry_after)
+        if wallet is not None:
+            return _success(stored, address, network_name, "database", exact, stale=True)
+        return _error(
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            address,
+            network_name,
+            headers={"Retry-After": str(max(1, int(exc.retry_after)))},
+        )
     except Exception as exc:
         logger.error("etherscan_call_failed", wallet=address, error=str(exc))
-        payload = MonitorResponse(
-            status="error",
-            data=[],
-            metadata=Metadata(count=0, wallet=address, network="sepolia"),
-        )
-        return JSONResponse(status_code=status.HTTP_502_BAD_GATEWAY, content=payload.model_dump(by_alias=True))
+        if wallet is not None:
+            return _success(stored, address, network_name, "database", exact, stale=True)
+        return _error(status.HTTP_502_BAD_GATEWAY, address, network_name)
 
     if str(resp.get("status", "0")) != "1":
         msg = str(resp.get("message", "")) or str(resp.get("result", ""))
         if "No transactions found" in msg:
-            payload = MonitorResponse(
-                status="success",
-                data=[],
-                metadata=Metadata(count=0, wallet=address, network="sepolia"),
-            )
-            return JSONResponse(status_code=status.HTTP_200_OK, content=payload.model_dump(by_alias=True))
-        if "Max rate limit" in msg:
-            logger.warning("etherscan_rate_limited", wallet=address)
-        payload = MonitorResponse(
-            status="error",
-            data=[],
-            metadata=Metadata(count=0, wallet=address, network="sepolia"),
-        )
-        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=payload.model_dump(by_alias=True))
+            raw_list: List[dict] = []
+        else:
+            if "Max rate limit" in msg:
+                logger.warning("etherscan_rate_limited", wallet=address)
+            if wallet is not None:
+                return _success(stored, address, network_name, "database", exact, stale=True)
+            return _error(status.HTTP_503_SERVICE_UNAVAILABLE, address, network_name)
+    else:
+        raw_list = resp.get("result", [])
 
-    raw_list: List[dict] = resp.get("result", [])
-    items: List[TransactionItem] = to_transaction_items(raw_list, address)
-    payload = MonitorResponse(
-        status="success",
-        data=items,
-        metadata=Metadata(count=len(items), wallet=address, network="sepolia"),
-    )
-    logger.info("monitor_wallet_success", wallet=address, count=len(items))
-    return JSONResponse(status_code=status.HTTP_200_OK, content=payload.model_dump(by_alias=True))
+    truncated = bool(resp.get("truncated"))
+    if wallet is None:
+        items = to_transaction_items(raw_list, address)
+        logger.info("monitor_wallet_success", wallet=address, count=len(items))
+        return _success(items, address, network_name, "upstream", exact, truncated=truncated)
 
+    # Every new transaction is stored, not just the newest 500: the next call starts after the newest
+    # stored block, so anything dropped here would never be fetched again. Only the response is capped
+    delta: List[TransactionItem] = [record_to_item(it) for it in raw_list]
+
+    if delta:
+        try:
+            # Persisted so the next call starts from this block; a failed write only costs a re-fetch
+            await asyncio.to_thread(
+                ingest_transactions,
+                primary,
+                primary.get(Wallet, wallet.wallet_id),
+                wallet.network_id,
+                delta,
+                settings.INGEST_BATCH_SIZE,
+            )
+        except SQLAlchemyError as exc:
+            primary.rollback()
+            logger.warning("monitor_delta_store_failed", wallet=address, error=str(exc))
+    items = merge_items(delta, stored)
+    logger.info("monitor_wallet_success", wallet=address, count=len(items), delta=len(delta), start_block=start_block)
+    return _success(
+        items, address, network_name, "database+upstream" if delta else "database", exact, truncated=truncated
+    )
@@ -0,0 +1,64 @@
+from typing import Optional
+
+import structlog
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from app.database import get_read_db
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.data_sources import source_for_network
+from app.services.processor import is_valid_tx_hash
+from app.services.read_through import resolve_network
+from app.services.tx_lookup import find_stored, from_upstream, tx_cache
+
+
+router = APIRouter(prefix="/tx", tags=["transactions"])
+logger = structlog.get_logger()
+
+
+@router.get("/{tx_hash}")
+async def get_transaction(
+    tx_hash: str,
+    db: Session = Depends(get_read_db),
+    network: Optional[str] = Query(None),
+    exact: bool = Query(False),
+):
+    h = tx_hash.strip().lower()
+    if not is_valid_tx_hash(h):
+        raise HTTPException(status_code=400, detail="Hash transaksi tidak valid (harus 0x dan 66 karakter)")
+
+    # Stored rows are listed for every network; an upstream answer belongs to the chain it came from
+    key = (h, exact, None)
+    cached = tx_cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = find_stored(db, h, exact)
+    if result is None:
+        # Not tracked by any wallet: ask the upstream of the requested (or default) network
+        net_row, chain_id = resolve_network(db, network)
+        if chain_id is None:
+            raise HTTPException(status_code=400, detail="Network tidak dikenal")
+        key = (h, exact, chain_id)
+        cached = tx_cache.get(key)
+        if cached is not None:
+            return cached
+        source = source_for_network(net_row)
+        try:
+            record = await source.get_transaction(h, chain_id=chain_id)
+        except CircuitOpenError as exc:
+            return JSONResponse(
+                status_code=503,
+                content={"detail": "Upstream sedang tidak tersedia, coba lagi nanti"},
+                headers={"Retry-After": str(max(1, int(exc.retry_after)))},
+            )
+        except Exception as exc:
+            logger.warning("tx_lookup_upstream_failed", tx_hash=h, error=str(exc))
+            raise HTTPException(status_code=502, detail="Gagal mengambil transaksi dari upstream")
+        if record is None:
+            raise HTTPException(status_code=404, detail="Transaksi tidak ditemukan")
+        result = from_upstream(record, net_row, chain_id, exact)
+
+    tx_cache.put(key, result)
+    return result
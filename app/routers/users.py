@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_read_db
+from app.models.sql_models import User
+from app.services.portfolio import user_portfolio
+
+
+router = APIRouter(prefix="/users", tags=["users"])
+
+
+@router.get("/{user_id}/portfolio")
+def get_user_portfolio(
+    user_id: int,
+    db: Session = Depends(get_read_db),
+    limit: int = Query(20, ge=1, le=100),
+    exact: bool = Query(False),
+):
+    user = db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User tidak ditemukan")
+    return user_portfolio(db, user, limit, exact)
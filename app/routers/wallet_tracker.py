@@ -1,15 +1,24 @@
+import asyncio
+import json
 from datetime import datetime
-from decimal import Decimal
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.models.sql_models import Network, User, Wallet, Transaction, DirectionEnum
+from app.database import get_db, get_read_db
+from app.models.sql_models import IngestJob, Network, User, Wallet, Transaction, WalletTransaction
 from app.models.schemas import WalletRegisterRequest
-from app.services.processor import is_valid_address, to_transaction_items
-from app.services.etherscan_client import EtherscanClient
+from app.services.processor import is_valid_address, tx_to_dict
+from app.services.archive import load_transactions
+from app.services.counterparties import counterparty_graph, top_counterparties
+from app.services.auto_import import AdmissionRejected, AutoImportError, auto_importer
+from app.services.ingest_jobs import job_to_dict
+from app.services.live_feed import live_feed
+from app.services.registration import chain_id_for, register_wallet as register_wallet_atomic
+from app.services.search import search_wallets
 from app.config import settings
 from app.rate_limit import limiter
 import random
@@ -18,8 +27,24 @@ import random
 router = APIRouter(prefix="/wallet", tags=["wallet-tracker"])
 
 
-def _fmt_dt(dt: datetime) -> str:
-    return dt.isoformat()
+def _wallet_tx_page(db: Session, wallet: Wallet, page: int, page_size: int, exact: bool = False) -> Tuple[int, List[dict]]:
+    # Count and page off the (wallet_id, time_stamp) index on the link table
+    total = (
+        db.query(func.count(WalletTransaction.tx_id))
+        .filter(WalletTransaction.wallet_id == wallet.wallet_id)
+        .scalar()
+    )
+    links = (
+        db.query(WalletTransaction.tx_id, WalletTransaction.direction, WalletTransaction.time_stamp)
+        .filter(WalletTransaction.wallet_id == wallet.wallet_id)
+        .order_by(WalletTransaction.time_stamp.desc(), WalletTransaction.tx_id.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+        .all()
+    )
+    # Archived rows are only looked up when this page reaches back past the archive watermark
+    txs = load_transactions(db, [link.tx_id for link in links], oldest=links[-1].time_stamp if links else None)
+    return total or 0, [tx_to_dict(txs[link.tx_id], link.direction, exact) for link in links if link.tx_id in txs]
 
 
 def _get_eth_network(db: Session) -> Network:
@@ -29,146 +54,67 @@ def _get_eth_network(db: Session) -> Network:
     return net
 
 
-NETWORK_CHAIN_IDS = {
-    "ethereum-mainnet": 1,
-    "sepolia-testnet": 11155111,
-    "sepolia": 11155111,
-    "goerli-testnet": 5,
-    "goerli": 5,
-    "polygon-mainnet": 137,
-    "polygon-mumbai": 80001,
-    "bsc-mainnet": 56,
-    "bsc-testnet": 97,
-}
-
-
-@router.post("/register")
+@router.post("/register", status_code=202)
 @limiter.limit(settings.rate_limit_str())
 async def register_wallet(request: Request, data: WalletRegisterRequest, db: Session = Depends(get_db)):
     # Validate address
     if not is_valid_address(data.address):
         raise HTTPException(status_code=400, detail="Alamat Ethereum tidak valid")
     
-    # Determine Chain ID
-    # Try exact match, then lowercase
-    chain_id = NETWORK_CHAIN_IDS.get(data.network)
-    if not chain_id:
-        chain_id = NETWORK_CHAIN_IDS.get(data.network.lower())
-    
-    if not chain_id:
-        # Default to Sepolia if unknown
-        chain_id = 11155111
+    chain_id = chain_id_for(data.network)
+
+    # Network, owner and wallet are upserted and the ingest job queued in one transaction
+    result = register_wallet_atomic(db, chain_id, data.network, data.owner_name, data.address, data.label)
+
+    # Ingestion runs in the background; clients poll GET /wallet/jobs/{job_id}
+    return JSONResponse(
+        status_code=202,
+        content={
+            "status": "accepted",
+            "wallet_id": result["wallet_id"],
+            "address": result["address"],
+            "job_id": result["job_id"],
+            "job_status": result["job_status"],
+            "merged": result["merged"],
+        },
+    )
 
-    # Find or Create Network
-    # 1. Check by Chain ID (Primary Source of Truth)
-    network = db.query(Network).filter(Network.chain_id == chain_id).first()
-    
-    if not network:
-        # 2. If not found by Chain ID, check by Name
-        # If name exists but has different Chain ID, we use that network (trusting DB over input/default)
-        existing_name_net = db.query(Network).filter(Network.name == data.network).first()
-        if existing_name_net:
-            network = existing_name_net
-        else:
-            # Create new network
-            network = Network(name=data.network, chain_id=chain_id, symbol_native="ETH")
-            db.add(network)
-            db.commit()
-            db.refresh(network)
-    
-    # Upsert User
-    user = db.query(User).filter(User.nama == data.owner_name).first()
-    if not user:
-        user = User(nama=data.owner_name)
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-    
-    # Upsert Wallet
-    wallet = db.query(Wallet).filter(Wallet.address == data.address, Wallet.network_id == network.network_id).first()
-    if not wallet:
-        wallet = Wallet(user_id=user.user_id, network_id=network.network_id, address=data.address, label=data.label)
-        db.add(wallet)
-    else:
-        wallet.label = data.label
-        wallet.user_id = user.user_id 
-        db.add(wallet) # Ensure update is tracked
-    
-    db.commit()
-    db.refresh(wallet)
-    
-    # Fetch Etherscan
-    print(f"[Register] Fetching Etherscan for {data.address} on chain {network.chain_id}...")
-    client = EtherscanClient(settings.ETHERSCAN_API_KEY)
-    try:
-        # Pass the network's chain_id to Etherscan client
-        resp = await client.get_txlist(data.address, chain_id=network.chain_id)
-    except Exception as e:
-        # If fetch fails, we still return success for wallet creation, but warn?
-        # Or fail? Let's just log and continue, maybe raise HTTP 500 if critical.
-        # User said "fetch walletnya ... di upsert". Implies it's part of the process.
-        print(f"Etherscan error: {e}")
-        resp = {} # Empty response
-        
-    raw_list = resp.get("result", [])
-    if isinstance(raw_list, list):
-        tx_items = to_transaction_items(raw_list, data.address)
-        print(f"[Register] Found {len(tx_items)} transactions from Etherscan.")
-        
-        count_added = 0
-        for item in tx_items:
-            # Check if tx exists for THIS wallet
-            existing_tx = db.query(Transaction).filter(
-                Transaction.tx_hash == item.tx_hash,
-                Transaction.wallet_id == wallet.wallet_id
-            ).first()
-            
-            if existing_tx:
-                continue
-                
-            # Convert direction
-            direction = DirectionEnum.self
-            if item.from_address.lower() == data.address.lower() and item.to_address.lower() == data.address.lower():
-                direction = DirectionEnum.self
-            elif item.from_address.lower() == data.address.lower():
-                direction = DirectionEnum.out
-            elif item.to_address.lower() == data.address.lower():
-                direction = DirectionEnum.in_
-                
-            new_tx = Transaction(
-                network_id=network.network_id,
-                wallet_id=wallet.wallet_id,
-                tx_hash=item.tx_hash,
-                block_number=item.block_number,
-                time_stamp=datetime.fromisoformat(item.timestamp.replace("Z", "+00:00")).replace(tzinfo=None),
-                from_address=item.from_address,
-                to_address=item.to_address,
-                value_eth=Decimal(str(item.value_eth)),
-                gas_used=item.gas_used,
-                tx_fee_eth=Decimal("0"),
-                direction=direction.value,
-                status=item.status
-            )
-            db.add(new_tx)
-            count_added += 1
-        
-        db.commit()
-        print(f"[Register] Successfully added {count_added} new transactions.")
-    else:
-        print(f"[Register] Etherscan result is not a list: {raw_list}")
-        count_added = 0
 
+@router.get("/jobs/{job_id}")
+def get_ingest_job(job_id: int, db: Session = Depends(get_db)):
+    job = db.get(IngestJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job tidak ditemukan")
+    return job_to_dict(job)
+
+
+@router.get("/search")
+def search_wallet(
+    q: str = Query(..., min_length=1, max_length=100),
+    db: Session = Depends(get_read_db),
+    page: int = Query(1, ge=1, le=50),
+    pageSize: int = Query(20, ge=1, le=50),
+):
+    # "0x..." is an address prefix; anything else matches label / owner name tokens
+    items, has_more = search_wallets(db, q, page, pageSize)
     return {
-        "status": "success", 
-        "wallet_id": wallet.wallet_id, 
-        "address": wallet.address,
-        "transactions_fetched": len(raw_list) if isinstance(raw_list, list) else 0,
-        "transactions_added": count_added
+        "q": q,
+        "page": page,
+        "pageSize": pageSize,
+        "hasMore": has_more,
+        "items": items,
     }
 
 
 @router.get("/{address}")
-async def get_wallet_info(address: str, db: Session = Depends(get_db), page: int = Query(1, ge=1), pageSize: int = Query(20, ge=1, le=100)):
+async def get_wallet_info(
+    address: str,
+    db: Session = Depends(get_read_db),
+    primary: Session = Depends(get_db),
+    page: int = Query(1, ge=1),
+    pageSize: int = Query(20, ge=1, le=100),
+    exact: bool = Query(False),
+):
     addr = address.strip()
     if not is_valid_address(addr):
         raise HTTPException(status_code=400, detail="Alamat Ethereum tidak valid (harus 0x dan 42 karakter)")
@@ -189,99 +135,36 @@ async def get_wallet_info(address: str, db: Session = Depends(get_db), page: int
         print(f"[GetInfo] Wallet not found in DB. Attempting fallback...")
         # Fallback: use default network (or first available)
         network = _get_eth_network(db)
-        
-        # Fallback: Try to fetch from Etherscan and auto-import
-        client = EtherscanClient(settings.ETHERSCAN_API_KEY)
+
+        # Fallback: fetch from upstream and auto-import, behind admission control so a burst of
+        # unknown addresses cannot exhaust upstream quota; known wallets above never wait here
+        try:
+            task = auto_importer.submit(addr, network.network_id)
+        except AdmissionRejected as exc:
+            return JSONResponse(
+                status_code=503,
+                content={"detail": "Server sedang sibuk mengimpor wallet lain, coba lagi nanti"},
+                headers={"Retry-After": str(int(exc.retry_after))},
+            )
+        done, _ = await asyncio.wait({task}, timeout=settings.AUTO_IMPORT_WAIT)
+        if not done:
+            retry_after = int(auto_importer.retry_after())
+            return JSONResponse(
+                status_code=202,
+                content={"status": "importing", "address": addr.lower(), "retry_after": retry_after},
+                headers={"Retry-After": str(retry_after)},
+            )
         try:
-            resp = await client.get_txlist(addr, chain_id=network.chain_id)
-        except Exception as e:
-            # Only raise 404 if fetch also fails
-            print(f"Etherscan fetch failed for {addr}: {e}")
-            raise HTTPException(status_code=404, detail="Wallet tidak ditemukan di database dan gagal fetch dari Etherscan")
-        
-        raw_list = resp.get("result", [])
-        if not isinstance(raw_list, list) or len(raw_list) == 0:
-             # If no data found on Etherscan either, raise 404
-             # But wait, maybe it's a valid wallet with 0 transactions?
-             # For now, let's treat it as "New Wallet" and register it if Etherscan call was successful (status 1 or 0 with "No transactions found")
-             # Actually, Etherscan returns "No transactions found" with status 0.
-             msg = str(resp.get("message", ""))
-             if "No transactions found" not in msg and str(resp.get("status", "0")) != "1":
-                 raise HTTPException(status_code=404, detail="Wallet tidak ditemukan di database dan Etherscan")
-
-        # Auto-create User (Unknown/Auto)
-        user = db.query(User).filter(User.nama == "Auto-Detected Owner").first()
-        if not user:
-            user = User(nama="Auto-Detected Owner")
-            db.add(user)
-            db.commit()
-            db.refresh(user)
-
-        # Auto-create Wallet
-        wallet = Wallet(
-            user_id=user.user_id, 
-            network_id=network.network_id, 
-            address=addr.lower(), 
-            label="Auto-Imported Wallet"
-        )
-        db.add(wallet)
-        db.commit()
-        db.refresh(wallet)
-        
-        # Upsert Transactions
-        if isinstance(raw_list, list):
-            tx_items = to_transaction_items(raw_list, addr)
-            for item in tx_items:
-                direction = DirectionEnum.self
-                if item.from_address.lower() == addr.lower() and item.to_address.lower() == addr.lower():
-                    direction = DirectionEnum.self
-                elif item.from_address.lower() == addr.lower():
-                    direction = DirectionEnum.out
-                elif item.to_address.lower() == addr.lower():
-                    direction = DirectionEnum.in_
-                
-                new_tx = Transaction(
-                    network_id=network.network_id,
-                    wallet_id=wallet.wallet_id,
-                    tx_hash=item.tx_hash,
-                    block_number=item.block_number,
-                    time_stamp=datetime.fromisoformat(item.timestamp.replace("Z", "+00:00")).replace(tzinfo=None),
-                    from_address=item.from_address,
-                    to_address=item.to_address,
-                    value_eth=Decimal(str(item.value_eth)),
-                    gas_used=item.gas_used,
-                    tx_fee_eth=Decimal("0"),
-                    direction=direction.value,
-                    status=item.status
-                )
-                db.add(new_tx)
-            db.commit()
+            wallet_id = task.result()
+        except AutoImportError as exc:
+            raise HTTPException(status_code=404, detail=str(exc))
+        # Read-your-writes: the import just committed on the primary and a replica may not have it yet
+        db = primary
+        wallet = db.get(Wallet, wallet_id)
 
     owner: Optional[User] = db.query(User).filter(User.user_id == wallet.user_id).first()
 
-    q = (
-        db.query(Transaction)
-        .filter(Transaction.wallet_id == wallet.wallet_id)
-        .filter(Transaction.network_id == network.network_id)
-        .order_by(Transaction.time_stamp.desc())
-    )
-    total = q.count()
-    items: List[Transaction] = q.offset((page - 1) * pageSize).limit(pageSize).all()
-
-    tx_list = [
-        {
-            "tx_hash": t.tx_hash,
-            "block_number": t.block_number,
-            "time_stamp": _fmt_dt(t.time_stamp),
-            "from_address": t.from_address,
-            "to_address": t.to_address,
-            "value_eth": float(t.value_eth or 0),
-            "tx_fee_eth": float(t.tx_fee_eth or 0),
-            "direction": t.direction.value if hasattr(t.direction, "value") else t.direction,
-            "status": t.status,
-        }
-        for t in items
-    ]
+    total, tx_list = _wallet_tx_page(db, wallet, page, pageSize, exact)
 
     return {
         "wallet": {
@@ -301,7 +184,13 @@ async def get_wallet_info(address: str, db: Session = Depends(get_db), page: int
 
 
 @router.get("/{address}/transactions")
-def get_wallet_transactions(address: str, db: Session = Depends(get_db), page: int = Query(1, ge=1), pageSize: int = Query(20, ge=1, le=100)):
+def get_wallet_transactions(
+    address: str,
+    db: Session = Depends(get_read_db),
+    page: int = Query(1, ge=1),
+    pageSize: int = Query(20, ge=1, le=100),
+    exact: bool = Query(False),
+):
     addr = address.strip()
     if not is_valid_address(addr):
         raise HTTPException(status_code=400, detail="Alamat Ethereum tidak valid (harus 0x dan 42 karakter)")
@@ -320,29 +209,7 @@ def get_wallet_transactions(address: str, db: Session = Depends(get_db), page: i
     if not network:
         raise HTTPException(status_code=500, detail="Network data inconsistent")
 
-    q = (
-        db.query(Transaction)
-        .filter(Transaction.wallet_id == wallet.wallet_id)
-        .filter(Transaction.network_id == network.network_id)
-        .order_by(Transaction.time_stamp.desc())
-    )
-    total = q.count()
-    items: List[Transaction] = q.offset((page - 1) * pageSize).limit(pageSize).all()
-
-    tx_list = [
-        {
-            "tx_hash": t.tx_hash,
-            "block_number": t.block_number,
-            "time_stamp": _fmt_dt(t.time_stamp),
-            "from_address": t.from_address,
-            "to_address": t.to_address,
-            "value_eth": float(t.value_eth or 0),
-            "tx_fee_eth": float(t.tx_fee_eth or 0),
-            "direction": t.direction.value if hasattr(t.direction, "value") else t.direction,
-            "status": t.status,
-        }
-        for t in items
-    ]
+    total, tx_list = _wallet_tx_page(db, wallet, page, pageSize, exact)
 
     return {
         "page": page,
@@ -350,3 +217,78 @@ def get_wallet_transactions(address: str, db: Session = Depends(get_db), page: i
         "total": total,
         "items": tx_list,
     }
+
+
+@router.get("/{address}/counterparties")
+def get_wallet_counterparties(
+    address: str,
+    db: Session = Depends(get_read_db),
+    limit: int = Query(20, ge=1, le=100),
+    hops: int = Query(0, ge=0, le=2),
+    exact: bool = Query(False),
+):
+    addr = address.strip()
+    if not is_valid_address(addr):
+        raise HTTPException(status_code=400, detail="Alamat Ethereum tidak valid (harus 0x dan 42 karakter)")
+
+    wallet: Optional[Wallet] = (
+        db.query(Wallet)
+        .filter(Wallet.address == addr.lower())
+        .order_by(Wallet.wallet_id.desc())
+        .first()
+    )
+    if not wallet:
+        raise HTTPException(status_code=404, detail="Wallet tidak ditemukan di database")
+
+    result = {
+        "wallet_id": wallet.wallet_id,
+        "address": wallet.address,
+        "items": top_counterparties(db, wallet, limit, exact),
+    }
+    # hops=1|2 adds the graph of tracked wallets reachable through counterparty edges
+    if hops:
+        result["graph"] = counterparty_graph(db, wallet, limit, hops, exact)
+    return result
+
+
+@router.get("/{address}/stream")
+async def stream_wallet_transactions(address: str, request: Request, db: Session = Depends(get_read_db)):
+    addr = address.strip()
+    if not is_valid_address(addr):
+        raise HTTPException(status_code=400, detail="Alamat Ethereum tidak valid (harus 0x dan 42 karakter)")
+
+    wallet: Optional[Wallet] = (
+        db.query(Wallet)
+        .filter(Wallet.address == addr.lower())
+        .order_by(Wallet.wallet_id.desc())
+        .first()
+    )
+    if wallet:
+        network = db.query(Network).filter(Network.network_id == wallet.network_id).first()
+    else:
+        network = _get_eth_network(db)
+    chain_id = network.chain_id
+
+    async def event_stream():
+        # One poller per (wallet, chain) is shared by every connected client
+        queue = live_feed.subscribe(addr, chain_id)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                data = json.dumps(item.model_dump(by_alias=True))
+                yield f"event: transaction\nid: {item.tx_hash}\ndata: {data}\n\n"
+        finally:
+            live_feed.unsubscribe(addr, chain_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
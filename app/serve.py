@@ -0,0 +1,23 @@
+import os
+
+import uvicorn
+
+from app.config import settings
+from app.rate_limit import rate_limit_storage_uri
+
+
+def main() -> None:
+    workers = max(1, settings.WEB_CONCURRENCY)
+    # Workers re-import the app, so hand them the resolved shared storage through the env
+    os.environ["RATE_LIMIT_STORAGE_URI"] = rate_limit_storage_uri()
+    uvicorn.run(
+        "app.main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8001")),
+        workers=workers,
+        log_level=settings.LOG_LEVEL.lower(),
+    )
+
+
+if __name__ == "__main__":
+    main()
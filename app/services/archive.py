@@ -0,0 +1,184 @@
+import argparse
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import structlog
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.sql_models import Transaction, TransactionArchive
+
+
+logger = structlog.get_logger()
+
+ARCHIVE_COLUMNS = [c.name for c in Transaction.__table__.columns]
+WATERMARK_TTL = 60.0
+
+_watermark: Dict[str, object] = {"value": None, "expires": 0.0}
+
+
+def archive_watermark(db: Session) -> Optional[datetime]:
+    # Newest archived time_stamp; anything newer is guaranteed to still be in the hot table
+    now = time.monotonic()
+    if now >= _watermark["expires"]:
+        _watermark["value"] = db.query(func.max(TransactionArchive.time_stamp)).scalar()
+        _watermark["expires"] = now + WATERMARK_TTL
+    return _watermark["value"]
+
+
+def reset_watermark() -> None:
+    _watermark["value"] = None
+    _watermark["expires"] = 0.0
+
+
+def load_transactions(db: Session, tx_ids: Iterable[int], oldest: Optional[datetime] = None) -> Dict[int, object]:
+    ids = list(tx_ids)
+    if not ids:
+        return {}
+    found: Dict[int, object] = {t.tx_id: t for t in db.query(Transaction).filter(Transaction.tx_id.in_(ids))}
+    missing = [i for i in ids if i not in found]
+    if not missing:
+        return found
+    # Only pay for the archive lookup when the requested range reaches below the watermark
+    watermark = archive_watermark(db)
+    if watermark is not None and (oldest is None or oldest <= watermark):
+        found.update({t.tx_id: t for t in db.query(TransactionArchive).filter(TransactionArchive.tx_id.in_(missing))})
+    return found
+
+
+def month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def next_month(d: date) -> date:
+    return date(d.year + (d.month == 12), d.month % 12 + 1, 1)
+
+
+def partition_name(upper_bound: date) -> str:
+    # Partition pYYYYMM holds rows of that month, i.e. VALUES LESS THAN the first of the next month
+    prev = month_start(upper_bound - timedelta(days=1))
+    return f"p{prev.year:04d}{prev.month:02d}"
+
+
+def _mysql_partitions(db: Session) -> List[Tuple[str, str]]:
+    rows = db.execute(
+        text(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'transaction' AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION"
+        )
+    ).all()
+    return [(name, desc) for name, desc in rows]
+
+
+def _partition_upper_bound(description: str) -> Optional[date]:
+    if description is None or description.upper() == "MAXVALUE":
+        return None
+    return datetime.fromisoformat(description.strip("'")).date()
+
+
+def ensure_partitions(db: Session, months_ahead: int = 3, today: Optional[date] = None) -> List[str]:
+    # Split pmax so the next few months always have their own partition
+    if db.bind.dialect.name != "mysql":
+        return []
+    partitions = _mysql_partitions(db)
+    if not partitions:
+        return []
+    bounds = [_partition_upper_bound(desc) for _, desc in partitions]
+    last = max((b for b in bounds if b is not None), default=month_start(today or date.today()))
+    target = month_start(today or date.today())
+    for _ in range(months_ahead + 1):
+        target = next_month(target)
+    created: List[str] = []
+    defs: List[str] = []
+    while last < target:
+        upper = next_month(last)
+        name = partition_name(upper)
+        defs.append(f"PARTITION {name} VALUES LESS THAN ('{upper.isoformat()}')")
+        created.append(name)
+        last = upper
+    if defs:
+        defs.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+        db.execute(text(f"ALTER TABLE transaction REORGANIZE PARTITION pmax INTO ({', '.join(defs)})"))
+        logger.info("transaction_partitions_added", partitions=created)
+    return created
+
+
+def _archive_partitions(db: Session, cutoff: datetime) -> Optional[int]:
+    partitions = _mysql_partitions(db)
+    if not partitions:
+        return None
+    cols = ", ".join(ARCHIVE_COLUMNS)
+    moved = 0
+    for name, desc in partitions:
+        upper = _partition_upper_bound(desc)
+        if upper is None or datetime.combine(upper, datetime.min.time()) > cutoff:
+            continue
+        # Whole cold partitions move in one statement each and are then dropped, no row-by-row delete
+        res = db.execute(
+            text(f"INSERT IGNORE INTO transaction_archive ({cols}) SELECT {cols} FROM transaction PARTITION ({name})")
+        )
+        db.execute(text(f"ALTER TABLE transaction DROP PARTITION {name}"))
+        db.commit()
+        moved += res.rowcount or 0
+        logger.info("transaction_partition_archived", partition=name, rows=res.rowcount)
+    return moved
+
+
+def _archive_rows(db: Session, cutoff: datetime, batch_size: int) -> int:
+    hot = Transaction.__table__
+    cols = [hot.c[name] for name in ARCHIVE_COLUMNS]
+    moved = 0
+    while True:
+        ids = [
+            tx_id
+            for (tx_id,) in db.execute(
+                select(hot.c.tx_id).where(hot.c.time_stamp < cutoff).order_by(hot.c.tx_id).limit(batch_size)
+            )
+        ]
+        if not ids:
+            break
+        db.execute(
+            insert(TransactionArchive.__table__).from_select(ARCHIVE_COLUMNS, select(*cols).where(hot.c.tx_id.in_(ids)))
+        )
+        db.execute(delete(hot).where(hot.c.tx_id.in_(ids)))
+        db.commit()
+        moved += len(ids)
+    return moved
+
+
+def archive_before(db: Session, cutoff: datetime, batch_size: int = 1000) -> int:
+    moved = None
+    if db.bind.dialect.name == "mysql":
+        moved = _archive_partitions(db, cutoff)
+    if moved is None:
+        # Not partitioned (or not MySQL): move rows in id-ordered batches instead
+        moved = _archive_rows(db, cutoff, batch_size)
+    reset_watermark()
+    logger.info("transactions_archived", cutoff=cutoff.isoformat(), rows=moved)
+    return moved
+
+
+def main() -> None:
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Move cold transactions into transaction_archive")
+    parser.add_argument("--older-than-days", type=int, default=settings.ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--months-ahead", type=int, default=3, help="future monthly partitions to keep ready")
+    args = parser.parse_args()
+
+    cutoff = month_start(date.today() - timedelta(days=args.older_than_days))
+    db = SessionLocal()
+    try:
+        moved = archive_before(db, datetime.combine(cutoff, datetime.min.time()))
+        ensure_partitions(db, months_ahead=args.months_ahead)
+        db.commit()
+        print(f"Archived {moved} transactions older than {cutoff.isoformat()}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
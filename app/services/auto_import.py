@@ -0,0 +1,171 @@
+import asyncio
+from typing import Callable, Dict, Optional
+
+import structlog
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import settings
+from app.models.sql_models import Network, User, Wallet
+from app.services.block_scanner import address_index
+from app.services.data_sources import source_for_network
+from app.services.ingest import ingest_transactions
+from app.services.processor import to_transaction_items
+from app.services.registration import resolve_user
+
+
+logger = structlog.get_logger()
+
+AUTO_OWNER_NAME = "Auto-Detected Owner"
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"auto-import queue full, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class AutoImportError(Exception):
+    pass
+
+
+class AutoImporter:
+    def __init__(
+        self,
+        max_in_flight: int = 4,
+        max_queue: int = 16,
+        session_factory: Optional[Callable[[], Session]] = None,
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.session_factory = session_factory
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[str, asyncio.Task] = {}
+        self.in_flight = 0
+        self.admitted = 0
+        self.joined = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _session(self) -> Session:
+        factory = self.session_factory or database.SessionLocal
+        return factory()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._pending = {}
+            self.in_flight = 0
+        return self._slots
+
+    @property
+    def waiting(self) -> int:
+        return len(self._pending) - self.in_flight
+
+    def retry_after(self) -> float:
+        return max(1.0, settings.AUTO_IMPORT_RETRY_AFTER)
+
+    def metrics(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": max(0, self.waiting),
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "joined": self.joined,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    def submit(self, address: str, network_id: int) -> asyncio.Task:
+        slots = self._semaphore()
+        key = f"{network_id}:{address.lower()}"
+        task = self._pending.get(key)
+        if task is not None:
+            # Repeat lookups of an address already being imported share that import
+            self.joined += 1
+            return task
+        if len(self._pending) >= self.max_in_flight + self.max_queue:
+            self.rejected += 1
+            logger.warning("auto_import_rejected", wallet=address, **self.metrics())
+            raise AdmissionRejected(self.retry_after())
+        self.admitted += 1
+        task = asyncio.create_task(self._run(slots, key, address, network_id))
+        self._pending[key] = task
+        task.add_done_callback(self._finished)
+        return task
+
+    def _finished(self, task: asyncio.Task) -> None:
+        # A caller that got 202 never awaits the task; retrieve the outcome here so it is logged once
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is None:
+            self.completed += 1
+        else:
+            self.failed += 1
+            logger.warning("auto_import_failed", error=str(exc))
+
+    async def _run(self, slots: asyncio.Semaphore, key: str, address: str, network_id: int) -> int:
+        try:
+            async with slots:
+                self.in_flight += 1
+                try:
+                    return await self.import_wallet(address, network_id)
+                finally:
+                    self.in_flight -= 1
+        finally:
+            self._pending.pop(key, None)
+
+    async def import_wallet(self, address: str, network_id: int) -> int:
+        db = self._session()
+        try:
+            network = db.get(Network, network_id)
+            source = source_for_network(network)
+            try:
+                resp = await source.get_txlist(address, chain_id=network.chain_id)
+            except Exception as exc:
+                logger.warning("auto_import_fetch_failed", wallet=address, error=str(exc))
+                raise AutoImportError("Wallet tidak ditemukan di database dan gagal fetch dari Etherscan")
+
+            raw_list = resp.get("result", [])
+            if not isinstance(raw_list, list) or len(raw_list) == 0:
+                # Etherscan answers a wallet without history with status 0 and "No transactions found"
+                msg = str(resp.get("message", ""))
+                if "No transactions found" not in msg and str(resp.get("status", "0")) != "1":
+                    raise AutoImportError("Wallet tidak ditemukan di database dan Etherscan")
+
+            wallet = db.query(Wallet).filter(Wallet.address == address.lower(), Wallet.network_id == network_id).first()
+            if wallet is None:
+                user_id = resolve_user(db, AUTO_OWNER_NAME)
+                wallet = Wallet(
+                    user_id=user_id,
+                    network_id=network_id,
+                    address=address.lower(),
+                    label="Auto-Imported Wallet",
+                )
+                db.add(wallet)
+                db.commit()
+                db.refresh(wallet)
+                address_index.add(network_id, wallet.wallet_id, wallet.address)
+
+            if isinstance(raw_list, list):
+                items = to_transaction_items(raw_list, address)
+                await asyncio.to_thread(
+                    ingest_transactions, db, wallet, network_id, items, settings.INGEST_BATCH_SIZE
+                )
+            logger.info("auto_import_done", wallet=address, count=len(raw_list) if isinstance(raw_list, list) else 0)
+            return wallet.wallet_id
+        finally:
+            db.close()
+
+
+auto_importer = AutoImporter(
+    max_in_flight=settings.AUTO_IMPORT_MAX_IN_FLIGHT,
+    max_queue=settings.AUTO_IMPORT_MAX_QUEUE,
+)
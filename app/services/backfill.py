@@ -0,0 +1,219 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, List, Optional, Set
+
+import structlog
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.sql_models import Network, Wallet
+from app.services.block_scanner import address_index
+from app.services.data_sources import source_for_network
+from app.services.ingest import ingest_transactions
+from app.services.processor import is_valid_address, to_transaction_items
+from app.services.registration import chain_id_for, upsert_wallet
+
+
+logger = structlog.get_logger()
+
+FetchFn = Callable[[Network, str], Awaitable[dict]]
+
+
+@dataclass
+class BackfillRow:
+    address: str
+    network: str
+    owner: str
+    label: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        return f"{chain_id_for(self.network)}:{self.address.lower()}"
+
+
+def read_rows(path: str) -> List[BackfillRow]:
+    rows: List[BackfillRow] = []
+    with open(path, newline="", encoding="utf-8") as fh:
+        if path.endswith(".jsonl"):
+            records: Iterable[dict] = (json.loads(line) for line in fh if line.strip())
+        else:
+            records = csv.DictReader(fh)
+        for rec in records:
+            rows.append(
+                BackfillRow(
+                    address=(rec.get("address") or "").strip(),
+                    network=(rec.get("network") or "sepolia").strip(),
+                    owner=(rec.get("owner") or rec.get("owner_name") or "Backfill").strip(),
+                    label=(rec.get("label") or None),
+                )
+            )
+    return rows
+
+
+class Checkpoint:
+    # Append-only log of finished keys; a crash loses at most the wallets still in flight
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as fh:
+                self.done = {line.strip() for line in fh if line.strip()}
+        self._fh = open(path, "a", encoding="utf-8")
+
+    def mark(self, key: str) -> None:
+        self.done.add(key)
+        self._fh.write(key + "\n")
+        self._fh.flush()
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+class RateBudget:
+    # Spaces upstream calls evenly so concurrent workers stay within N requests per second
+    def __init__(self, per_second: float):
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class Progress:
+    def __init__(self, total: int, report_every: float = 5.0, out: Callable[[str], None] = print):
+        self.total = total
+        self.report_every = report_every
+        self.out = out
+        self.done = 0
+        self.failed = 0
+        self.tx_added = 0
+        self.started = time.monotonic()
+        self._last_report = self.started
+
+    def record(self, ok: bool, added: int = 0) -> None:
+        if ok:
+            self.done += 1
+        else:
+            self.failed += 1
+        self.tx_added += added
+        now = time.monotonic()
+        if now - self._last_report >= self.report_every:
+            self._last_report = now
+            self.report()
+
+    def report(self) -> None:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        finished = self.done + self.failed
+        rate = finished / elapsed
+        eta = (self.total - finished) / rate if rate else float("inf")
+        self.out(
+            f"[backfill] {finished}/{self.total} wallets ({self.failed} failed), "
+            f"{rate:.2f} wallets/s, {self.tx_added / elapsed:.1f} tx/s, ETA {eta:.0f}s"
+        )
+
+
+async def _default_fetch(network: Network, address: str) -> dict:
+    return await source_for_network(network).get_txlist(address, chain_id=network.chain_id)
+
+
+async def run_backfill(
+    rows: List[BackfillRow],
+    session_factory: Callable[[], Session],
+    checkpoint: Checkpoint,
+    concurrency: int = 4,
+    rate: float = 4.0,
+    batch_size: int = 500,
+    fetch: FetchFn = _default_fetch,
+    progress: Optional[Progress] = None,
+) -> Progress:
+    pending = [r for r in rows if r.key not in checkpoint.done]
+    progress = progress or Progress(len(pending))
+    budget = RateBudget(rate)
+    queue: asyncio.Queue = asyncio.Queue()
+    for row in pending:
+        queue.put_nowait(row)
+
+    async def worker() -> None:
+        db = session_factory()
+        try:
+            while True:
+                try:
+                    row = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                added = 0
+                try:
+                    if not is_valid_address(row.address):
+                        raise ValueError(f"invalid address {row.address!r}")
+                    wallet_id, network_id = upsert_wallet(
+                        db, chain_id_for(row.network), row.network, row.owner, row.address, row.label
+                    )
+                    db.commit()
+                    network = db.get(Network, network_id)
+                    await budget.acquire()
+                    resp = await fetch(network, row.address)
+                    raw_list = resp.get("result", [])
+                    if not isinstance(raw_list, list):
+                        msg = str(resp.get("message", ""))
+                        if "No transactions found" not in msg:
+                            raise RuntimeError(f"upstream error: {msg} {raw_list}".strip())
+                        raw_list = []
+                    wallet = db.get(Wallet, wallet_id)
+                    items = to_transaction_items(raw_list, row.address)
+                    added = await asyncio.to_thread(ingest_transactions, db, wallet, network_id, items, batch_size)
+                    address_index.add(network_id, wallet_id, row.address)
+                    checkpoint.mark(row.key)
+                    progress.record(True, added)
+                except Exception as exc:
+                    db.rollback()
+                    # Not checkpointed, so the next run retries it
+                    logger.warning("backfill_wallet_failed", wallet=row.address, error=str(exc))
+                    progress.record(False)
+        finally:
+            db.close()
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    progress.report()
+    return progress
+
+
+def main() -> None:
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Bulk-import wallets from a CSV or JSONL file")
+    parser.add_argument("path", help="CSV with header address,network,owner,label or JSONL with the same keys")
+    parser.add_argument("--checkpoint", help="progress file (default: <path>.checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=4.0, help="upstream requests per second across all workers")
+    parser.add_argument("--batch-size", type=int, default=settings.INGEST_BATCH_SIZE)
+    args = parser.parse_args()
+
+    rows = read_rows(args.path)
+    checkpoint = Checkpoint(args.checkpoint or args.path + ".checkpoint")
+    skipped = sum(1 for r in rows if r.key in checkpoint.done)
+    print(f"[backfill] {len(rows)} wallets in {args.path}, {skipped} already done")
+    try:
+        progress = asyncio.run(
+            run_backfill(rows, SessionLocal, checkpoint, args.concurrency, args.rate, args.batch_size)
+        )
+    finally:
+        checkpoint.close()
+    if progress.failed:
+        print(f"[backfill] {progress.failed} wallets failed; run the same command again to retry them")
+
+
+if __name__ == "__main__":
+    main()
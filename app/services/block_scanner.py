@@ -0,0 +1,234 @@
+import asyncio
+import hashlib
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+import structlog
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import settings
+from app.models.schemas import TransactionItem
+from app.models.sql_models import BlockCursor, Network, Wallet
+from app.services.data_sources import JsonRpcDataSource, source_for_network
+from app.services.ingest import ingest_matches
+from app.services.processor import to_transaction_items
+
+
+logger = structlog.get_logger()
+
+
+class BloomFilter:
+    def __init__(self, capacity: int = 10_000, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> Iterable[int]:
+        # Kirsch-Mitzenmacher: k positions from two halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class AddressIndex:
+    def __init__(self):
+        self._wallets: Dict[int, Dict[str, int]] = {}
+        self._blooms: Dict[int, BloomFilter] = {}
+        # (wallet count, highest wallet_id) of the table as last loaded
+        self.version: Optional[Tuple[int, Optional[int]]] = None
+
+    def refresh(self, db: Session) -> int:
+        wallets: Dict[int, Dict[str, int]] = {}
+        count, top = 0, None
+        for wallet_id, network_id, address in db.query(Wallet.wallet_id, Wallet.network_id, Wallet.address):
+            wallets.setdefault(network_id, {})[address.lower()] = wallet_id
+            count += 1
+            top = wallet_id if top is None else max(top, wallet_id)
+        blooms = {}
+        for network_id, by_address in wallets.items():
+            # Headroom so registrations between refreshes keep the false-positive rate down
+            bloom = BloomFilter(capacity=len(by_address) * 2 + 1024)
+            for address in by_address:
+                bloom.add(address)
+            blooms[network_id] = bloom
+        self._wallets, self._blooms = wallets, blooms
+        self.version = (count, top)
+        return sum(len(v) for v in wallets.values())
+
+    def refresh_if_changed(self, db: Session) -> bool:
+        # add() only sees registrations in this process; wallets added by other workers or the
+        # backfill CLI show up as a new count or highest id and trigger a reload
+        count, top = db.query(func.count(Wallet.wallet_id), func.max(Wallet.wallet_id)).one()
+        if (count, top) == self.version:
+            return False
+        self.refresh(db)
+        return True
+
+    def add(self, network_id: int, wallet_id: int, address: str) -> None:
+        address = address.lower()
+        self._wallets.setdefault(network_id, {})[address] = wallet_id
+        bloom = self._blooms.get(network_id)
+        if bloom is None:
+            bloom = self._blooms[network_id] = BloomFilter(capacity=1024)
+        bloom.add(address)
+
+    def match(self, network_id: int, address: Optional[str]) -> Optional[int]:
+        if not address:
+            return None
+        bloom = self._blooms.get(network_id)
+        address = address.lower()
+        # Nearly every address in a block is untracked; the filter rejects those without touching the dict
+        if bloom is None or address not in bloom:
+            return None
+        return self._wallets[network_id].get(address)
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._wallets.values())
+
+
+class BlockScanner:
+    def __init__(
+        self,
+        index: AddressIndex,
+        session_factory: Optional[Callable[[], Session]] = None,
+        max_blocks: int = 500,
+        interval: float = 12.0,
+    ):
+        self.index = index
+        self.session_factory = session_factory
+        self.max_blocks = max(1, max_blocks)
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def _session(self) -> Session:
+        factory = self.session_factory or database.SessionLocal
+        return factory()
+
+    def _match_block(self, network_id: int, block: dict) -> List[Tuple[int, str, dict]]:
+        found = []
+        for tx in block.get("transactions", []):
+            for side in ("from", "to"):
+                wallet_id = self.index.match(network_id, tx.get(side))
+                if wallet_id is not None:
+                    found.append((wallet_id, tx[side].lower(), tx))
+        return found
+
+    async def scan_network(self, db: Session, network: Network) -> int:
+        source = source_for_network(network)
+        if not isinstance(source, JsonRpcDataSource):
+            # Etherscan has no cheap full-block feed; those networks stay on per-wallet jobs
+            return 0
+        cursor = db.get(BlockCursor, network.network_id)
+        async with aiohttp.ClientSession(timeout=source.timeout) as session:
+            latest = await source.block_number(session)
+            if cursor is None:
+                # Start at the tip: history before this point is what registration jobs backfill
+                db.add(BlockCursor(network_id=network.network_id, last_block=latest))
+                db.commit()
+                return 0
+            first = cursor.last_block + 1
+            last = min(latest, cursor.last_block + self.max_blocks)
+            if first > last:
+                return 0
+
+            hits: List[Tuple[int, str, dict, dict]] = []
+            scanned = first - 1
+            for chunk in range(first, last + 1, source.batch_size):
+                numbers = range(chunk, min(chunk + source.batch_size, last + 1))
+                blocks = {int(b["number"], 16): b for b in await source.get_blocks(session, numbers)}
+                for number in numbers:
+                    block = blocks.get(number)
+                    if block is None:
+                        break
+                    hits.extend((wid, addr, tx, block) for wid, addr, tx in self._match_block(network.network_id, block))
+                    scanned = number
+                if scanned < numbers[-1]:
+                    # A node behind a load balancer can lag the one that answered eth_blockNumber; the
+                    # cursor stops before the first missing block so the next pass picks it up
+                    logger.info("block_scan_gap", network=network.name, missing=scanned + 1)
+                    break
+            if scanned < first:
+                return 0
+            last = scanned
+            receipts = await source.get_receipts(session, list({tx["hash"] for _, _, tx, _ in hits}))
+
+        items: Dict[str, TransactionItem] = {}
+        for _, addr, tx, block in hits:
+            if tx["hash"].lower() not in items:
+                record = source.to_record(block, tx, receipts.get(tx["hash"].lower()))
+                items[tx["hash"].lower()] = to_transaction_items([record], addr)[0]
+        matches = [(wid, addr, items[tx["hash"].lower()]) for wid, addr, tx, _ in hits]
+
+        def advance() -> None:
+            cursor.last_block = last
+
+        added = await asyncio.to_thread(ingest_matches, db, network.network_id, matches, advance)
+        logger.info(
+            "block_scan_done",
+            network=network.name,
+            from_block=first,
+            to_block=last,
+            matches=len(matches),
+            added=added,
+        )
+        return added
+
+    async def scan_once(self) -> int:
+        db = self._session()
+        try:
+            if self.index.refresh_if_changed(db):
+                logger.info("block_scan_index_refreshed", wallets=len(self.index))
+            added = 0
+            for network in db.query(Network).order_by(Network.network_id).all():
+                try:
+                    added += await self.scan_network(db, network)
+                except Exception as exc:
+                    db.rollback()
+                    logger.warning("block_scan_failed", network=network.name, error=str(exc))
+            return added
+        finally:
+            db.close()
+
+    def refresh_index(self) -> int:
+        db = self._session()
+        try:
+            return self.index.refresh(db)
+        finally:
+            db.close()
+
+    async def run(self) -> None:
+        count = await asyncio.to_thread(self.refresh_index)
+        logger.info("block_scanner_started", wallets=count, interval=self.interval)
+        while True:
+            await self.scan_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+address_index = AddressIndex()
+block_scanner = BlockScanner(
+    address_index,
+    max_blocks=settings.BLOCK_SCAN_MAX_BLOCKS,
+    interval=settings.BLOCK_SCAN_INTERVAL,
+)
@@ -0,0 +1,138 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, key: str, retry_after: float):
+        super().__init__(f"circuit open for {key}, retry in {retry_after:.1f}s")
+        self.key = key
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._cooldown = recovery_timeout
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and self._clock() - self._opened_at >= self._cooldown:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and (
+                not self._probe_in_flight or self._clock() - self._probe_started >= self.recovery_timeout
+            ):
+                # Let exactly one probe through; everyone else keeps failing fast. A probe that never
+                # reported back (cancelled, abandoned) is replaced after another recovery_timeout
+                self._probe_in_flight = True
+                self._probe_started = self._clock()
+                return True
+            return False
+
+    def release_probe(self) -> None:
+        # The probe ended without telling us anything about upstream; let the next caller probe
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self._cooldown - (self._clock() - self._opened_at))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._cooldown = max(self.recovery_timeout, retry_after or 0.0)
+                self._probe_in_flight = False
+
+
+_breakers: Dict[Tuple[int, str], CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(chain_id: int, api_key: str, failure_threshold: int = 5, recovery_timeout: float = 30.0) -> CircuitBreaker:
+    key = (chain_id, api_key)
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(failure_threshold=failure_threshold, recovery_timeout=recovery_timeout)
+            _breakers[key] = breaker
+        return breaker
+
+
+def breaker_states(api_key: str) -> Dict[int, str]:
+    with _breakers_lock:
+        items = [(chain_id, breaker) for (chain_id, key), breaker in _breakers.items() if key == api_key]
+    return {chain_id: breaker.state for chain_id, breaker in items}
+
+
+def reset_breakers() -> None:
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: Optional[float] = None) -> float:
+    # Full jitter: uniform in [0, min(cap, base * 2^attempt)], never sooner than the server asked
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
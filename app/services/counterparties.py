@@ -0,0 +1,97 @@
+from typing import Dict, List, Set
+
+from sqlalchemy.orm import Session
+
+from app.models.schemas import format_eth
+from app.models.sql_models import Wallet, WalletCounterparty
+
+
+def _wei_out(wei, exact: bool) -> dict:
+    wei = int(wei or 0)
+    return {"wei": str(wei), "eth": format_eth(wei, exact)}
+
+
+def _edge_out(row: WalletCounterparty, exact: bool) -> dict:
+    return {
+        "tx_count": row.tx_count,
+        "volume_in": _wei_out(row.volume_in_wei, exact),
+        "volume_out": _wei_out(row.volume_out_wei, exact),
+        "first_seen": row.first_seen.isoformat() if row.first_seen else None,
+        "last_seen": row.last_seen.isoformat() if row.last_seen else None,
+    }
+
+
+def _tracked(db: Session, network_id: int, addresses) -> Dict[str, Wallet]:
+    addresses = list(set(addresses))
+    if not addresses:
+        return {}
+    rows = db.query(Wallet).filter(Wallet.network_id == network_id, Wallet.address.in_(addresses))
+    return {w.address: w for w in rows}
+
+
+def top_counterparties(db: Session, wallet: Wallet, limit: int, exact: bool = False) -> List[dict]:
+    # Read straight off idx_counterparty_top; nothing is aggregated at request time
+    rows = (
+        db.query(WalletCounterparty)
+        .filter(WalletCounterparty.wallet_id == wallet.wallet_id)
+        .order_by(WalletCounterparty.tx_count.desc(), WalletCounterparty.last_seen.desc())
+        .limit(limit)
+        .all()
+    )
+    tracked = _tracked(db, wallet.network_id, [r.counterparty for r in rows])
+    items = []
+    for r in rows:
+        other = tracked.get(r.counterparty)
+        items.append(
+            {
+                "address": r.counterparty,
+                "wallet_id": other.wallet_id if other else None,
+                "label": other.label if other else None,
+                **_edge_out(r, exact),
+            }
+        )
+    return items
+
+
+def _tracked_neighbours(db: Session, network_id: int, wallet_ids: List[int], limit: int):
+    # Counterparty rows whose address is itself a tracked wallet on the same network
+    return (
+        db.query(WalletCounterparty, Wallet)
+        .join(Wallet, Wallet.address == WalletCounterparty.counterparty)
+        .filter(WalletCounterparty.wallet_id.in_(wallet_ids), Wallet.network_id == network_id)
+        .order_by(WalletCounterparty.tx_count.desc())
+        .limit(limit * max(1, len(wallet_ids)))
+        .all()
+    )
+
+
+def counterparty_graph(db: Session, wallet: Wallet, limit: int, hops: int = 2, exact: bool = False) -> dict:
+    nodes: Dict[int, dict] = {
+        wallet.wallet_id: {"wallet_id": wallet.wallet_id, "address": wallet.address, "label": wallet.label, "hop": 0}
+    }
+    edges: List[dict] = []
+    seen_edges: Set[tuple] = set()
+    frontier = [wallet.wallet_id]
+    for hop in range(1, hops + 1):
+        if not frontier:
+            break
+        per_source: Dict[int, int] = {}
+        next_frontier: List[int] = []
+        for row, other in _tracked_neighbours(db, wallet.network_id, frontier, limit):
+            if other.wallet_id == row.wallet_id or per_source.get(row.wallet_id, 0) >= limit:
+                continue
+            per_source[row.wallet_id] = per_source.get(row.wallet_id, 0) + 1
+            if other.wallet_id not in nodes:
+                nodes[other.wallet_id] = {
+                    "wallet_id": other.wallet_id,
+                    "address": other.address,
+                    "label": other.label,
+                    "hop": hop,
+                }
+                next_frontier.append(other.wallet_id)
+            key = (row.wallet_id, other.wallet_id)
+            if key not in seen_edges:
+                seen_edges.add(key)
+                edges.append({"source": row.wallet_id, "target": other.wallet_id, **_edge_out(row, exact)})
+        frontier = next_frontier
+    return {"hops": hops, "nodes": list(nodes.values()), "edges": edges}
@@ -0,0 +1,214 @@
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Protocol, Sequence, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+import structlog
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.sql_models import Network
+from app.services.etherscan_client import CHAIN_ID, EtherscanClient, UpstreamResponseError
+
+
+logger = structlog.get_logger()
+
+
+class JsonRpcError(Exception):
+    pass
+
+
+# Every provider answers in Etherscan's txlist shape ({"status", "message", "result": [...]})
+# so callers keep one code path for status handling and to_transaction_items.
+class TransactionDataSource(Protocol):
+    name: str
+
+    async def get_txlist(self, address: str, chain_id: int = CHAIN_ID, start_block: int = 0) -> Dict[str, Any]:
+        ...
+
+    async def get_transaction(self, tx_hash: str, chain_id: int = CHAIN_ID) -> Optional[Dict[str, Any]]:
+        ...
+
+
+class EtherscanDataSource:
+    name = "etherscan"
+
+    def __init__(self, api_key: Optional[str] = None):
+        self.client = EtherscanClient(api_key)
+
+    async def get_txlist(self, address: str, chain_id: int = CHAIN_ID, start_block: int = 0) -> Dict[str, Any]:
+        return await self.client.get_txlist(address, chain_id=chain_id, start_block=start_block)
+
+    def iter_txlist(self, address: str, chain_id: int = CHAIN_ID, start_block: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        return self.client.iter_txlist(address, chain_id=chain_id, start_block=start_block)
+
+    async def get_transaction(self, tx_hash: str, chain_id: int = CHAIN_ID) -> Optional[Dict[str, Any]]:
+        tx = await self.client.proxy("eth_getTransactionByHash", chain_id, txhash=tx_hash)
+        if not tx or not tx.get("blockNumber"):
+            # Unknown, or still pending: nothing block-anchored to report yet
+            return None
+        receipt = await self.client.proxy("eth_getTransactionReceipt", chain_id, txhash=tx_hash)
+        block = await self.client.proxy("eth_getBlockByNumber", chain_id, tag=tx["blockNumber"], boolean="false")
+        return JsonRpcDataSource.to_record(block or {"number": tx["blockNumber"]}, tx, receipt)
+
+
+def _hex_int(value: Optional[str]) -> int:
+    if value in (None, "", "0x"):
+        return 0
+    return int(value, 16)
+
+
+class JsonRpcDataSource:
+    name = "jsonrpc"
+
+    def __init__(self, url: str, batch_size: int = 50, scan_blocks: int = 2000, timeout: float = 10.0):
+        self.url = url
+        self.batch_size = max(1, batch_size)
+        self.scan_blocks = scan_blocks
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async def _call_batch(self, session: aiohttp.ClientSession, calls: Sequence[Tuple[str, list]]) -> List[Any]:
+        if not calls:
+            return []
+        payload = [{"jsonrpc": "2.0", "id": i, "method": method, "params": params} for i, (method, params) in enumerate(calls)]
+        async with session.post(self.url, json=payload) as resp:
+            if resp.status != 200:
+                raise JsonRpcError(f"HTTP {resp.status} from {self.url}")
+            data = await resp.json(content_type=None)
+        if isinstance(data, dict):
+            # Some nodes answer a rejected batch with a single error object
+            raise JsonRpcError(str(data.get("error", data)))
+        by_id = {item.get("id"): item for item in data}
+        results = []
+        for i, (method, _) in enumerate(calls):
+            item = by_id.get(i)
+            if item is None or item.get("error"):
+                raise JsonRpcError(f"{method} failed: {item.get('error') if item else 'missing response'}")
+            results.append(item.get("result"))
+        return results
+
+    async def _batched(self, session: aiohttp.ClientSession, calls: Sequence[Tuple[str, list]]) -> List[Any]:
+        results: List[Any] = []
+        for start in range(0, len(calls), self.batch_size):
+            results.extend(await self._call_batch(session, calls[start : start + self.batch_size]))
+        return results
+
+    async def block_number(self, session: aiohttp.ClientSession) -> int:
+        (latest,) = await self._call_batch(session, [("eth_blockNumber", [])])
+        return _hex_int(latest)
+
+    async def get_blocks(self, session: aiohttp.ClientSession, numbers: Sequence[int]) -> List[Dict[str, Any]]:
+        calls = [("eth_getBlockByNumber", [hex(n), True]) for n in numbers]
+        return [b for b in await self._batched(session, calls) if b]
+
+    async def get_receipts(self, session: aiohttp.ClientSession, tx_hashes: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        calls = [("eth_getTransactionReceipt", [h]) for h in tx_hashes]
+        receipts = await self._batched(session, calls)
+        return {h.lower(): r for h, r in zip(tx_hashes, receipts) if r}
+
+    @staticmethod
+    def to_record(block: Dict[str, Any], tx: Dict[str, Any], receipt: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        receipt = receipt or {}
+        gas_price = receipt.get("effectiveGasPrice") or tx.get("gasPrice")
+        return {
+            "hash": tx.get("hash", ""),
+            "blockNumber": str(_hex_int(block.get("number"))),
+            "timeStamp": str(_hex_int(block.get("timestamp"))),
+            "from": tx.get("from") or "",
+            "to": tx.get("to") or "",
+            "value": str(_hex_int(tx.get("value"))),
+            "gas": str(_hex_int(tx.get("gas"))),
+            "gasPrice": str(_hex_int(gas_price)),
+            "gasUsed": str(_hex_int(receipt.get("gasUsed"))),
+            "isError": "0" if receipt.get("status", "0x1") == "0x1" else "1",
+        }
+
+    async def get_transaction(self, tx_hash: str, chain_id: int = CHAIN_ID) -> Optional[Dict[str, Any]]:
+        async with aiohttp.ClientSession(timeout=self.timeout) as session:
+            tx, receipt = await self._call_batch(
+                session, [("eth_getTransactionByHash", [tx_hash]), ("eth_getTransactionReceipt", [tx_hash])]
+            )
+            if not tx or not tx.get("blockNumber"):
+                return None
+            (block,) = await self._call_batch(session, [("eth_getBlockByNumber", [tx["blockNumber"], False])])
+        return self.to_record(block or {"number": tx["blockNumber"]}, tx, receipt)
+
+    async def get_txlist(self, address: str, chain_id: int = CHAIN_ID, start_block: int = 0) -> Dict[str, Any]:
+        addr = address.lower()
+        async with aiohttp.ClientSession(timeout=self.timeout) as session:
+            latest = await self.block_number(session)
+            # A node has no address index: scan a bounded window of recent blocks
+            first = max(start_block, latest - self.scan_blocks + 1, 0)
+            # Anything older than the window was never looked at, so the answer says so
+            window = {"truncated": True, "scanned_from_block": first} if first > max(start_block, 0) else {}
+            matches: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+            for chunk in range(first, latest + 1, self.batch_size):
+                blocks = await self.get_blocks(session, range(chunk, min(chunk + self.batch_size, latest + 1)))
+                for block in blocks:
+                    for tx in block.get("transactions", []):
+                        if (tx.get("from") or "").lower() == addr or (tx.get("to") or "").lower() == addr:
+                            matches.append((block, tx))
+            receipts = await self.get_receipts(session, [tx["hash"] for _, tx in matches])
+
+        records = [self.to_record(b, tx, receipts.get(tx["hash"].lower())) for b, tx in matches]
+        if not records:
+            return {"status": "0", "message": "No transactions found", "result": [], **window}
+        records.sort(key=lambda r: int(r["blockNumber"]), reverse=True)
+        return {"status": "1", "message": "OK", "result": records, **window}
+
+
+def is_rpc_url(url: Optional[str]) -> bool:
+    if not url:
+        return False
+    parsed = urlparse(url)
+    return parsed.scheme in ("http", "https") and "etherscan" not in (parsed.hostname or "")
+
+
+_rpc_sources: Dict[str, JsonRpcDataSource] = {}
+
+
+def source_for_url(api_base_url: Optional[str]) -> TransactionDataSource:
+    if is_rpc_url(api_base_url):
+        source = _rpc_sources.get(api_base_url)
+        if source is None:
+            source = JsonRpcDataSource(
+                api_base_url, batch_size=settings.JSONRPC_BATCH_SIZE, scan_blocks=settings.JSONRPC_SCAN_BLOCKS
+            )
+            _rpc_sources[api_base_url] = source
+        return source
+    return EtherscanDataSource()
+
+
+def source_for_network(network: Optional[Network]) -> TransactionDataSource:
+    # Network.api_base_url pointing at a node selects JSON-RPC; no row, empty or Etherscan keeps Etherscan
+    return source_for_url(network.api_base_url if network is not None else None)
+
+
+def source_for_chain(db: Session, chain_id: int) -> TransactionDataSource:
+    return source_for_network(db.query(Network).filter(Network.chain_id == chain_id).first())
+
+
+async def iter_txlist(
+    source: TransactionDataSource,
+    address: str,
+    chain_id: int = CHAIN_ID,
+    start_block: int = 0,
+    on_total: Optional[Callable[[int], None]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    # Streams when the source can; otherwise replays its buffered list through the same interface.
+    # Only a buffered list knows its length before the first record, and only then is on_total called
+    if hasattr(source, "iter_txlist"):
+        async for record in source.iter_txlist(address, chain_id=chain_id, start_block=start_block):
+            yield record
+        return
+    resp = await source.get_txlist(address, chain_id=chain_id, start_block=start_block)
+    raw_list = resp.get("result", [])
+    if not isinstance(raw_list, list):
+        if "No transactions found" in str(resp.get("message", "")):
+            return
+        raise UpstreamResponseError(resp)
+    if resp.get("truncated"):
+        logger.warning("txlist_truncated", wallet=address, chain_id=chain_id, scanned_from_block=resp.get("scanned_from_block"))
+    if on_total is not None:
+        on_total(len(raw_list))
+    for record in raw_list:
+        yield record
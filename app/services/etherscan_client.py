@@ -1,53 +1,259 @@
-from typing import Any, Dict
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 import asyncio
 
 import aiohttp
+import structlog
 
 from app.config import settings
+from app.services.circuit_breaker import CircuitOpenError, backoff_delay, parse_retry_after
+from app.services.http_pool import http_pool
+from app.services.json_stream import TxListParser
+from app.services.key_pool import KeyPool, get_key_pool
+from app.tracing import tracer
 
 
 BASE_URL = "https://api.etherscan.io/v2/api"
 CHAIN_ID = 11155111
+# Read size off the socket; peak memory per call is about one chunk plus one partial record
+STREAM_CHUNK = 64 * 1024
+
+logger = structlog.get_logger()
+
+# Last good txlist per (chain_id, address), served while the breaker is open
+_stale_cache: "OrderedDict[Tuple[int, str], Dict[str, Any]]" = OrderedDict()
+
+
+def _cache_put(key: Tuple[int, str], data: Dict[str, Any]) -> None:
+    _stale_cache[key] = data
+    _stale_cache.move_to_end(key)
+    while len(_stale_cache) > settings.ETHERSCAN_STALE_CACHE_SIZE:
+        _stale_cache.popitem(last=False)
+
+
+def _cache_get(key: Tuple[int, str]) -> Optional[Dict[str, Any]]:
+    data = _stale_cache.get(key)
+    if data is not None:
+        _stale_cache.move_to_end(key)
+    return data
+
+
+def is_rate_limited(data: Any) -> bool:
+    if not isinstance(data, dict) or str(data.get("status", "0")) == "1":
+        return False
+    msg = f"{data.get('message', '')} {data.get('result', '')}"
+    return "rate limit" in msg.lower()
+
+
+class UpstreamResponseError(Exception):
+    def __init__(self, data: Dict[str, Any]):
+        super().__init__(f"etherscan error: {data.get('message', '')} {data.get('result', '')}".strip())
+        self.data = data
+
+
+class TxListStream:
+    # Top-level fields of the answer that ended the attempt loop; `result` is only here when it was not a list.
+    # A buffered stream yields nothing and keeps the successful attempt's records instead, so a body that
+    # breaks off half way is simply thrown away and retried
+    def __init__(self, buffered: bool = False):
+        self.fields: Dict[str, Any] = {}
+        self.is_list = False
+        self.count = 0
+        self.buffered = buffered
+        self.records: List[Dict[str, Any]] = []
 
 
 class EtherscanClient:
-    def __init__(self, api_key: str):
-        self.api_key = api_key
+    def __init__(self, api_key: Optional[str] = None, pool: Optional[KeyPool] = None):
+        # No key: the configured ETHERSCAN_API_KEYS / ETHERSCAN_API_KEY pool shared by every client
+        if pool is None:
+            pool = get_key_pool([(api_key, 1.0)] if api_key is not None else None)
+        self.pool = pool
+
+    async def _acquire(self, chain_id: int):
+        return await self.pool.acquire(chain_id, settings.ETHERSCAN_BACKOFF_MAX)
+
+    async def get_txlist(self, address: str, chain_id: int = CHAIN_ID, start_block: int = 0) -> Dict[str, Any]:
+        with tracer.span(
+            "etherscan.get_txlist", kind="CLIENT", **{"chain_id": chain_id, "wallet": address, "start_block": start_block}
+        ) as span:
+            data = await self._get_txlist(address, chain_id, start_block)
+            if span is not None and isinstance(data, dict):
+                span.set_attribute("etherscan.status", str(data.get("status")))
+                span.set_attribute("etherscan.cached", bool(data.get("cached")))
+            return data
 
-    async def get_txlist(self, address: str, chain_id: int = CHAIN_ID) -> Dict[str, Any]:
+    async def _get_txlist(self, address: str, chain_id: int, start_block: int) -> Dict[str, Any]:
+        cache_key = (chain_id, address.lower())
+        # Only full histories are kept as stale fallbacks; a delta would masquerade as the whole list
+        full_history = start_block == 0
+        stream = TxListStream(buffered=True)
+        try:
+            async for _ in self._attempts(address, chain_id, start_block, stream):
+                pass
+        except CircuitOpenError:
+            # Only raised before anything was sent: every key is open or benched
+            cached = _cache_get(cache_key) if full_history else None
+            if cached is not None:
+                logger.warning("etherscan_circuit_open_serving_cache", wallet=address, chain_id=chain_id)
+                return {**cached, "cached": True}
+            raise
+        if not stream.is_list:
+            return stream.fields
+        data = {**stream.fields, "result": stream.records}
+        if full_history and str(data.get("status", "0")) == "1":
+            _cache_put(cache_key, data)
+        return data
+
+    async def iter_txlist(self, address: str, chain_id: int = CHAIN_ID, start_block: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        # Records are yielded while the body is still downloading; nothing is cached, the caller persists them
+        stream = TxListStream()
+        with tracer.span(
+            "etherscan.iter_txlist", kind="CLIENT", **{"chain_id": chain_id, "wallet": address, "start_block": start_block}
+        ) as span:
+            async for record in self._attempts(address, chain_id, start_block, stream):
+                yield record
+            if span is not None:
+                span.set_attribute("etherscan.records", stream.count)
+        if not stream.is_list:
+            msg = str(stream.fields.get("message", ""))
+            if "No transactions found" not in msg:
+                raise UpstreamResponseError(stream.fields)
+
+    async def proxy(self, action: str, chain_id: int = CHAIN_ID, **params: Any) -> Any:
+        # Single eth_* call through Etherscan's JSON-RPC proxy module; shares the txlist keys and breakers
+        key = await self._acquire(chain_id)
+        query = {"module": "proxy", "action": action, "chainid": chain_id, "apikey": key.value, **params}
+        timeout = aiohttp.ClientTimeout(total=10)
+        ok: bool | None = None
+        limited = False
+        retry_after: float | None = None
+        try:
+            with tracer.span("etherscan.proxy", kind="CLIENT", action=action, chain_id=chain_id, key=key.label):
+                try:
+                    async with http_pool.session().get(BASE_URL, params=query, timeout=timeout) as resp:
+                        retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                        limited = resp.status == 429
+                        data = await resp.json(content_type=None) if resp.status < 400 else {"status": 0, "result": []}
+                except Exception:
+                    ok = False
+                    raise
+            if not isinstance(data, dict) or "error" in data or is_rate_limited(data) or "jsonrpc" not in data:
+                ok = False
+                limited = limited or is_rate_limited(data)
+                raise UpstreamResponseError(data if isinstance(data, dict) else {"result": data})
+            ok = True
+            return data.get("result")
+        finally:
+            # Also runs on cancellation, so the key's in-flight count and any half-open probe are handed back
+            self.pool.release(key, chain_id, ok, rate_limited=limited, retry_after=retry_after)
+
+    async def _attempts(self, address: str, chain_id: int, start_block: int, stream: TxListStream) -> AsyncIterator[Dict[str, Any]]:
         params = {
             "module": "account",
             "chainid": chain_id,
             "action": "txlist",
             "address": address,
-            "startblock": 0,
+            "startblock": start_block,
             "endblock": 99999999,
             "sort": "desc",
-            "apikey": self.api_key,
         }
         timeout = aiohttp.ClientTimeout(total=10)
-        attempt = 0
-        backoffs = [0.2, 0.5, 1.0]
+        max_attempts = max(1, settings.ETHERSCAN_MAX_RETRIES)
         last_exc: Exception | None = None
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            while attempt < 3:
-                attempt += 1
+        last_data: Dict[str, Any] | None = None
+        session = http_pool.session()
+        for attempt in range(max_attempts):
+            try:
+                key = await self._acquire(chain_id)
+            except CircuitOpenError:
+                if attempt == 0:
+                    raise
+                # Every key is open or benched for longer than we hold the request
+                break
+            retry_after: float | None = None
+            limited = False
+            ok: bool | None = None
+            yielded = 0
+            with tracer.span("etherscan.attempt", kind="CLIENT", attempt=attempt + 1, key=key.label) as attempt_span:
                 try:
-                    async with session.get(BASE_URL, params=params) as resp:
-                        if 500 <= resp.status <= 599:
-                            if attempt < 3:
-                                await asyncio.sleep(backoffs[attempt - 1])
-                                continue
-                            return {"status": 0, "message": "SERVER_ERROR", "result": []}
-                        data = await resp.json(content_type=None)
-                        return data
+                    async with session.get(BASE_URL, params={**params, "apikey": key.value}, timeout=timeout) as resp:
+                        if attempt_span is not None:
+                            attempt_span.set_attribute("http.status_code", resp.status)
+                        if resp.status == 429 or 500 <= resp.status <= 599:
+                            ok = False
+                            limited = resp.status == 429
+                            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                            last_data = {
+                                "status": 0,
+                                "message": "NOTOK" if limited else "SERVER_ERROR",
+                                "result": "Max rate limit reached" if limited else [],
+                            }
+                        else:
+                            parser = TxListParser()
+                            batch: List[Dict[str, Any]] = []
+                            async for chunk in resp.content.iter_chunked(STREAM_CHUNK):
+                                for record in parser.feed(chunk):
+                                    if stream.buffered:
+                                        batch.append(record)
+                                        continue
+                                    yielded += 1
+                                    yield record
+                            for record in parser.close():
+                                if stream.buffered:
+                                    batch.append(record)
+                                    continue
+                                yielded += 1
+                                yield record
+                            if not is_rate_limited(parser.fields):
+                                ok = True
+                                stream.fields, stream.is_list, stream.count = parser.fields, parser.is_list, parser.count
+                                stream.records = batch
+                                return
+                            ok = False
+                            limited = True
+                            last_data = parser.fields
+                            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                    last_exc = None
                 except Exception as exc:
+                    ok = False
+                    if yielded:
+                        # Records already went to a streaming caller; a retry would hand them over twice
+                        raise
                     last_exc = exc
-                    if attempt < 3:
-                        await asyncio.sleep(backoffs[attempt - 1])
-                        continue
-                    raise exc
+                    last_data = None
+                finally:
+                    self.pool.release(key, chain_id, ok, rate_limited=limited, retry_after=retry_after)
+                if attempt_span is not None:
+                    attempt_span.status = "ERROR"
+                    attempt_span.set_attribute("retry_after", retry_after)
+                    if last_exc is not None:
+                        attempt_span.record_error(last_exc)
+
+            logger.warning(
+                "etherscan_attempt_failed",
+                wallet=address,
+                chain_id=chain_id,
+                key=key.label,
+                attempt=attempt + 1,
+                error=str(last_exc) if last_exc else None,
+                retry_after=retry_after,
+            )
+            if attempt + 1 >= max_attempts:
+                break
+            if limited:
+                # The key is benched; the next acquire moves to another key or waits out the bench
+                continue
+            if retry_after is not None and retry_after > settings.ETHERSCAN_BACKOFF_MAX:
+                # Upstream wants us gone for longer than we are willing to hold the request
+                break
+            delay = backoff_delay(attempt, settings.ETHERSCAN_BACKOFF_BASE, settings.ETHERSCAN_BACKOFF_MAX, retry_after)
+            with tracer.span("etherscan.backoff", attempt=attempt + 1, delay_s=delay):
+                await asyncio.sleep(delay)
+
         if last_exc is not None:
             raise last_exc
-        return {"status": 0, "message": "UNKNOWN_ERROR", "result": []}
-
+        stream.fields = last_data if last_data is not None else {"status": 0, "message": "UNKNOWN_ERROR", "result": []}
+        stream.is_list = isinstance(stream.fields.get("result"), list)
+        if stream.is_list:
+            stream.fields = {k: v for k, v in stream.fields.items() if k != "result"}
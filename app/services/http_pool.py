@@ -0,0 +1,50 @@
+import asyncio
+from typing import Optional
+
+import aiohttp
+import structlog
+
+
+logger = structlog.get_logger()
+
+
+class HttpPool:
+    # One keep-alive connector per event loop, so repeat upstream calls reuse DNS results and TLS sessions
+    def __init__(self, limit: int = 32, keepalive_timeout: float = 60.0):
+        self.limit = limit
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._loop is not loop or self._session.closed:
+            if self._session is not None and not self._session.closed:
+                # Bound to a loop that is gone; close its sockets synchronously (close() would need that loop)
+                self._session.connector._close()
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                ttl_dns_cache=300,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._loop = loop
+        return self._session
+
+    async def warm(self, url: str, timeout: float = 5.0) -> bool:
+        # Any answer at all leaves a resolved, TLS-established connection in the pool
+        try:
+            async with self.session().head(url, timeout=aiohttp.ClientTimeout(total=timeout), allow_redirects=False):
+                return True
+        except Exception as exc:
+            logger.warning("http_warmup_failed", url=url, error=str(exc))
+            return False
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+
+http_pool = HttpPool()
@@ -0,0 +1,321 @@
+import asyncio
+from datetime import datetime
+from typing import AsyncIterable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.schemas import TransactionItem
+from app.models.sql_models import DirectionEnum, Transaction, TransactionArchive, Wallet, WalletCounterparty, WalletTransaction
+from app.services.archive import archive_watermark
+
+
+def direction_for(address: str, from_address: str, to_address: str) -> DirectionEnum:
+    addr = address.lower()
+    fa = (from_address or "").lower()
+    ta = (to_address or "").lower()
+    if fa == addr and ta == addr:
+        return DirectionEnum.self
+    if fa == addr:
+        return DirectionEnum.out
+    if ta == addr:
+        return DirectionEnum.in_
+    return DirectionEnum.self
+
+
+def _to_datetime(timestamp: str) -> datetime:
+    return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).replace(tzinfo=None)
+
+
+def build_transaction(item: TransactionItem, network_id: int) -> Transaction:
+    return Transaction(
+        network_id=network_id,
+        tx_hash=item.tx_hash,
+        block_number=item.block_number,
+        time_stamp=_to_datetime(item.timestamp),
+        from_address=item.from_address,
+        to_address=item.to_address,
+        value_wei=item.value_wei,
+        gas_used=item.gas_used,
+        tx_fee_wei=item.fee_wei,
+        status=item.status,
+    )
+
+
+def _resolve_tx_ids(db: Session, network_id: int, batch: List[TransactionItem]) -> Dict[str, int]:
+    # Resolve hashes other wallets already brought in (keyed lowercase, as the TxHash codec returns them)
+    hashes = list({item.tx_hash.lower() for item in batch})
+    known: Dict[str, int] = dict(
+        db.query(Transaction.tx_hash, Transaction.tx_id)
+        .filter(Transaction.network_id == network_id, Transaction.tx_hash.in_(hashes))
+        .all()
+    )
+    # A hash missing from the hot table may have been archived; check only items old enough to be there
+    watermark = archive_watermark(db)
+    if watermark is not None:
+        cold = [
+            item.tx_hash.lower()
+            for item in batch
+            if item.tx_hash.lower() not in known and _to_datetime(item.timestamp) <= watermark
+        ]
+        if cold:
+            known.update(
+                db.query(TransactionArchive.tx_hash, TransactionArchive.tx_id)
+                .filter(TransactionArchive.network_id == network_id, TransactionArchive.tx_hash.in_(cold))
+                .all()
+            )
+    fresh: Dict[str, Transaction] = {}
+    for item in batch:
+        key = item.tx_hash.lower()
+        if key not in known and key not in fresh:
+            fresh[key] = build_transaction(item, network_id)
+    if fresh:
+        db.add_all(fresh.values())
+        db.flush()
+        known.update({h: tx.tx_id for h, tx in fresh.items()})
+    return known
+
+
+CounterpartyDeltas = Dict[Tuple[int, str], List]
+
+
+def _add_counterparty(deltas: CounterpartyDeltas, wallet_id: int, direction: DirectionEnum, item: TransactionItem) -> None:
+    # Only newly created links reach here, so every transaction is counted once per wallet
+    if direction == DirectionEnum.in_:
+        other = item.from_address
+    elif direction == DirectionEnum.out:
+        other = item.to_address
+    else:
+        return
+    if not other:
+        # Contract creation has no recipient
+        return
+    when = _to_datetime(item.timestamp)
+    entry = deltas.setdefault((wallet_id, other.lower()), [0, 0, 0, when, when])
+    entry[0] += 1
+    entry[1 if direction == DirectionEnum.in_ else 2] += item.value_wei
+    entry[3] = min(entry[3], when)
+    entry[4] = max(entry[4], when)
+
+
+def _ensure_counterparty_rows(db: Session, rows: List[dict]) -> None:
+    # Insert-if-missing, which also takes the write lock on every key before it is read below:
+    # row locks on MySQL/PostgreSQL, the database write lock on SQLite
+    table = WalletCounterparty.__table__
+    dialect = db.bind.dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(table).values(rows)
+        db.execute(stmt.on_duplicate_key_update(tx_count=table.c.tx_count))
+    elif dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite_insert if dialect == "sqlite" else pg_insert)(table).values(rows)
+        db.execute(stmt.on_conflict_do_nothing(index_elements=["wallet_id", "counterparty"]))
+
+
+def _apply_counterparties(db: Session, deltas: CounterpartyDeltas) -> None:
+    # Sums are added in Python to stay exact on every backend (SQLite stores Wei as text); the rows
+    # are locked first so concurrent ingests of the same wallet cannot overwrite each other's counts
+    if not deltas:
+        return
+    keys = sorted(deltas)
+    _ensure_counterparty_rows(
+        db,
+        [
+            {
+                "wallet_id": wallet_id,
+                "counterparty": other,
+                "tx_count": 0,
+                "volume_in_wei": 0,
+                "volume_out_wei": 0,
+                "first_seen": deltas[(wallet_id, other)][3],
+                "last_seen": deltas[(wallet_id, other)][4],
+            }
+            for wallet_id, other in keys
+        ],
+    )
+    by_wallet: Dict[int, List[str]] = {}
+    for wallet_id, other in keys:
+        by_wallet.setdefault(wallet_id, []).append(other)
+    for wallet_id, others in by_wallet.items():
+        existing = {
+            row.counterparty: row
+            for row in db.query(WalletCounterparty)
+            .filter(WalletCounterparty.wallet_id == wallet_id, WalletCounterparty.counterparty.in_(others))
+            .with_for_update()
+            .populate_existing()
+        }
+        for other in others:
+            count, vol_in, vol_out, first, last = deltas[(wallet_id, other)]
+            row = existing.get(other)
+            if row is None:
+                # Backends without an insert-if-missing form; a concurrent insert surfaces as IntegrityError
+                row = WalletCounterparty(
+                    wallet_id=wallet_id, counterparty=other, tx_count=0, volume_in_wei=0, volume_out_wei=0
+                )
+                db.add(row)
+            row.tx_count = (row.tx_count or 0) + count
+            row.volume_in_wei = (row.volume_in_wei or 0) + vol_in
+            row.volume_out_wei = (row.volume_out_wei or 0) + vol_out
+            row.first_seen = min(row.first_seen, first) if row.first_seen else first
+            row.last_seen = max(row.last_seen, last) if row.last_seen else last
+
+
+def _ingest_batch(db: Session, wallet: Wallet, network_id: int, batch: List[TransactionItem], linked: Set[int]) -> int:
+    known = _resolve_tx_ids(db, network_id, batch)
+    links: List[WalletTransaction] = []
+    deltas: CounterpartyDeltas = {}
+    for item in batch:
+        tx_id = known[item.tx_hash.lower()]
+        if tx_id in linked:
+            continue
+        linked.add(tx_id)
+        direction = direction_for(wallet.address, item.from_address, item.to_address)
+        links.append(
+            WalletTransaction(
+                wallet_id=wallet.wallet_id,
+                tx_id=tx_id,
+                direction=direction,
+                time_stamp=_to_datetime(item.timestamp),
+            )
+        )
+        _add_counterparty(deltas, wallet.wallet_id, direction, item)
+    db.add_all(links)
+    _apply_counterparties(db, deltas)
+    return len(links)
+
+
+def _linked_ids(db: Session, wallet: Wallet) -> Set[int]:
+    return {
+        tx_id for (tx_id,) in db.query(WalletTransaction.tx_id).filter(WalletTransaction.wallet_id == wallet.wallet_id)
+    }
+
+
+def _commit_batch(
+    db: Session,
+    wallet: Wallet,
+    network_id: int,
+    batch: List[TransactionItem],
+    linked: Set[int],
+    processed: int,
+    added: int,
+    on_batch: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    for attempt in range(2):
+        try:
+            count = _ingest_batch(db, wallet, network_id, batch, linked)
+            # Progress is recorded in the same commit as the batch it describes
+            if on_batch is not None:
+                on_batch(processed, added + count)
+            db.commit()
+            return count
+        except IntegrityError:
+            # Another ingest of this wallet, or of one of these hashes, committed first; re-read what
+            # it linked so the retry skips those rows instead of hitting the same key again
+            db.rollback()
+            if attempt == 1:
+                raise
+            linked.clear()
+            linked.update(_linked_ids(db, wallet))
+    return 0
+
+
+def ingest_transactions(
+    db: Session,
+    wallet: Wallet,
+    network_id: int,
+    items: Iterable[TransactionItem],
+    batch_size: int = 500,
+    on_batch: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    items = list(items)
+    linked = _linked_ids(db, wallet)
+    added = 0
+    for start in range(0, len(items), max(1, batch_size)):
+        batch = items[start : start + batch_size]
+        added += _commit_batch(db, wallet, network_id, batch, linked, start + len(batch), added, on_batch)
+    if not items and on_batch is not None:
+        on_batch(0, 0)
+        db.commit()
+    return added
+
+
+async def ingest_stream(
+    db: Session,
+    wallet: Wallet,
+    network_id: int,
+    items: AsyncIterable[TransactionItem],
+    batch_size: int = 500,
+    on_batch: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    # Each batch is written while the next one is still being downloaded and parsed
+    linked = await asyncio.to_thread(_linked_ids, db, wallet)
+    batch: List[TransactionItem] = []
+    processed = added = 0
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= max(1, batch_size):
+            processed += len(batch)
+            added += await asyncio.to_thread(_commit_batch, db, wallet, network_id, batch, linked, processed, added, on_batch)
+            batch = []
+    if batch:
+        processed += len(batch)
+        added += await asyncio.to_thread(_commit_batch, db, wallet, network_id, batch, linked, processed, added, on_batch)
+    elif not processed and on_batch is not None:
+        on_batch(0, 0)
+        await asyncio.to_thread(db.commit)
+    return added
+
+
+def ingest_matches(
+    db: Session,
+    network_id: int,
+    matches: Iterable[Tuple[int, str, TransactionItem]],
+    before_commit: Optional[Callable[[], None]] = None,
+) -> int:
+    # Block-scan output: many wallets, each transaction stored once, links inserted in one flush
+    matches = list(matches)
+    if not matches:
+        if before_commit is not None:
+            before_commit()
+        db.commit()
+        return 0
+    for attempt in range(2):
+        try:
+            known = _resolve_tx_ids(db, network_id, [item for _, _, item in matches])
+            wallet_ids = {wallet_id for wallet_id, _, _ in matches}
+            linked: Set[Tuple[int, int]] = set(
+                db.query(WalletTransaction.wallet_id, WalletTransaction.tx_id).filter(
+                    WalletTransaction.wallet_id.in_(wallet_ids), WalletTransaction.tx_id.in_(set(known.values()))
+                )
+            )
+            links: List[WalletTransaction] = []
+            deltas: CounterpartyDeltas = {}
+            for wallet_id, address, item in matches:
+                key = (wallet_id, known[item.tx_hash.lower()])
+                if key in linked:
+                    continue
+                linked.add(key)
+                direction = direction_for(address, item.from_address, item.to_address)
+                links.append(
+                    WalletTransaction(
+                        wallet_id=wallet_id,
+                        tx_id=key[1],
+                        direction=direction,
+                        time_stamp=_to_datetime(item.timestamp),
+                    )
+                )
+                _add_counterparty(deltas, wallet_id, direction, item)
+            db.add_all(links)
+            _apply_counterparties(db, deltas)
+            # e.g. the scan cursor, so it only advances together with the rows it covers
+            if before_commit is not None:
+                before_commit()
+            db.commit()
+            return len(links)
+        except IntegrityError:
+            db.rollback()
+            if attempt == 1:
+                raise
+    return 0
@@ -0,0 +1,235 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional, Tuple
+
+import structlog
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import settings
+from app.models.sql_models import IngestJob, Wallet
+from app.services.data_sources import iter_txlist, source_for_network
+from app.services.ingest import ingest_stream
+from app.services.processor import stream_transaction_items
+
+
+logger = structlog.get_logger()
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def claimable(now: datetime):
+    # Queued, or running under a lease its owner stopped renewing (rows from before leases have none)
+    return or_(
+        IngestJob.status == "queued",
+        and_(IngestJob.status == "running", or_(IngestJob.lease_until.is_(None), IngestJob.lease_until < now)),
+    )
+
+
+def claim_job(db: Session, job_id: int, owner: str, lease_seconds: float) -> bool:
+    # A single conditional UPDATE, so of every worker handed this job id exactly one gets rowcount 1
+    now = _now()
+    result = db.execute(
+        update(IngestJob)
+        .where(IngestJob.job_id == job_id, claimable(now))
+        .values(status="running", owner=owner, lease_until=now + timedelta(seconds=lease_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def job_to_dict(job: IngestJob) -> dict:
+    # Etherscan's txlist never says how many records are coming, so a streaming job reports its total
+    # (and progress) as unknown until the stream ends; buffered sources know it up front
+    total_known = job.status == "done" or (job.status != "queued" and job.total is not None)
+    progress = None
+    if job.status == "done":
+        progress = 1.0
+    elif total_known and job.total:
+        progress = round((job.processed or 0) / job.total, 4)
+    return {
+        "job_id": job.job_id,
+        "wallet_id": job.wallet_id,
+        "status": job.status,
+        "total": (job.total or 0) if total_known else None,
+        "total_known": total_known,
+        "processed": job.processed or 0,
+        "added": job.added or 0,
+        "progress": progress,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+    }
+
+
+class IngestQueue:
+    def __init__(
+        self,
+        workers: int = 2,
+        batch_size: int = 500,
+        session_factory: Optional[Callable[[], Session]] = None,
+        lease_seconds: float = 300.0,
+    ):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.session_factory = session_factory
+        self.lease_seconds = lease_seconds
+        # Unique per process: several uvicorn workers share the ingest_job table
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _session(self) -> Session:
+        factory = self.session_factory or database.SessionLocal
+        return factory()
+
+    def _ensure_started(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(max(1, self.workers))]
+        return self._queue
+
+    def submit(self, job_id: int) -> None:
+        self._ensure_started().put_nowait(job_id)
+
+    async def join(self) -> None:
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def resume_pending(self) -> int:
+        # Queued jobs, and running ones whose owner stopped renewing its lease, are picked up again.
+        # Every worker does this at startup; claim_job lets only one of them run each job
+        try:
+            db = self._session()
+        except Exception as exc:
+            logger.warning("ingest_resume_failed", error=str(exc))
+            return 0
+        try:
+            job_ids = [
+                job_id
+                for (job_id,) in db.query(IngestJob.job_id).filter(claimable(_now())).order_by(IngestJob.job_id)
+            ]
+            for job_id in job_ids:
+                self.submit(job_id)
+            return len(job_ids)
+        except Exception as exc:
+            logger.warning("ingest_resume_failed", error=str(exc))
+            return 0
+        finally:
+            db.close()
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._loop = None
+
+    async def _worker(self) -> None:
+        queue = self._queue
+        while True:
+            job_id = await queue.get()
+            try:
+                await self.run_job(job_id)
+            except Exception as exc:
+                logger.error("ingest_worker_error", job_id=job_id, error=str(exc))
+            finally:
+                queue.task_done()
+
+    async def run_job(self, job_id: int) -> None:
+        db = self._session()
+        job: Optional[IngestJob] = None
+        try:
+            if not claim_job(db, job_id, self.owner, self.lease_seconds):
+                # Unknown, finished, or running under another worker's live lease
+                return
+            job = db.get(IngestJob, job_id)
+            wallet = job.wallet
+            network = job.network
+            job.total = None
+            db.commit()
+
+            def found(total: int) -> None:
+                job.total = total
+
+            source = source_for_network(network)
+            records = iter_txlist(source, wallet.address, chain_id=network.chain_id, on_total=found)
+
+            def progress(processed: int, added: int) -> None:
+                job.processed = processed
+                job.added = added
+                # Renewed with every batch commit
+                job.lease_until = _now() + timedelta(seconds=self.lease_seconds)
+
+            # Batches are written as the response streams in; a streamed total is only known once it has
+            # ended. Sync ORM work goes to a thread so the event loop keeps serving requests
+            added = await ingest_stream(
+                db, wallet, network.network_id, stream_transaction_items(records), self.batch_size, progress
+            )
+            job.total = job.processed or 0
+            job.status = "done"
+            job.lease_until = None
+            db.commit()
+            logger.info("ingest_job_done", job_id=job_id, wallet=wallet.address, added=added, total=job.total)
+        except Exception as exc:
+            db.rollback()
+            logger.error("ingest_job_failed", job_id=job_id, error=str(exc))
+            if job is not None:
+                job.status = "failed"
+                job.error = str(exc)[:500]
+                job.lease_until = None
+                db.commit()
+        finally:
+            db.close()
+
+
+def active_job_query(wallet_id: int):
+    # A locking read: under REPEATABLE READ it sees jobs committed after this transaction's snapshot
+    return (
+        select(IngestJob)
+        .where(IngestJob.wallet_id == wallet_id, IngestJob.status.in_(ACTIVE_STATUSES))
+        .order_by(IngestJob.job_id.desc())
+        .limit(1)
+        .with_for_update()
+    )
+
+
+def claim_ingest_job(db: Session, wallet_id: int, network_id: int) -> Tuple[IngestJob, bool]:
+    # A wallet already waiting for (or in the middle of) ingestion shares that job. The wallet row
+    # lock serialises claims, so two requests cannot both find nothing and insert a job each
+    db.execute(select(Wallet.wallet_id).where(Wallet.wallet_id == wallet_id).with_for_update())
+    existing = db.execute(active_job_query(wallet_id)).scalars().first()
+    if existing is not None:
+        return existing, False
+    job = IngestJob(wallet_id=wallet_id, network_id=network_id, status="queued")
+    db.add(job)
+    db.flush()
+    return job, True
+
+
+def enqueue_ingest_job(db: Session, wallet: Wallet, network_id: int) -> Tuple[IngestJob, bool]:
+    job, created = claim_ingest_job(db, wallet.wallet_id, network_id)
+    db.commit()
+    if created:
+        ingest_queue.submit(job.job_id)
+    return job, created
+
+
+ingest_queue = IngestQueue(
+    workers=settings.INGEST_WORKERS,
+    batch_size=settings.INGEST_BATCH_SIZE,
+    lease_seconds=settings.INGEST_LEASE_SECONDS,
+)
@@ -0,0 +1,114 @@
+import codecs
+import json
+from typing import Any, Dict, List
+
+
+_WS = " \t\r\n"
+_decoder = json.JSONDecoder()
+
+
+class TxListParser:
+    # Incremental parser for {"status": .., "message": .., "result": [{..}, ..]}: feed() takes raw
+    # bytes as they arrive and returns the result records completed so far, so only the current,
+    # unfinished record is ever buffered. Any other top-level key is kept in `fields`.
+    def __init__(self, array_key: str = "result"):
+        self.array_key = array_key
+        self.fields: Dict[str, Any] = {}
+        self.is_list = False
+        self.count = 0
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._state = "start"
+        self._key = ""
+
+    def _skip_ws(self) -> None:
+        while self._pos < len(self._buf) and self._buf[self._pos] in _WS:
+            self._pos += 1
+
+    def _value(self, final: bool):
+        # A value is only accepted once something follows it, so "12" is never read from a chunk ending in "12|3"
+        try:
+            value, end = _decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return None, False
+        if end >= len(self._buf) and not final:
+            return None, False
+        self._pos = end
+        return value, True
+
+    def _expect(self, chars: str) -> str:
+        ch = self._buf[self._pos]
+        if ch not in chars:
+            raise ValueError(f"unexpected {ch!r} at offset {self._pos} while parsing txlist")
+        self._pos += 1
+        return ch
+
+    def _run(self, final: bool) -> List[dict]:
+        out: List[dict] = []
+        while True:
+            self._skip_ws()
+            if self._pos >= len(self._buf) or self._state == "done":
+                break
+            state = self._state
+            if state == "start":
+                self._expect("{")
+                self._state = "key"
+            elif state == "key":
+                if self._buf[self._pos] == "}":
+                    self._pos += 1
+                    self._state = "done"
+                    continue
+                key, ok = self._value(final)
+                if not ok:
+                    break
+                self._key = key
+                self._state = "colon"
+            elif state == "colon":
+                self._expect(":")
+                self._state = "value"
+            elif state == "value":
+                if self._key == self.array_key and self._buf[self._pos] == "[":
+                    self._pos += 1
+                    self.is_list = True
+                    self._state = "first_item"
+                    continue
+                value, ok = self._value(final)
+                if not ok:
+                    break
+                self.fields[self._key] = value
+                self._state = "after_value"
+            elif state == "after_value":
+                self._state = "key" if self._expect(",}") == "," else "done"
+            elif state in ("first_item", "item"):
+                if self._buf[self._pos] == "]":
+                    self._pos += 1
+                    self._state = "after_value"
+                    continue
+                if state == "item":
+                    self._expect(",")
+                    self._state = "first_item"
+                    continue
+                record, ok = self._value(final)
+                if not ok:
+                    break
+                self.count += 1
+                out.append(record)
+                self._state = "item"
+        # Drop everything consumed; the buffer never holds more than one partial record
+        self._buf = self._buf[self._pos :]
+        self._pos = 0
+        return out
+
+    def feed(self, chunk: bytes) -> List[dict]:
+        self._buf += self._utf8.decode(chunk)
+        return self._run(final=False)
+
+    def close(self) -> List[dict]:
+        self._buf += self._utf8.decode(b"", final=True)
+        out = self._run(final=True)
+        if self._state != "done":
+            raise ValueError("truncated txlist response")
+        return out
@@ -0,0 +1,217 @@
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import structlog
+
+from app.config import settings
+from app.services.circuit_breaker import OPEN, CircuitBreaker, CircuitOpenError, breaker_states, get_breaker
+
+
+logger = structlog.get_logger()
+
+KeySpec = Tuple[str, float]
+
+
+def parse_keys(spec: str, fallback: str = "") -> List[KeySpec]:
+    # "key1,key2:3" -> [(key1, 1.0), (key2, 3.0)]; the single ETHERSCAN_API_KEY joins the list when not already in it
+    keys: List[KeySpec] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        key, _, weight = part.partition(":")
+        w = float(weight) if weight.strip() else 1.0
+        if w <= 0:
+            raise ValueError(f"weight for Etherscan key {mask_key(key.strip())} must be positive")
+        keys.append((key.strip(), w))
+    if fallback and fallback not in {k for k, _ in keys}:
+        keys.append((fallback, 1.0))
+    # No key at all still works against Etherscan's anonymous tier
+    return keys or [("", 1.0)]
+
+
+def mask_key(value: str) -> str:
+    if len(value) <= 8:
+        return "*" * len(value)
+    return f"{value[:4]}...{value[-4:]}"
+
+
+class ApiKey:
+    def __init__(self, value: str, weight: float, rate: float, now: float):
+        self.value = value
+        self.label = mask_key(value)
+        self.weight = weight
+        # Calls per second this key may make; 0 disables the budget
+        self.rate = rate * weight
+        self.tokens = self.rate
+        self.refilled_at = now
+        self.in_flight = 0
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.strikes = 0
+        self.benched_until = 0.0
+
+    def refill(self, now: float) -> None:
+        if self.rate > 0:
+            # Burst of at most one second's worth of calls
+            self.tokens = min(self.rate, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    def wait(self, now: float) -> float:
+        wait = max(0.0, self.benched_until - now)
+        if self.rate > 0 and self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+
+class KeyPool:
+    # Spreads Etherscan calls over several API keys. Each key has its own token-bucket budget, is
+    # benched for a while after "Max rate limit reached" and keeps a circuit breaker per chain.
+    def __init__(
+        self,
+        keys: Sequence[KeySpec],
+        rate: float = 5.0,
+        cooldown: float = 1.0,
+        max_cooldown: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._clock = clock
+        self._lock = threading.Lock()
+        now = clock()
+        self.keys = [ApiKey(value, weight, rate, now) for value, weight in keys]
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+
+    def breaker(self, chain_id: int, key: ApiKey) -> CircuitBreaker:
+        return get_breaker(
+            chain_id,
+            key.value,
+            failure_threshold=settings.ETHERSCAN_BREAKER_THRESHOLD,
+            recovery_timeout=settings.ETHERSCAN_BREAKER_COOLDOWN,
+        )
+
+    def try_acquire(self, chain_id: int) -> Tuple[Optional[ApiKey], float]:
+        # Returns a key, or None plus how long until one frees up; raises when every breaker is open
+        with self._lock:
+            now = self._clock()
+            ready: List[ApiKey] = []
+            waits: List[float] = []
+            open_for: List[float] = []
+            for key in self.keys:
+                breaker = self.breaker(chain_id, key)
+                if breaker.state == OPEN:
+                    open_for.append(breaker.retry_after())
+                    continue
+                key.refill(now)
+                wait = key.wait(now)
+                if wait > 0:
+                    waits.append(wait)
+                else:
+                    ready.append(key)
+            # Least loaded per unit of weight first; lifetime calls per weight make ties a weighted round-robin
+            for key in sorted(ready, key=lambda k: (k.in_flight / k.weight, k.calls / k.weight)):
+                if not self.breaker(chain_id, key).allow_request():
+                    # Half-open and its single probe is already out
+                    continue
+                if key.rate > 0:
+                    key.tokens -= 1
+                key.in_flight += 1
+                key.calls += 1
+                return key, 0.0
+            if waits:
+                return None, min(waits)
+        raise CircuitOpenError(f"etherscan:{chain_id}", min(open_for, default=0.0))
+
+    async def acquire(self, chain_id: int, max_wait: float) -> ApiKey:
+        waited = 0.0
+        while True:
+            key, wait = self.try_acquire(chain_id)
+            if key is not None:
+                return key
+            if waited + wait > max_wait:
+                raise CircuitOpenError(f"etherscan:{chain_id}", wait)
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def release(
+        self,
+        key: ApiKey,
+        chain_id: int,
+        ok: Optional[bool],
+        rate_limited: bool = False,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        # ok=None: the caller was cancelled or stopped reading early, which says nothing about the key
+        with self._lock:
+            key.in_flight = max(0, key.in_flight - 1)
+            if ok:
+                key.successes += 1
+                key.strikes = 0
+            elif ok is False:
+                key.failures += 1
+                if rate_limited:
+                    key.rate_limited += 1
+                    key.strikes += 1
+                    bench = min(self.max_cooldown, self.cooldown * 2 ** (key.strikes - 1))
+                    bench = max(bench, retry_after or 0.0)
+                    key.benched_until = self._clock() + bench
+        if ok:
+            self.breaker(chain_id, key).record_success()
+        elif ok is None:
+            # try_acquire may have taken this key's half-open probe; hand it back
+            self.breaker(chain_id, key).release_probe()
+        else:
+            self.breaker(chain_id, key).record_failure(retry_after)
+            if rate_limited:
+                logger.warning("etherscan_key_benched", key=key.label, chain_id=chain_id, strikes=key.strikes)
+
+    def stats(self) -> List[dict]:
+        with self._lock:
+            now = self._clock()
+            out = []
+            for key in self.keys:
+                key.refill(now)
+                out.append(
+                    {
+                        "key": key.label,
+                        "weight": key.weight,
+                        "rate_per_second": key.rate,
+                        "in_flight": key.in_flight,
+                        "calls": key.calls,
+                        "successes": key.successes,
+                        "failures": key.failures,
+                        "rate_limited": key.rate_limited,
+                        "benched_for": round(max(0.0, key.benched_until - now), 2),
+                        "circuits": breaker_states(key.value),
+                    }
+                )
+            return out
+
+
+_pools: Dict[Tuple[KeySpec, ...], KeyPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_key_pool(keys: Optional[Sequence[KeySpec]] = None) -> KeyPool:
+    # Shared per key set, so budgets and bench state hold across every client using the same keys
+    spec = tuple(keys) if keys is not None else tuple(parse_keys(settings.ETHERSCAN_API_KEYS, settings.ETHERSCAN_API_KEY))
+    with _pools_lock:
+        pool = _pools.get(spec)
+        if pool is None:
+            pool = KeyPool(
+                spec,
+                rate=settings.ETHERSCAN_KEY_RATE,
+                cooldown=settings.ETHERSCAN_KEY_COOLDOWN,
+                max_cooldown=settings.ETHERSCAN_KEY_COOLDOWN_MAX,
+            )
+            _pools[spec] = pool
+        return pool
+
+
+def reset_key_pools() -> None:
+    with _pools_lock:
+        _pools.clear()
@@ -0,0 +1,128 @@
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Set, Tuple
+
+import structlog
+
+from app import database
+from app.config import settings
+from app.models.schemas import TransactionItem
+from app.services.data_sources import TransactionDataSource, source_for_chain
+from app.services.processor import to_transaction_items
+
+
+logger = structlog.get_logger()
+
+FetchFn = Callable[[str, int], Awaitable[List[TransactionItem]]]
+FeedKey = Tuple[str, int]
+# Hashes remembered per wallet; a poll returns at most 500 (to_transaction_items), and every hash still
+# in that window is touched again each poll, so only hashes that already scrolled out are forgotten
+SEEN_LIMIT = 2000
+
+
+def _source_for(chain_id: int) -> TransactionDataSource:
+    # Looked up on every poll, so a network switched to (or off) a node is picked up without a restart
+    db = database.SessionLocal()
+    try:
+        return source_for_chain(db, chain_id)
+    finally:
+        db.close()
+
+
+async def fetch_recent_transactions(address: str, chain_id: int) -> List[TransactionItem]:
+    source = await asyncio.to_thread(_source_for, chain_id)
+    resp = await source.get_txlist(address, chain_id=chain_id)
+    raw_list = resp.get("result", [])
+    if not isinstance(raw_list, list):
+        return []
+    return to_transaction_items(raw_list, address)
+
+
+class _WalletPoller:
+    def __init__(self, key: FeedKey, fetch: FetchFn, interval: float, queue_size: int, seen_limit: int = SEEN_LIMIT):
+        self.key = key
+        self.fetch = fetch
+        self.interval = interval
+        self.queue_size = queue_size
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.seen: "OrderedDict[str, None]" = OrderedDict()
+        self.seen_limit = seen_limit
+        self.primed = False
+        self.task: asyncio.Task | None = None
+
+    def publish(self, item: TransactionItem) -> None:
+        for queue in self.subscribers:
+            if queue.full():
+                # Slow consumer: drop its oldest event rather than stall everyone else
+                queue.get_nowait()
+            queue.put_nowait(item)
+
+    async def poll_once(self) -> None:
+        address, chain_id = self.key
+        items = await self.fetch(address, chain_id)
+        fresh = [it for it in items if it.tx_hash not in self.seen]
+        for it in items:
+            self.seen[it.tx_hash] = None
+            self.seen.move_to_end(it.tx_hash)
+        while len(self.seen) > self.seen_limit:
+            self.seen.popitem(last=False)
+        if not self.primed:
+            # First poll only establishes the baseline; history is served by /wallet/{address}
+            self.primed = True
+            return
+        for item in sorted(fresh, key=lambda it: it.block_number):
+            self.publish(item)
+
+    async def run(self) -> None:
+        while self.subscribers:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("live_feed_poll_failed", wallet=self.key[0], chain_id=self.key[1], error=str(exc))
+            await asyncio.sleep(self.interval)
+
+
+class WalletFeedHub:
+    def __init__(self, fetch: FetchFn = fetch_recent_transactions, interval: float = 10.0, queue_size: int = 100):
+        self.fetch = fetch
+        self.interval = interval
+        self.queue_size = queue_size
+        self._pollers: Dict[FeedKey, _WalletPoller] = {}
+
+    @property
+    def active_wallets(self) -> int:
+        return len(self._pollers)
+
+    def subscriber_count(self, address: str, chain_id: int) -> int:
+        poller = self._pollers.get((address.lower(), chain_id))
+        return len(poller.subscribers) if poller else 0
+
+    def subscribe(self, address: str, chain_id: int) -> asyncio.Queue:
+        key = (address.lower(), chain_id)
+        poller = self._pollers.get(key)
+        if poller is None:
+            poller = _WalletPoller(key, self.fetch, self.interval, self.queue_size)
+            self._pollers[key] = poller
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        poller.subscribers.add(queue)
+        if poller.task is None or poller.task.done():
+            poller.task = asyncio.create_task(poller.run())
+            logger.info("live_feed_poller_started", wallet=key[0], chain_id=chain_id)
+        return queue
+
+    def unsubscribe(self, address: str, chain_id: int, queue: asyncio.Queue) -> None:
+        key = (address.lower(), chain_id)
+        poller = self._pollers.get(key)
+        if poller is None:
+            return
+        poller.subscribers.discard(queue)
+        if not poller.subscribers:
+            if poller.task is not None:
+                poller.task.cancel()
+            del self._pollers[key]
+            logger.info("live_feed_poller_stopped", wallet=key[0], chain_id=chain_id)
+
+
+live_feed = WalletFeedHub(interval=settings.LIVE_FEED_POLL_INTERVAL)
@@ -0,0 +1,175 @@
+import heapq
+from itertools import groupby, islice
+from typing import Dict, List
+
+from sqlalchemy import func, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.schemas import format_eth
+from app.models.sql_models import DirectionEnum, Network, Transaction, TransactionArchive, User, Wallet, WalletTransaction
+from app.models.types import Wei
+from app.services.archive import load_transactions
+from app.services.processor import tx_to_dict
+
+
+# Per-wallet index scans are combined this many at a time into one UNION ALL statement
+MERGE_CHUNK = 50
+
+
+def _link_totals_stmt(wallet_ids: List[int]):
+    value = func.coalesce(Transaction.value_wei, TransactionArchive.value_wei)
+    fee = func.coalesce(Transaction.tx_fee_wei, TransactionArchive.tx_fee_wei)
+    # The value comes from whichever table holds the row
+    return (
+        select(
+            WalletTransaction.wallet_id,
+            WalletTransaction.direction,
+            func.count(WalletTransaction.tx_id),
+            func.sum(value, type_=Wei()),
+            func.sum(fee, type_=Wei()),
+            func.min(WalletTransaction.time_stamp),
+            func.max(WalletTransaction.time_stamp),
+        )
+        .outerjoin(Transaction, Transaction.tx_id == WalletTransaction.tx_id)
+        .outerjoin(TransactionArchive, TransactionArchive.tx_id == WalletTransaction.tx_id)
+        .where(WalletTransaction.wallet_id.in_(wallet_ids))
+        .group_by(WalletTransaction.wallet_id, WalletTransaction.direction)
+    )
+
+
+def _link_rows_stmt(wallet_ids: List[int]):
+    return (
+        select(
+            WalletTransaction.wallet_id,
+            WalletTransaction.direction,
+            WalletTransaction.time_stamp,
+            func.coalesce(Transaction.value_wei, TransactionArchive.value_wei),
+            func.coalesce(Transaction.tx_fee_wei, TransactionArchive.tx_fee_wei),
+        )
+        .outerjoin(Transaction, Transaction.tx_id == WalletTransaction.tx_id)
+        .outerjoin(TransactionArchive, TransactionArchive.tx_id == WalletTransaction.tx_id)
+        .where(WalletTransaction.wallet_id.in_(wallet_ids))
+    )
+
+
+def _add_totals(w: dict, direction, count: int, value_wei, fee_wei, first, last) -> None:
+    w["tx_count"] += count
+    if direction == DirectionEnum.in_:
+        w["total_in_wei"] += value_wei or 0
+    elif direction == DirectionEnum.out:
+        w["total_out_wei"] += value_wei or 0
+        w["fees_wei"] += fee_wei or 0
+    if first is not None and (w["first_activity"] is None or first < w["first_activity"]):
+        w["first_activity"] = first
+    if last is not None and (w["last_activity"] is None or last > w["last_activity"]):
+        w["last_activity"] = last
+
+
+def _wallet_stats(db: Session, user_id: int) -> List[dict]:
+    stats: Dict[int, dict] = {}
+    rows = db.execute(
+        select(Wallet.wallet_id, Wallet.address, Wallet.label, Network.name)
+        .join(Network, Network.network_id == Wallet.network_id)
+        .where(Wallet.user_id == user_id)
+        .order_by(Wallet.wallet_id)
+    )
+    for wallet_id, address, label, network in rows:
+        stats[wallet_id] = {
+            "wallet_id": wallet_id,
+            "address": address,
+            "label": label,
+            "network_name": network,
+            "tx_count": 0,
+            "total_in_wei": 0,
+            "total_out_wei": 0,
+            "fees_wei": 0,
+            "first_activity": None,
+            "last_activity": None,
+        }
+    if stats and db.bind.dialect.name in ("mysql", "postgresql"):
+        # DECIMAL(65,0) sums are exact there, so the database returns one row per wallet and direction
+        for wallet_id, direction, count, value_wei, fee_wei, first, last in db.execute(_link_totals_stmt(list(stats))):
+            _add_totals(stats[wallet_id], direction, count, value_wei, fee_wei, first, last)
+    elif stats:
+        # SQLite keeps Wei as text and SUM() over it would round through REAL; add per row in Python
+        for wallet_id, direction, when, value_wei, fee_wei in db.execute(_link_rows_stmt(list(stats))):
+            _add_totals(stats[wallet_id], direction, 1, value_wei, fee_wei, when, when)
+    for w in stats.values():
+        for key in ("first_activity", "last_activity"):
+            w[key] = w[key].isoformat() if w[key] else None
+    return list(stats.values())
+
+
+def _recent_links(db: Session, wallet_ids: List[int], limit: int) -> List[tuple]:
+    runs = []
+    for start in range(0, len(wallet_ids), MERGE_CHUNK):
+        # Each branch is a bounded scan of idx_wallet_time; no wallet contributes more than `limit` rows
+        branches = []
+        for wallet_id in wallet_ids[start : start + MERGE_CHUNK]:
+            branch = (
+                select(
+                    WalletTransaction.wallet_id,
+                    WalletTransaction.tx_id,
+                    WalletTransaction.direction,
+                    WalletTransaction.time_stamp,
+                )
+                .where(WalletTransaction.wallet_id == wallet_id)
+                .order_by(WalletTransaction.time_stamp.desc(), WalletTransaction.tx_id.desc())
+                .limit(limit)
+                .subquery()
+            )
+            branches.append(select(branch))
+        combined = union_all(*branches).subquery()
+        rows = db.execute(
+            select(combined).order_by(combined.c.wallet_id, combined.c.time_stamp.desc(), combined.c.tx_id.desc())
+        ).all()
+        runs.extend(list(group) for _, group in groupby(rows, key=lambda r: r.wallet_id))
+    # k-way merge of the already sorted per-wallet runs; stops after `limit` items
+    merged = heapq.merge(*runs, key=lambda r: (r.time_stamp, r.tx_id), reverse=True)
+    return list(islice(merged, limit))
+
+
+def _with_eth(stats: dict, exact: bool) -> dict:
+    # Sums stay exact in wei; ETH is only rendered here
+    out = dict(stats)
+    for key in ("total_in", "total_out", "fees"):
+        wei = out.pop(f"{key}_wei")
+        out[f"{key}_eth"] = format_eth(wei, exact)
+        out[f"{key}_wei"] = str(wei)
+    return out
+
+
+def user_portfolio(db: Session, user: User, limit: int = 20, exact: bool = False) -> dict:
+    wallets = _wallet_stats(db, user.user_id)
+    links = _recent_links(db, [w["wallet_id"] for w in wallets], limit) if wallets else []
+    txs = load_transactions(db, [link.tx_id for link in links], oldest=links[-1].time_stamp if links else None)
+    by_id: Dict[int, dict] = {w["wallet_id"]: w for w in wallets}
+
+    activity = []
+    for link in links:
+        t = txs.get(link.tx_id)
+        if t is None:
+            continue
+        item = tx_to_dict(t, link.direction, exact)
+        item["wallet_id"] = link.wallet_id
+        item["wallet_address"] = by_id[link.wallet_id]["address"]
+        item["wallet_label"] = by_id[link.wallet_id]["label"]
+        activity.append(item)
+
+    firsts = [w["first_activity"] for w in wallets if w["first_activity"]]
+    lasts = [w["last_activity"] for w in wallets if w["last_activity"]]
+    summary = {
+        "wallet_count": len(wallets),
+        "tx_count": sum(w["tx_count"] for w in wallets),
+        "total_in_wei": sum(w["total_in_wei"] for w in wallets),
+        "total_out_wei": sum(w["total_out_wei"] for w in wallets),
+        "fees_wei": sum(w["fees_wei"] for w in wallets),
+        "first_activity": min(firsts) if firsts else None,
+        "last_activity": max(lasts) if lasts else None,
+    }
+    return {
+        "user": {"user_id": user.user_id, "nama": user.nama},
+        "summary": _with_eth(summary, exact),
+        "wallets": [_with_eth(w, exact) for w in wallets],
+        "recent_activity": activity,
+    }
@@ -1,40 +1,92 @@
 import re
 from datetime import datetime, timezone
-from typing import Any, Dict, List
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List
 
-from app.models.schemas import ADDRESS_REGEX, DbTransaction, TransactionItem
+from app.models.schemas import ADDRESS_REGEX, TX_HASH_REGEX, DbTransaction, TransactionItem, format_eth
+from app.tracing import tracer
 
 
 def is_valid_address(address: str) -> bool:
     return re.fullmatch(ADDRESS_REGEX, address) is not None
 
 
+def is_valid_tx_hash(tx_hash: str) -> bool:
+    return re.fullmatch(TX_HASH_REGEX, tx_hash) is not None
+
+
 def _to_iso(ts: str) -> str:
     dt = datetime.fromtimestamp(int(ts), tz=timezone.utc)
     return dt.isoformat().replace("+00:00", "Z")
 
 
-def _wei_to_eth(value: str) -> float:
-    return int(value) / 1e18
+def _int(value: Any) -> int:
+    if value in (None, ""):
+        return 0
+    return int(str(value))
 
 
 def to_transaction_items(items: List[Dict[str, Any]], wallet_address: str) -> List[TransactionItem]:
+    with tracer.span("processor.to_transaction_items", raw_count=len(items)):
+        return _to_transaction_items(items, wallet_address)
+
+
+def record_to_item(it: Dict[str, Any]) -> TransactionItem:
+    status = "success" if str(it.get("isError", "0")) == "0" else "failed"
+    return TransactionItem(
+        tx_hash=str(it.get("hash", "")),
+        block_number=int(it.get("blockNumber", 0)),
+        timestamp=_to_iso(str(it.get("timeStamp", "0"))),
+        **{"from": str(it.get("from", ""))},
+        **{"to": str(it.get("to", ""))},
+        value_wei=_int(it.get("value")),
+        # Same pass as parsing: the fee actually paid is gasPrice (effective) x gasUsed
+        fee_wei=_int(it.get("gasPrice")) * _int(it.get("gasUsed")),
+        status=status,
+        gas_used=_int(it.get("gasUsed")),
+    )
+
+
+def _to_transaction_items(items: List[Dict[str, Any]], wallet_address: str) -> List[TransactionItem]:
     sorted_items = sorted(items, key=lambda x: int(x.get("timeStamp", "0")), reverse=True)
-    result: List[TransactionItem] = []
-    for it in sorted_items[:500]:
-        status = "success" if str(it.get("isError", "0")) == "0" else "failed"
-        obj = TransactionItem(
-            tx_hash=str(it.get("hash", "")),
-            block_number=int(it.get("blockNumber", 0)),
-            timestamp=_to_iso(str(it.get("timeStamp", "0"))),
-            **{"from": str(it.get("from", ""))},
-            **{"to": str(it.get("to", ""))},
-            value_eth=_wei_to_eth(str(it.get("value", "0"))),
-            status=status,
-            gas_used=int(it.get("gasUsed", 0)),
-        )
-        result.append(obj)
-    return result
+    return [record_to_item(it) for it in sorted_items[:500]]
+
+
+async def stream_transaction_items(records: AsyncIterable[Dict[str, Any]]) -> AsyncIterator[TransactionItem]:
+    # One record at a time, in arrival order; unlike to_transaction_items nothing is sorted or capped
+    async for it in records:
+        yield record_to_item(it)
+
+
+def tx_to_dict(t, direction, exact: bool = False) -> dict:
+    # t is a Transaction or TransactionArchive row
+    return {
+        "tx_hash": t.tx_hash,
+        "block_number": t.block_number,
+        "time_stamp": t.time_stamp.isoformat(),
+        "from_address": t.from_address,
+        "to_address": t.to_address,
+        "value_eth": format_eth(t.value_wei, exact),
+        "tx_fee_eth": format_eth(t.tx_fee_wei, exact),
+        "value_wei": str(t.value_wei or 0),
+        "tx_fee_wei": str(t.tx_fee_wei or 0),
+        "direction": direction.value if hasattr(direction, "value") else direction,
+        "status": t.status,
+    }
+
+
+def row_to_item(t) -> TransactionItem:
+    # Stored row back into the upstream-shaped item, so DB and Etherscan results merge as one list
+    return TransactionItem(
+        tx_hash=t.tx_hash,
+        block_number=t.block_number,
+        timestamp=t.time_stamp.replace(tzinfo=None).isoformat() + "Z",
+        **{"from": t.from_address or ""},
+        **{"to": t.to_address or ""},
+        value_wei=t.value_wei or 0,
+        fee_wei=t.tx_fee_wei or 0,
+        status="failed" if t.status == "failed" else "success",
+        gas_used=t.gas_used or 0,
+    )
 
 
 def _direction(wallet: str, from_addr: str, to_addr: str) -> str:
@@ -51,8 +103,6 @@ def _direction(wallet: str, from_addr: str, to_addr: str) -> str:
 
 
 def to_db_row(item: TransactionItem, wallet_id: int, network_id: int, wallet_address: str) -> DbTransaction:
-    gas_price = 0
-    tx_fee_eth = 0.0
     direction = _direction(wallet_address, item.from_address, item.to_address)
     return DbTransaction(
         network_id=network_id,
@@ -62,9 +112,9 @@ def to_db_row(item: TransactionItem, wallet_id: int, network_id: int, wallet_add
         time_stamp=item.timestamp,
         from_address=item.from_address,
         to_address=item.to_address,
-        value_eth=item.value_eth,
+        value_wei=item.value_wei,
         gas_used=item.gas_used,
-        tx_fee_eth=tx_fee_eth,
+        tx_fee_wei=item.fee_wei,
         direction=direction,
         status=item.status,
     )
@@ -0,0 +1,63 @@
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.models.schemas import TransactionItem
+from app.models.sql_models import Network, Wallet, WalletTransaction
+from app.services.archive import load_transactions
+from app.services.processor import row_to_item
+from app.services.registration import DEFAULT_CHAIN_ID, NETWORK_CHAIN_IDS
+
+
+# Same cap as to_transaction_items, so a DB-served response is never longer than an upstream one
+STORED_LIMIT = 500
+
+
+def known_chain_id(network: str) -> Optional[int]:
+    if network.isdigit():
+        return int(network)
+    return NETWORK_CHAIN_IDS.get(network) or NETWORK_CHAIN_IDS.get(network.lower())
+
+
+def resolve_network(db: Session, network: Optional[str]) -> Tuple[Optional[Network], Optional[int]]:
+    # (registry row or None, chain id or None when the name is unknown everywhere)
+    if not network:
+        return db.query(Network).filter(Network.chain_id == DEFAULT_CHAIN_ID).first(), DEFAULT_CHAIN_ID
+    chain_id = known_chain_id(network)
+    conds = [func.lower(Network.name) == network.lower()]
+    if chain_id is not None:
+        conds.append(Network.chain_id == chain_id)
+    row = db.query(Network).filter(or_(*conds)).order_by(Network.network_id).first()
+    return row, row.chain_id if row is not None else chain_id
+
+
+def tracked_wallet(db: Session, address: str, network_id: int) -> Optional[Wallet]:
+    return (
+        db.query(Wallet)
+        .filter(Wallet.address == address.lower(), Wallet.network_id == network_id)
+        .order_by(Wallet.wallet_id.desc())
+        .first()
+    )
+
+
+def stored_items(db: Session, wallet: Wallet, limit: int = STORED_LIMIT) -> List[TransactionItem]:
+    links = (
+        db.query(WalletTransaction.tx_id, WalletTransaction.time_stamp)
+        .filter(WalletTransaction.wallet_id == wallet.wallet_id)
+        .order_by(WalletTransaction.time_stamp.desc(), WalletTransaction.tx_id.desc())
+        .limit(limit)
+        .all()
+    )
+    txs = load_transactions(db, [link.tx_id for link in links], oldest=links[-1].time_stamp if links else None)
+    return [row_to_item(txs[link.tx_id]) for link in links if link.tx_id in txs]
+
+
+def merge_items(
+    delta: Iterable[TransactionItem], stored: Iterable[TransactionItem], limit: int = STORED_LIMIT
+) -> List[TransactionItem]:
+    # Upstream wins on a hash present in both (e.g. a receipt that changed since it was stored)
+    by_hash = {item.tx_hash.lower(): item for item in stored}
+    by_hash.update((item.tx_hash.lower(), item) for item in delta)
+    merged = sorted(by_hash.values(), key=lambda i: (i.block_number, i.timestamp), reverse=True)
+    return merged[:limit]
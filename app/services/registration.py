@@ -0,0 +1,120 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.sql_models import Network, User, Wallet
+from app.services.block_scanner import address_index
+from app.services.ingest_jobs import claim_ingest_job, ingest_queue
+
+
+DEFAULT_CHAIN_ID = 11155111
+
+NETWORK_CHAIN_IDS = {
+    "ethereum-mainnet": 1,
+    "sepolia-testnet": 11155111,
+    "sepolia": 11155111,
+    "goerli-testnet": 5,
+    "goerli": 5,
+    "polygon-mainnet": 137,
+    "polygon-mumbai": 80001,
+    "bsc-mainnet": 56,
+    "bsc-testnet": 97,
+}
+
+
+def chain_id_for(network: str) -> int:
+    # Exact name first, then lowercase; unknown networks default to Sepolia
+    return NETWORK_CHAIN_IDS.get(network) or NETWORK_CHAIN_IDS.get(network.lower()) or DEFAULT_CHAIN_ID
+
+
+def upsert_id(db: Session, model, values: Dict[str, Any], keys: List[str], update: Optional[List[str]] = None) -> int:
+    # INSERT .. ON CONFLICT/DUPLICATE KEY that hands back the row id in the same round trip
+    table = model.__table__
+    pk = table.primary_key.columns.values()[0]
+    update = update or []
+    dialect = db.bind.dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(table).values(**values)
+        # LAST_INSERT_ID(pk) makes lastrowid report the existing row's id on the duplicate path
+        changes = {pk.name: func.LAST_INSERT_ID(pk)}
+        changes.update({col: stmt.inserted[col] for col in update})
+        return db.execute(stmt.on_duplicate_key_update(**changes)).lastrowid
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite_insert if dialect == "sqlite" else pg_insert)(table).values(**values)
+        # A no-op assignment on the conflict key still makes RETURNING yield the existing row
+        changes = {col: stmt.excluded[col] for col in (update or keys[:1])}
+        stmt = stmt.on_conflict_do_update(index_elements=keys, set_=changes).returning(pk)
+        return db.execute(stmt).scalar_one()
+    existing = db.execute(select(pk).where(*[table.c[k] == values[k] for k in keys])).scalar()
+    if existing is not None:
+        if update:
+            db.execute(table.update().where(pk == existing).values(**{col: values[col] for col in update}))
+        return existing
+    return db.execute(insert(table).values(**values)).inserted_primary_key[0]
+
+
+def _resolve_network(db: Session, chain_id: int, name: str) -> int:
+    # Chain id is the source of truth; a network registered under the same name with another id is reused
+    rows = db.execute(
+        select(Network.network_id, Network.chain_id).where(or_(Network.chain_id == chain_id, Network.name == name))
+    ).all()
+    for network_id, row_chain in rows:
+        if row_chain == chain_id:
+            return network_id
+    if rows:
+        return rows[0][0]
+    return upsert_id(db, Network, {"name": name, "chain_id": chain_id, "symbol_native": "ETH"}, ["chain_id"])
+
+
+def resolve_user(db: Session, nama: str) -> int:
+    # Owner names are display names, not identities, so there is no unique key to upsert on:
+    # the oldest user with this name is reused and a new one is added only when there is none
+    existing = db.execute(select(func.min(User.user_id)).where(User.nama == nama)).scalar()
+    if existing is not None:
+        return existing
+    return db.execute(insert(User).values(nama=nama)).inserted_primary_key[0]
+
+
+def upsert_wallet(
+    db: Session, chain_id: int, network_name: str, owner_name: str, address: str, label: Optional[str]
+) -> Tuple[int, int]:
+    network_id = _resolve_network(db, chain_id, network_name)
+    user_id = resolve_user(db, owner_name)
+    # The wallet upsert row-locks (network_id, address) until commit, so a concurrent registration
+    # of the same address waits here. Its read view can still predate the first registration's
+    # commit, which is why claim_ingest_job looks the active job up with a locking read
+    wallet_id = upsert_id(
+        db,
+        Wallet,
+        {"user_id": user_id, "network_id": network_id, "address": address.lower(), "label": label},
+        ["network_id", "address"],
+        ["user_id", "label"],
+    )
+    return wallet_id, network_id
+
+
+def register_wallet(db: Session, chain_id: int, network_name: str, owner_name: str, address: str, label: Optional[str]) -> dict:
+    address = address.lower()
+    try:
+        wallet_id, network_id = upsert_wallet(db, chain_id, network_name, owner_name, address, label)
+        job, created = claim_ingest_job(db, wallet_id, network_id)
+        result = {
+            "wallet_id": wallet_id,
+            "network_id": network_id,
+            "address": address,
+            "job_id": job.job_id,
+            "job_status": job.status,
+            "merged": not created,
+        }
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    address_index.add(network_id, wallet_id, address)
+    if created:
+        ingest_queue.submit(result["job_id"])
+    return result
@@ -0,0 +1,114 @@
+import re
+from typing import List, Tuple
+
+from sqlalchemy import select, text, union
+from sqlalchemy.orm import Session
+
+from app.models.sql_models import Network, User, Wallet
+
+
+HEX_PREFIX_REGEX = re.compile(r"^0x[0-9a-fA-F]{1,40}$")
+TOKEN_REGEX = re.compile(r"\w+", re.UNICODE)
+MAX_TOKENS = 8
+QUERY_TIMEOUT_MS = 500
+
+
+def address_prefix_range(prefix: str) -> Tuple[bytes, bytes]:
+    # "0xab1" -> [ab10..00, ab1f..ff]: a plain range scan on the BINARY(20) address index
+    nibbles = prefix[2:].lower()
+    low = bytes.fromhex((nibbles + "0" * 40)[:40])
+    high = bytes.fromhex((nibbles + "f" * 40)[:40])
+    return low, high
+
+
+def _tokens(q: str) -> List[str]:
+    return TOKEN_REGEX.findall(q.lower())[:MAX_TOKENS]
+
+
+def mysql_match_query(tokens: List[str], limit: int, offset: int):
+    # Same semantics as the SQLite FTS5 table over (label, owner): every token has to prefix-match
+    # the label or the owner name. Each token is one FULLTEXT lookup per column, ANDed together.
+    stmt = select(Wallet.wallet_id)
+    params = {}
+    for i, tok in enumerate(tokens):
+        params[f"q{i}"] = f"{tok}*"
+        label_w = Wallet.__table__.alias(f"lw{i}")
+        owner_w = Wallet.__table__.alias(f"ow{i}")
+        owner_u = User.__table__.alias(f"ou{i}")
+        by_label = select(label_w.c.wallet_id).where(text(f"MATCH (lw{i}.label) AGAINST (:q{i} IN BOOLEAN MODE)"))
+        by_owner = (
+            select(owner_w.c.wallet_id)
+            .join(owner_u, owner_u.c.user_id == owner_w.c.user_id)
+            .where(text(f"MATCH (ou{i}.nama) AGAINST (:q{i} IN BOOLEAN MODE)"))
+        )
+        stmt = stmt.where(Wallet.wallet_id.in_(union(by_label, by_owner)))
+    stmt = (
+        stmt.order_by(Wallet.wallet_id.desc())
+        .limit(limit)
+        .offset(offset)
+        .prefix_with(f"/*+ MAX_EXECUTION_TIME({QUERY_TIMEOUT_MS}) */")
+    )
+    return stmt, params
+
+
+def _text_match_ids(db: Session, tokens: List[str], limit: int, offset: int) -> List[int]:
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite":
+        match = " ".join(f'"{tok}"*' for tok in tokens)
+        rows = db.execute(
+            text("SELECT rowid FROM wallet_fts WHERE wallet_fts MATCH :q ORDER BY rank LIMIT :lim OFFSET :off"),
+            {"q": match, "lim": limit, "off": offset},
+        )
+        return [r[0] for r in rows]
+    if dialect == "mysql":
+        stmt, params = mysql_match_query(tokens, limit, offset)
+        return [r[0] for r in db.execute(stmt, params)]
+    # Other backends have no full-text index here; fall back to prefix LIKE on each token
+    stmt = select(Wallet.wallet_id).join(User, User.user_id == Wallet.user_id)
+    for tok in tokens:
+        stmt = stmt.where(Wallet.label.ilike(f"{tok}%") | User.nama.ilike(f"{tok}%"))
+    stmt = stmt.order_by(Wallet.wallet_id.desc()).limit(limit).offset(offset)
+    return [r[0] for r in db.execute(stmt)]
+
+
+def search_wallets(db: Session, q: str, page: int = 1, page_size: int = 20) -> Tuple[List[dict], bool]:
+    q = q.strip()
+    # One extra row tells us whether there is a next page without an unbounded COUNT
+    limit = page_size + 1
+    offset = (page - 1) * page_size
+
+    base = (
+        select(Wallet, User.nama, Network.name)
+        .join(User, User.user_id == Wallet.user_id)
+        .join(Network, Network.network_id == Wallet.network_id)
+    )
+    if HEX_PREFIX_REGEX.match(q):
+        low, high = address_prefix_range(q)
+        stmt = (
+            base.where(Wallet.address >= low, Wallet.address <= high)
+            .order_by(Wallet.address, Wallet.wallet_id)
+            .limit(limit)
+            .offset(offset)
+        )
+        rows = db.execute(stmt).all()
+    else:
+        tokens = _tokens(q)
+        if not tokens:
+            return [], False
+        ids = _text_match_ids(db, tokens, limit, offset)
+        if not ids:
+            return [], False
+        by_id = {w.wallet_id: (w, owner, net) for w, owner, net in db.execute(base.where(Wallet.wallet_id.in_(ids)))}
+        rows = [by_id[i] for i in ids if i in by_id]
+
+    results = [
+        {
+            "wallet_id": w.wallet_id,
+            "address": w.address,
+            "label": w.label,
+            "owner_name": owner,
+            "network_name": net,
+        }
+        for w, owner, net in rows[:page_size]
+    ]
+    return results, len(rows) > page_size
@@ -0,0 +1,108 @@
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.sql_models import Network, Transaction, TransactionArchive, Wallet, WalletTransaction
+from app.services.ingest import build_transaction
+from app.services.processor import record_to_item, tx_to_dict
+
+
+# (hash, exact, chain id); stored lookups span every network and use None for the chain
+CacheKey = Tuple[str, bool, Optional[int]]
+
+
+class TxCache:
+    # LRU of finished lookups; the TTL bounds how long a newly linked wallet can be missing from a hot hash
+    def __init__(self, max_size: int = 1024, ttl: float = 30.0, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._items: "OrderedDict[CacheKey, Tuple[float, dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: CacheKey) -> Optional[dict]:
+        entry = self._items.get(key)
+        if entry is None or entry[0] <= self.clock():
+            if entry is not None:
+                del self._items[key]
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: CacheKey, value: dict) -> None:
+        if self.max_size <= 0:
+            return
+        self._items[key] = (self.clock() + self.ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+tx_cache = TxCache(max_size=settings.TX_CACHE_SIZE, ttl=settings.TX_CACHE_TTL)
+
+
+def _network_names(db: Session, network_ids) -> Dict[int, Network]:
+    ids = list(set(network_ids))
+    if not ids:
+        return {}
+    return {n.network_id: n for n in db.query(Network).filter(Network.network_id.in_(ids))}
+
+
+def _tx_out(t, network: Optional[Network], exact: bool, chain_id: Optional[int] = None) -> dict:
+    out = tx_to_dict(t, None, exact)
+    out.pop("direction")
+    out["network_name"] = network.name if network else None
+    out["chain_id"] = network.chain_id if network else chain_id
+    return out
+
+
+def find_stored(db: Session, tx_hash: str, exact: bool = False) -> Optional[dict]:
+    # idx_hash on the hot table; only a miss there pays for idx_archive_hash
+    rows: List[object] = db.query(Transaction).filter(Transaction.tx_hash == tx_hash).all()
+    if not rows:
+        rows = db.query(TransactionArchive).filter(TransactionArchive.tx_hash == tx_hash).all()
+    if not rows:
+        return None
+    networks = _network_names(db, [t.network_id for t in rows])
+    links = (
+        db.query(Wallet.wallet_id, Wallet.address, Wallet.label, Wallet.network_id, WalletTransaction.direction)
+        .join(WalletTransaction, WalletTransaction.wallet_id == Wallet.wallet_id)
+        .filter(WalletTransaction.tx_id.in_([t.tx_id for t in rows]))
+        .order_by(Wallet.wallet_id)
+        .all()
+    )
+    return {
+        "tx_hash": tx_hash,
+        "source": "database",
+        "transactions": [_tx_out(t, networks.get(t.network_id), exact) for t in rows],
+        "wallets": [
+            {
+                "wallet_id": link.wallet_id,
+                "address": link.address,
+                "label": link.label,
+                "network_name": networks[link.network_id].name if link.network_id in networks else None,
+                "direction": link.direction.value,
+            }
+            for link in links
+        ],
+    }
+
+
+def from_upstream(record: dict, network: Optional[Network], chain_id: int, exact: bool = False) -> dict:
+    item = record_to_item(record)
+    t = build_transaction(item, network.network_id if network else None)
+    return {
+        "tx_hash": item.tx_hash.lower(),
+        "source": "upstream",
+        "transactions": [_tx_out(t, network, exact, chain_id)],
+        "wallets": [],
+    }
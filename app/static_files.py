@@ -0,0 +1,185 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import structlog
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse, Response
+
+try:
+    import brotli  # optional: only used to precompress when the build did not ship .br files
+except ImportError:  # pragma: no cover - depends on environment
+    brotli = None
+
+
+logger = structlog.get_logger()
+
+HASHED_PREFIX = "assets/"
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+INDEX_CACHE = "no-cache"
+DEFAULT_CACHE = "public, max-age=3600"
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+MIN_COMPRESS_SIZE = 512
+# Preference order when the client accepts several encodings
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+@dataclass
+class StaticAsset:
+    rel_path: str
+    abs_path: str
+    content_type: str
+    size: int
+    etag: str
+    cache_control: str
+    body: Optional[bytes] = None
+    # encoding -> in-memory body, or None when only the on-disk sibling file exists
+    variants: Dict[str, Optional[bytes]] = field(default_factory=dict)
+
+
+def _content_type(path: str) -> str:
+    if path.endswith(".js") or path.endswith(".mjs"):
+        ctype = "text/javascript"
+    else:
+        ctype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if ctype.startswith("text/") or ctype in ("application/json", "image/svg+xml"):
+        ctype += "; charset=utf-8"
+    return ctype
+
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted.add(token)
+    return accepted
+
+
+class StaticIndex:
+    def __init__(self, root: str, max_memory_bytes: int = 1024 * 1024):
+        self.root = root
+        self.max_memory_bytes = max_memory_bytes
+        self.assets: Dict[str, StaticAsset] = {}
+
+    def build(self) -> None:
+        assets: Dict[str, StaticAsset] = {}
+        memory_bytes = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(".gz") or name.endswith(".br"):
+                    continue
+                abs_path = os.path.join(dirpath, name)
+                rel_path = os.path.relpath(abs_path, self.root).replace(os.sep, "/")
+                asset = self._load(rel_path, abs_path)
+                memory_bytes += len(asset.body or b"") + sum(len(v or b"") for v in asset.variants.values())
+                assets[rel_path] = asset
+        self.assets = assets
+        logger.info("static_index_built", root=self.root, files=len(assets), memory_bytes=memory_bytes)
+
+    def _load(self, rel_path: str, abs_path: str) -> StaticAsset:
+        stat = os.stat(abs_path)
+        ctype = _content_type(rel_path)
+        if rel_path.startswith(HASHED_PREFIX):
+            cache_control = IMMUTABLE_CACHE
+        elif rel_path == "index.html":
+            cache_control = INDEX_CACHE
+        else:
+            cache_control = DEFAULT_CACHE
+
+        body: Optional[bytes] = None
+        if stat.st_size <= self.max_memory_bytes:
+            with open(abs_path, "rb") as fh:
+                body = fh.read()
+            etag = hashlib.sha1(body).hexdigest()[:20]
+        else:
+            etag = f"{int(stat.st_mtime):x}-{stat.st_size:x}"
+
+        asset = StaticAsset(
+            rel_path=rel_path,
+            abs_path=abs_path,
+            content_type=ctype,
+            size=stat.st_size,
+            etag=f'"{etag}"',
+            cache_control=cache_control,
+            body=body,
+        )
+
+        for encoding, suffix in ENCODINGS:
+            sibling = abs_path + suffix
+            if os.path.isfile(sibling):
+                if body is not None:
+                    with open(sibling, "rb") as fh:
+                        asset.variants[encoding] = fh.read()
+                else:
+                    asset.variants[encoding] = None
+                continue
+            if body is None or len(body) < MIN_COMPRESS_SIZE or not ctype.startswith(COMPRESSIBLE_TYPES):
+                continue
+            if encoding == "gzip":
+                compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            elif brotli is not None:
+                compressed = brotli.compress(body, quality=11)
+            else:
+                continue
+            if len(compressed) < len(body):
+                asset.variants[encoding] = compressed
+        return asset
+
+    def lookup(self, path: str) -> Optional[StaticAsset]:
+        return self.assets.get(path.lstrip("/"))
+
+    def respond(self, asset: StaticAsset, request: Request) -> Response:
+        headers = {"Cache-Control": asset.cache_control, "Vary": "Accept-Encoding"}
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        encoding = next((enc for enc, _ in ENCODINGS if enc in accepted and enc in asset.variants), None)
+        etag = asset.etag if encoding is None else f'{asset.etag[:-1]}-{encoding}"'
+        headers["ETag"] = etag
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or asset.etag[1:-1] in if_none_match):
+            return Response(status_code=304, headers=headers)
+
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+            variant = asset.variants[encoding]
+            if variant is None:
+                suffix = dict(ENCODINGS)[encoding]
+                return FileResponse(asset.abs_path + suffix, media_type=asset.content_type, headers=headers)
+            return Response(content=variant, media_type=asset.content_type, headers=headers)
+        if asset.body is None:
+            return FileResponse(asset.abs_path, media_type=asset.content_type, headers=headers)
+        return Response(content=asset.body, media_type=asset.content_type, headers=headers)
+
+
+def mount_spa(app: FastAPI, static_path: str, max_memory_bytes: int = 1024 * 1024) -> StaticIndex:
+    static_index = StaticIndex(static_path, max_memory_bytes=max_memory_bytes)
+    static_index.build()
+
+    # Catch-all route for SPA (Single Page Application)
+    @app.get("/{full_path:path}", include_in_schema=False)
+    async def serve_spa(full_path: str, request: Request):
+        asset = static_index.lookup(full_path)
+        if asset is None:
+            if full_path.startswith(HASHED_PREFIX):
+                return Response(status_code=404)
+            # Otherwise return index.html for React Router
+            asset = static_index.lookup("index.html")
+            if asset is None:
+                return Response(status_code=404)
+        return static_index.respond(asset, request)
+
+    return static_index
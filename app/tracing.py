@@ -0,0 +1,228 @@
+import contextvars
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from fastapi import FastAPI, Request
+
+
+# Span model follows OpenTelemetry (W3C trace/span ids, kind, attributes, status, unix-nano times)
+# so exported JSON lines can be replayed into an OTLP collector; no SDK dependency at runtime.
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_span_id", "name", "kind", "attributes", "start_ns", "end_ns", "status")
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], kind: str, attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = "UNSET"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, exc: BaseException) -> None:
+        self.status = "ERROR"
+        self.attributes["exception.type"] = type(exc).__name__
+        self.attributes["exception.message"] = str(exc)[:500]
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round(((self.end_ns or self.start_ns) - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+
+class JsonLinesExporter:
+    def __init__(self, stream=None, path: Optional[str] = None):
+        self.path = path
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as fh:
+                    fh.write(line + "\n")
+            else:
+                (self.stream or sys.stdout).write(line + "\n")
+
+
+class MemoryExporter:
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Tracer:
+    def __init__(self):
+        self.exporter = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        kind: str = "INTERNAL",
+        parent: Optional[Span] = None,
+        trace_id: Optional[str] = None,
+        parent_span_id: Optional[str] = None,
+        **attributes: Any,
+    ) -> Iterator[Optional[Span]]:
+        if self.exporter is None:
+            yield None
+            return
+        parent = parent or _current.get()
+        if parent is not None:
+            trace_id, parent_span_id = parent.trace_id, parent.span_id
+        span = Span(name, trace_id or secrets.token_hex(16), parent_span_id, kind, attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_error(exc)
+            raise
+        finally:
+            _current.reset(token)
+            span.end_ns = time.time_ns()
+            if span.status == "UNSET":
+                span.status = "OK"
+            self.exporter.export(span)
+
+
+tracer = Tracer()
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def add_trace_ids(logger: Any, method_name: str, event_dict: dict) -> dict:
+    # structlog processor: every log line inside a span carries its trace/span id
+    span = _current.get()
+    if span is not None:
+        event_dict.setdefault("trace_id", span.trace_id)
+        event_dict.setdefault("span_id", span.span_id)
+    return event_dict
+
+
+def parse_traceparent(value: Optional[str]):
+    # W3C traceparent: version-traceid-parentid-flags
+    if not value:
+        return None, None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None
+    return parts[1], parts[2]
+
+
+def traceparent(span: Optional[Span]) -> Optional[str]:
+    if span is None:
+        return None
+    return f"00-{span.trace_id}-{span.span_id}-01"
+
+
+def _on_before_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if not tracer.enabled or _current.get() is None:
+        return
+    cm = tracer.span("db.statement", kind="CLIENT", **{
+        "db.system": conn.dialect.name,
+        "db.statement": statement[:1000],
+        "db.executemany": bool(executemany),
+    })
+    cm.__enter__()
+    conn.info.setdefault("_trace_spans", []).append(cm)
+
+
+def _on_after_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stack = conn.info.get("_trace_spans")
+    if stack:
+        stack.pop().__exit__(None, None, None)
+
+
+def _on_error(exception_context) -> None:
+    conn = exception_context.connection
+    stack = conn.info.get("_trace_spans") if conn is not None else None
+    if stack:
+        exc = exception_context.original_exception
+        stack.pop().__exit__(type(exc), exc, exc.__traceback__)
+
+
+_sqlalchemy_instrumented = False
+
+
+def instrument_sqlalchemy() -> None:
+    global _sqlalchemy_instrumented
+    if _sqlalchemy_instrumented:
+        return
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    # Engine class-level listeners cover the primary, replicas and any engine created later
+    event.listen(Engine, "before_cursor_execute", _on_before_execute)
+    event.listen(Engine, "after_cursor_execute", _on_after_execute)
+    event.listen(Engine, "handle_error", _on_error)
+    _sqlalchemy_instrumented = True
+
+
+def configure_tracing(exporter_name: str, path: str = "traces.jsonl") -> None:
+    if exporter_name == "console":
+        tracer.exporter = JsonLinesExporter(stream=sys.stdout)
+    elif exporter_name == "file":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tracer.exporter = JsonLinesExporter(path=path)
+    else:
+        tracer.exporter = None
+        return
+    instrument_sqlalchemy()
+
+
+def add_tracing_middleware(app: FastAPI) -> None:
+    @app.middleware("http")
+    async def tracing_middleware(request: Request, call_next: Any):
+        if not tracer.enabled:
+            return await call_next(request)
+        trace_id, parent_id = parse_traceparent(request.headers.get("traceparent"))
+        with tracer.span(
+            f"{request.method} {request.url.path}",
+            kind="SERVER",
+            trace_id=trace_id,
+            parent_span_id=parent_id,
+            **{"http.method": request.method, "http.target": request.url.path},
+        ) as span:
+            response = await call_next(request)
+            route = request.scope.get("route")
+            if route is not None:
+                span.name = f"{request.method} {route.path}"
+                span.set_attribute("http.route", route.path)
+            span.set_attribute("http.status_code", response.status_code)
+            if response.status_code >= 500:
+                span.status = "ERROR"
+            response.headers["traceparent"] = traceparent(span)
+            return response
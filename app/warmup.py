@@ -0,0 +1,186 @@
+import asyncio
+import os
+import re
+import time
+from typing import Callable, Dict, List, Optional
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.orm import Session, configure_mappers
+
+from app import database
+from app.models.sql_models import Network
+from app.services.circuit_breaker import backoff_delay
+from app.services.data_sources import source_for_network
+from app.services.http_pool import http_pool
+
+
+logger = structlog.get_logger()
+
+# References from index.html into the hashed build output, e.g. src="/assets/index-3f2a.js"
+_ASSET_REF = re.compile(r"""(?:src|href)=["']/?(assets/[^"'?#]+)""")
+# A failure in these leaves the instance unable to serve API traffic; the rest only cost latency
+CRITICAL_STEPS = ("db_pool", "networks")
+
+
+def validate_frontend(static_path: str) -> Dict[str, object]:
+    index = os.path.join(static_path, "index.html")
+    if not os.path.isfile(index):
+        raise FileNotFoundError(f"{index} missing")
+    with open(index, encoding="utf-8") as fh:
+        refs = sorted(set(_ASSET_REF.findall(fh.read())))
+    missing = [ref for ref in refs if not os.path.isfile(os.path.join(static_path, ref))]
+    if missing:
+        raise FileNotFoundError(f"index.html references missing assets: {', '.join(missing)}")
+    return {"assets": len(refs)}
+
+
+class Warmup:
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        db_connections: int = 2,
+        http_urls: Optional[List[str]] = None,
+        static_path: Optional[str] = None,
+        retry_base: float = 1.0,
+        retry_max: float = 30.0,
+    ):
+        self.session_factory = session_factory
+        self.db_connections = db_connections
+        self.http_urls = http_urls or []
+        self.static_path = static_path
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.retries = 0
+        self.steps: Dict[str, dict] = {}
+        self.import_ms: Optional[float] = None
+        self.started = False
+        self.finished = False
+        self._task: Optional[asyncio.Task] = None
+
+    def _session(self) -> Session:
+        factory = self.session_factory or database.SessionLocal
+        return factory()
+
+    @property
+    def ready(self) -> bool:
+        return self.finished and all(self.steps.get(name, {}).get("ok") for name in CRITICAL_STEPS)
+
+    @property
+    def phase(self) -> str:
+        if not self.started:
+            return "pending"
+        if not self.finished:
+            return "warming"
+        return "done" if self.ready else "retrying"
+
+    def _critical_steps(self) -> Dict[str, Callable]:
+        return {"db_pool": self._warm_db_pool, "networks": self._prime_networks}
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "phase": self.phase,
+            "import_ms": self.import_ms,
+            "retries": self.retries,
+            "steps": self.steps,
+        }
+
+    def _warm_db_pool(self) -> dict:
+        db = self._session()
+        try:
+            engine = db.get_bind()
+        finally:
+            db.close()
+        # Held open together so the pool ends up with that many live connections, not one reused N times
+        conns = []
+        try:
+            for _ in range(max(1, self.db_connections)):
+                conn = engine.connect()
+                conns.append(conn)
+                conn.execute(text("SELECT 1"))
+        finally:
+            for conn in conns:
+                conn.close()
+        return {"connections": len(conns)}
+
+    def _prime_networks(self) -> dict:
+        configure_mappers()
+        db = self._session()
+        try:
+            networks = db.query(Network).all()
+            for net in networks:
+                # Builds the JSON-RPC sources up front so the first request does not pay for it
+                source_for_network(net)
+            return {"networks": len(networks)}
+        finally:
+            db.close()
+
+    async def _warm_http(self) -> dict:
+        results = await asyncio.gather(*(http_pool.warm(url) for url in self.http_urls))
+        if self.http_urls and not any(results):
+            raise ConnectionError("no upstream reachable")
+        return {"connected": sum(results), "urls": len(self.http_urls)}
+
+    async def _step(self, name: str, fn: Callable, *args) -> None:
+        start = time.perf_counter()
+        try:
+            result = await fn(*args) if asyncio.iscoroutinefunction(fn) else await asyncio.to_thread(fn, *args)
+            self.steps[name] = {"ok": True, "ms": round((time.perf_counter() - start) * 1000, 1), **(result or {})}
+        except Exception as exc:
+            self.steps[name] = {"ok": False, "ms": round((time.perf_counter() - start) * 1000, 1), "error": str(exc)}
+            logger.warning("warmup_step_failed", step=name, error=str(exc))
+
+    async def run(self) -> None:
+        self.started = True
+        self.finished = False
+        self.steps = {}
+        self.retries = 0
+        start = time.perf_counter()
+        steps = [self._step(name, fn) for name, fn in self._critical_steps().items()]
+        if self.http_urls:
+            steps.append(self._step("http", self._warm_http))
+        if self.static_path:
+            steps.append(self._step("frontend", validate_frontend, self.static_path))
+        await asyncio.gather(*steps)
+        self.finished = True
+        logger.info(
+            "warmup_done",
+            ready=self.ready,
+            duration_ms=round((time.perf_counter() - start) * 1000, 1),
+            steps={name: step["ok"] for name, step in self.steps.items()},
+        )
+        await self._retry_critical()
+
+    async def _retry_critical(self) -> None:
+        # A database that was down for a moment at boot must not leave the instance unready for good
+        while not self.ready:
+            delay = backoff_delay(self.retries, self.retry_base, self.retry_max)
+            self.retries += 1
+            await asyncio.sleep(delay)
+            failed = [name for name in CRITICAL_STEPS if not self.steps.get(name, {}).get("ok")]
+            critical = self._critical_steps()
+            await asyncio.gather(*(self._step(name, critical[name]) for name in failed))
+            logger.info("warmup_retry", attempt=self.retries, ready=self.ready, retried=failed)
+
+    def start(self) -> asyncio.Task:
+        # Runs beside startup so the server accepts connections while /health reports not-ready
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def wait(self) -> None:
+        if self._task is not None:
+            await self._task
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+
+warmup = Warmup()
@@ -2,6 +2,33 @@
 -- Last modification date: 2025-11-27 15:43:57.264
 
 -- tables
+-- Table: block_cursor
+CREATE TABLE block_cursor (
+    network_id int  NOT NULL,
+    last_block bigint  NOT NULL,
+    updated_at datetime  NULL DEFAULT current_timestamp ON UPDATE current_timestamp,
+    CONSTRAINT block_cursor_pk PRIMARY KEY (network_id)
+) ENGINE InnoDB;
+
+-- Table: ingest_job
+CREATE TABLE ingest_job (
+    job_id int  NOT NULL AUTO_INCREMENT,
+    wallet_id int  NOT NULL,
+    network_id int  NOT NULL,
+    status varchar(20)  NOT NULL DEFAULT 'queued',
+    total int  NULL DEFAULT 0,
+    processed int  NULL DEFAULT 0,
+    added int  NULL DEFAULT 0,
+    error varchar(500)  NULL,
+    owner varchar(100)  NULL,
+    lease_until datetime  NULL,
+    created_at datetime  NULL DEFAULT current_timestamp,
+    updated_at datetime  NULL DEFAULT current_timestamp ON UPDATE current_timestamp,
+    CONSTRAINT ingest_job_pk PRIMARY KEY (job_id)
+) ENGINE InnoDB;
+
+CREATE INDEX idx_ingest_job_wallet ON ingest_job (wallet_id, status);
+
 -- Table: network
 CREATE TABLE network (
     network_id int  NOT NULL AUTO_INCREMENT,
@@ -28,27 +55,68 @@ CREATE TABLE sync_log (
 ) ENGINE InnoDB;
 
 -- Table: transaction
+-- One row per (network, tx_hash); wallets reference it through wallet_transaction.
+-- Range-partitioned by month of time_stamp (see migrations/003_partition_transaction.sql):
+-- every unique key has to include time_stamp and the table takes no foreign keys.
+-- Adjust the first boundary to just after your oldest data; `python -m app.services.archive`
+-- keeps adding monthly partitions ahead of time by splitting pmax.
 CREATE TABLE transaction (
     tx_id int  NOT NULL AUTO_INCREMENT,
     network_id int  NOT NULL,
-    wallet_id int  NOT NULL,
-    tx_hash char(66)  NOT NULL,
+    tx_hash binary(32)  NOT NULL,
     block_number bigint  NOT NULL,
     time_stamp datetime  NOT NULL,
-    from_address char(42)  NOT NULL,
-    to_address char(42)  NULL,
-    value_eth decimal(38,18)  NULL DEFAULT 0,
+    from_address binary(20)  NOT NULL,
+    to_address binary(20)  NULL,
+    value_wei decimal(65,0)  NULL DEFAULT 0,
     gas_used bigint  NULL DEFAULT 0,
-    tx_fee_eth decimal(38,18)  NULL DEFAULT 0,
-    direction enum('in','out','self')  NOT NULL,
+    tx_fee_wei decimal(65,0)  NULL DEFAULT 0,
     status varchar(20)  NULL DEFAULT 'success',
-    CONSTRAINT transaction_pk PRIMARY KEY (tx_id)
-) ENGINE InnoDB;
+    UNIQUE INDEX uk_network_hash (network_id,tx_hash,time_stamp),
+    CONSTRAINT transaction_pk PRIMARY KEY (tx_id,time_stamp)
+) ENGINE InnoDB
+PARTITION BY RANGE COLUMNS (time_stamp) (
+    PARTITION p_old VALUES LESS THAN ('2025-01-01'),
+    PARTITION p202501 VALUES LESS THAN ('2025-02-01'),
+    PARTITION p202502 VALUES LESS THAN ('2025-03-01'),
+    PARTITION p202503 VALUES LESS THAN ('2025-04-01'),
+    PARTITION p202504 VALUES LESS THAN ('2025-05-01'),
+    PARTITION p202505 VALUES LESS THAN ('2025-06-01'),
+    PARTITION p202506 VALUES LESS THAN ('2025-07-01'),
+    PARTITION p202507 VALUES LESS THAN ('2025-08-01'),
+    PARTITION p202508 VALUES LESS THAN ('2025-09-01'),
+    PARTITION p202509 VALUES LESS THAN ('2025-10-01'),
+    PARTITION p202510 VALUES LESS THAN ('2025-11-01'),
+    PARTITION p202511 VALUES LESS THAN ('2025-12-01'),
+    PARTITION p202512 VALUES LESS THAN ('2026-01-01'),
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+);
 
 CREATE INDEX idx_hash ON transaction (tx_hash);
 
 CREATE INDEX idx_time ON transaction (time_stamp);
 
+-- Table: transaction_archive
+-- Cold rows moved out of `transaction` by the archive job; same columns and tx_id
+CREATE TABLE transaction_archive (
+    tx_id int  NOT NULL,
+    network_id int  NOT NULL,
+    tx_hash binary(32)  NOT NULL,
+    block_number bigint  NOT NULL,
+    time_stamp datetime  NOT NULL,
+    from_address binary(20)  NOT NULL,
+    to_address binary(20)  NULL,
+    value_wei decimal(65,0)  NULL DEFAULT 0,
+    gas_used bigint  NULL DEFAULT 0,
+    tx_fee_wei decimal(65,0)  NULL DEFAULT 0,
+    status varchar(20)  NULL DEFAULT 'success',
+    CONSTRAINT transaction_archive_pk PRIMARY KEY (tx_id)
+) ENGINE InnoDB ROW_FORMAT=COMPRESSED;
+
+CREATE INDEX idx_archive_hash ON transaction_archive (tx_hash);
+
+CREATE INDEX idx_archive_time ON transaction_archive (time_stamp);
+
 -- Table: user
 CREATE TABLE user (
     user_id int  NOT NULL AUTO_INCREMENT,
@@ -60,18 +128,51 @@ CREATE TABLE user (
     CONSTRAINT user_pk PRIMARY KEY (user_id)
 ) ENGINE InnoDB;
 
+CREATE FULLTEXT INDEX ft_user_nama ON user (nama);
+
+-- Table: wallet_transaction
+CREATE TABLE wallet_transaction (
+    wallet_id int  NOT NULL,
+    tx_id int  NOT NULL,
+    direction enum('in','out','self')  NOT NULL,
+    time_stamp datetime  NOT NULL,
+    CONSTRAINT wallet_transaction_pk PRIMARY KEY (wallet_id,tx_id)
+) ENGINE InnoDB;
+
+CREATE INDEX idx_wallet_time ON wallet_transaction (wallet_id,time_stamp);
+
+-- Table: wallet_counterparty
+CREATE TABLE wallet_counterparty (
+    wallet_id int  NOT NULL,
+    counterparty binary(20)  NOT NULL,
+    tx_count int  NOT NULL DEFAULT 0,
+    volume_in_wei decimal(65,0)  NULL DEFAULT 0,
+    volume_out_wei decimal(65,0)  NULL DEFAULT 0,
+    first_seen datetime  NULL,
+    last_seen datetime  NULL,
+    CONSTRAINT wallet_counterparty_pk PRIMARY KEY (wallet_id,counterparty)
+) ENGINE InnoDB;
+
+CREATE INDEX idx_counterparty_top ON wallet_counterparty (wallet_id,tx_count);
+
+CREATE INDEX idx_counterparty_address ON wallet_counterparty (counterparty);
+
 -- Table: wallet
 CREATE TABLE wallet (
     wallet_id int  NOT NULL AUTO_INCREMENT,
     user_id int  NOT NULL,
     network_id int  NOT NULL,
-    address char(42)  NOT NULL,
+    address binary(20)  NOT NULL,
     label varchar(100)  NULL DEFAULT 'main wallet',
     created_at datetime  NULL DEFAULT current_timestamp,
     UNIQUE INDEX uk_wallet_net (network_id,address),
     CONSTRAINT wallet_pk PRIMARY KEY (wallet_id)
 ) ENGINE InnoDB;
 
+CREATE INDEX idx_wallet_address ON wallet (address);
+
+CREATE FULLTEXT INDEX ft_wallet_label ON wallet (label);
+
 -- foreign keys
 -- Reference: FK_0 (table: wallet)
 ALTER TABLE wallet ADD CONSTRAINT FK_0 FOREIGN KEY FK_0 (user_id)
@@ -83,12 +184,8 @@ ALTER TABLE wallet ADD CONSTRAINT FK_1 FOREIGN KEY FK_1 (network_id)
     REFERENCES network (network_id)
     ON DELETE RESTRICT;
 
--- Reference: FK_2 (table: transaction)
-ALTER TABLE transaction ADD CONSTRAINT FK_2 FOREIGN KEY FK_2 (network_id)
-    REFERENCES network (network_id);
-
--- Reference: FK_3 (table: transaction)
-ALTER TABLE transaction ADD CONSTRAINT FK_3 FOREIGN KEY FK_3 (wallet_id)
+-- Reference: FK_3 (table: wallet_transaction)
+ALTER TABLE wallet_transaction ADD CONSTRAINT FK_3 FOREIGN KEY FK_3 (wallet_id)
     REFERENCES wallet (wallet_id)
     ON DELETE CASCADE;
 
@@ -101,5 +198,24 @@ ALTER TABLE sync_log ADD CONSTRAINT FK_4 FOREIGN KEY FK_4 (wallet_id)
 ALTER TABLE sync_log ADD CONSTRAINT FK_5 FOREIGN KEY FK_5 (network_id)
     REFERENCES network (network_id);
 
+-- Reference: FK_6 (table: ingest_job)
+ALTER TABLE ingest_job ADD CONSTRAINT FK_6 FOREIGN KEY FK_6 (wallet_id)
+    REFERENCES wallet (wallet_id)
+    ON DELETE CASCADE;
+
+-- Reference: FK_7 (table: ingest_job)
+ALTER TABLE ingest_job ADD CONSTRAINT FK_7 FOREIGN KEY FK_7 (network_id)
+    REFERENCES network (network_id);
+
+-- Reference: FK_9 (table: block_cursor)
+ALTER TABLE block_cursor ADD CONSTRAINT FK_9 FOREIGN KEY FK_9 (network_id)
+    REFERENCES network (network_id)
+    ON DELETE CASCADE;
+
+-- Reference: FK_10 (table: wallet_counterparty)
+ALTER TABLE wallet_counterparty ADD CONSTRAINT FK_10 FOREIGN KEY FK_10 (wallet_id)
+    REFERENCES wallet (wallet_id)
+    ON DELETE CASCADE;
+
 -- End of file.
 
@@ -3,14 +3,14 @@ import os
 import sys
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime
 
 # Add project root to python path
 sys.path.append(os.getcwd())
 
-from app.models.sql_models import Base, Wallet, Transaction, Network, User
+from app.models.sql_models import Base, Wallet, WalletTransaction, Network, User
 from app.services.etherscan_client import EtherscanClient
 from app.services.processor import to_transaction_items
+from app.services.ingest import ingest_transactions
 from app.config import settings
 
 # Setup DB
@@ -80,46 +80,11 @@ async def debug_register():
             tx_items = to_transaction_items(result, ADDRESS)
             print(f"Parsed {len(tx_items)} transaction items")
             
-            count = 0
-            for item in tx_items:
-                # Check exist
-                exists = db.query(Transaction).filter(
-                    Transaction.tx_hash == item.tx_hash,
-                    Transaction.wallet_id == wallet.wallet_id
-                ).first()
-                
-                if exists:
-                    print(f"Skipping existing: {item.tx_hash}")
-                    continue
-                
-                direction = "self"
-                if item.from_address.lower() == ADDRESS.lower():
-                    direction = "out"
-                elif item.to_address.lower() == ADDRESS.lower():
-                    direction = "in"
-                
-                new_tx = Transaction(
-                    network_id=network.network_id,
-                    wallet_id=wallet.wallet_id,
-                    tx_hash=item.tx_hash,
-                    block_number=item.block_number,
-                    time_stamp=datetime.fromisoformat(item.timestamp.replace("Z", "+00:00")),
-                    from_address=item.from_address,
-                    to_address=item.to_address,
-                    value_eth=item.value_eth,
-                    gas_used=item.gas_used,
-                    tx_fee_eth=0,
-                    direction=direction,
-                    status=item.status
-                )
-                db.add(new_tx)
-                count += 1
-            
-            db.commit()
-            print(f"Successfully inserted {count} transactions to DB")
+            count = ingest_transactions(db, wallet, network.network_id, tx_items)
+            print(f"Successfully linked {count} transactions to wallet")
             
             # 6. Verify DB
-            count_db = db.query(Transaction).filter(Transaction.wallet_id == wallet.wallet_id).count()
+            count_db = db.query(WalletTransaction).filter(WalletTransaction.wallet_id == wallet.wallet_id).count()
             print(f"Final DB Count for Wallet {wallet.wallet_id}: {count_db}")
             
         else:
@@ -0,0 +1,61 @@
+-- Split per-wallet `transaction` rows into a canonical per-network table plus
+-- a wallet_transaction link table. Run once against an existing fp_basdat schema.
+
+CREATE TABLE transaction_canonical (
+    tx_id int  NOT NULL AUTO_INCREMENT,
+    network_id int  NOT NULL,
+    tx_hash char(66)  NOT NULL,
+    block_number bigint  NOT NULL,
+    time_stamp datetime  NOT NULL,
+    from_address char(42)  NOT NULL,
+    to_address char(42)  NULL,
+    value_eth decimal(38,18)  NULL DEFAULT 0,
+    gas_used bigint  NULL DEFAULT 0,
+    tx_fee_eth decimal(38,18)  NULL DEFAULT 0,
+    status varchar(20)  NULL DEFAULT 'success',
+    UNIQUE INDEX uk_network_hash (network_id,tx_hash),
+    CONSTRAINT transaction_pk PRIMARY KEY (tx_id)
+) ENGINE InnoDB;
+
+INSERT INTO transaction_canonical
+    (network_id, tx_hash, block_number, time_stamp, from_address, to_address, value_eth, gas_used, tx_fee_eth, status)
+SELECT network_id, tx_hash, MIN(block_number), MIN(time_stamp), MIN(from_address), MIN(to_address),
+       MAX(value_eth), MAX(gas_used), MAX(tx_fee_eth), MIN(status)
+FROM transaction
+GROUP BY network_id, tx_hash;
+
+CREATE TABLE wallet_transaction (
+    wallet_id int  NOT NULL,
+    tx_id int  NOT NULL,
+    direction enum('in','out','self')  NOT NULL,
+    time_stamp datetime  NOT NULL,
+    CONSTRAINT wallet_transaction_pk PRIMARY KEY (wallet_id,tx_id)
+) ENGINE InnoDB;
+
+INSERT IGNORE INTO wallet_transaction (wallet_id, tx_id, direction, time_stamp)
+SELECT t.wallet_id, c.tx_id, t.direction, c.time_stamp
+FROM transaction t
+JOIN transaction_canonical c ON c.network_id = t.network_id AND c.tx_hash = t.tx_hash;
+
+CREATE INDEX idx_wallet_time ON wallet_transaction (wallet_id,time_stamp);
+
+ALTER TABLE transaction DROP FOREIGN KEY FK_2, DROP FOREIGN KEY FK_3;
+
+RENAME TABLE transaction TO transaction_per_wallet_old, transaction_canonical TO transaction;
+
+CREATE INDEX idx_hash ON transaction (tx_hash);
+
+CREATE INDEX idx_time ON transaction (time_stamp);
+
+ALTER TABLE transaction ADD CONSTRAINT FK_2 FOREIGN KEY FK_2 (network_id)
+    REFERENCES network (network_id);
+
+ALTER TABLE wallet_transaction ADD CONSTRAINT FK_3 FOREIGN KEY FK_3 (wallet_id)
+    REFERENCES wallet (wallet_id)
+    ON DELETE CASCADE;
+
+ALTER TABLE wallet_transaction ADD CONSTRAINT FK_8 FOREIGN KEY FK_8 (tx_id)
+    REFERENCES transaction (tx_id)
+    ON DELETE CASCADE;
+
+-- After verifying counts: DROP TABLE transaction_per_wallet_old;
@@ -0,0 +1,33 @@
+-- Store addresses as BINARY(20) and hashes as BINARY(32) instead of 0x-prefixed CHAR.
+-- Values are lowercased before UNHEX, so lookups no longer depend on the input's case.
+
+-- Wallets that only differed by address case collapse to one row; resolve these first:
+--   SELECT network_id, LOWER(address), COUNT(*) FROM wallet GROUP BY 1, 2 HAVING COUNT(*) > 1;
+
+ALTER TABLE wallet ADD COLUMN address_bin BINARY(20) NULL;
+UPDATE wallet SET address_bin = UNHEX(SUBSTRING(LOWER(address), 3));
+ALTER TABLE wallet
+    DROP INDEX uk_wallet_net,
+    DROP COLUMN address,
+    CHANGE address_bin address BINARY(20) NOT NULL,
+    ADD UNIQUE INDEX uk_wallet_net (network_id,address);
+
+ALTER TABLE transaction
+    ADD COLUMN tx_hash_bin BINARY(32) NULL,
+    ADD COLUMN from_address_bin BINARY(20) NULL,
+    ADD COLUMN to_address_bin BINARY(20) NULL;
+UPDATE transaction SET
+    tx_hash_bin = UNHEX(SUBSTRING(LOWER(tx_hash), 3)),
+    from_address_bin = UNHEX(SUBSTRING(LOWER(from_address), 3)),
+    to_address_bin = IF(to_address IS NULL OR to_address = '', NULL, UNHEX(SUBSTRING(LOWER(to_address), 3)));
+ALTER TABLE transaction
+    DROP INDEX uk_network_hash,
+    DROP INDEX idx_hash,
+    DROP COLUMN tx_hash,
+    DROP COLUMN from_address,
+    DROP COLUMN to_address,
+    CHANGE tx_hash_bin tx_hash BINARY(32) NOT NULL,
+    CHANGE from_address_bin from_address BINARY(20) NOT NULL,
+    CHANGE to_address_bin to_address BINARY(20) NULL,
+    ADD UNIQUE INDEX uk_network_hash (network_id,tx_hash),
+    ADD INDEX idx_hash (tx_hash);
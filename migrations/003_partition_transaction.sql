@@ -0,0 +1,54 @@
+-- Range-partition the hot `transaction` table by month of time_stamp and add the
+-- compressed transaction_archive table used by `python -m app.services.archive`.
+--
+-- MySQL requires every unique key of a partitioned table to contain the partitioning
+-- column and does not allow foreign keys to or from it. time_stamp is fixed for a given
+-- tx_hash, so (network_id, tx_hash, time_stamp) still identifies one transaction.
+-- Adjust the first boundary to just after your oldest data; the archive job keeps
+-- adding monthly partitions ahead of time by splitting pmax.
+
+ALTER TABLE transaction DROP FOREIGN KEY FK_2;
+ALTER TABLE wallet_transaction DROP FOREIGN KEY FK_8;
+
+ALTER TABLE transaction
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (tx_id, time_stamp),
+    DROP INDEX uk_network_hash,
+    ADD UNIQUE INDEX uk_network_hash (network_id,tx_hash,time_stamp);
+
+ALTER TABLE transaction
+    PARTITION BY RANGE COLUMNS (time_stamp) (
+        PARTITION p_old VALUES LESS THAN ('2025-01-01'),
+        PARTITION p202501 VALUES LESS THAN ('2025-02-01'),
+        PARTITION p202502 VALUES LESS THAN ('2025-03-01'),
+        PARTITION p202503 VALUES LESS THAN ('2025-04-01'),
+        PARTITION p202504 VALUES LESS THAN ('2025-05-01'),
+        PARTITION p202505 VALUES LESS THAN ('2025-06-01'),
+        PARTITION p202506 VALUES LESS THAN ('2025-07-01'),
+        PARTITION p202507 VALUES LESS THAN ('2025-08-01'),
+        PARTITION p202508 VALUES LESS THAN ('2025-09-01'),
+        PARTITION p202509 VALUES LESS THAN ('2025-10-01'),
+        PARTITION p202510 VALUES LESS THAN ('2025-11-01'),
+        PARTITION p202511 VALUES LESS THAN ('2025-12-01'),
+        PARTITION p202512 VALUES LESS THAN ('2026-01-01'),
+        PARTITION pmax VALUES LESS THAN (MAXVALUE)
+    );
+
+CREATE TABLE transaction_archive (
+    tx_id int  NOT NULL,
+    network_id int  NOT NULL,
+    tx_hash binary(32)  NOT NULL,
+    block_number bigint  NOT NULL,
+    time_stamp datetime  NOT NULL,
+    from_address binary(20)  NOT NULL,
+    to_address binary(20)  NULL,
+    value_eth decimal(38,18)  NULL DEFAULT 0,
+    gas_used bigint  NULL DEFAULT 0,
+    tx_fee_eth decimal(38,18)  NULL DEFAULT 0,
+    status varchar(20)  NULL DEFAULT 'success',
+    CONSTRAINT transaction_archive_pk PRIMARY KEY (tx_id)
+) ENGINE InnoDB ROW_FORMAT=COMPRESSED;
+
+CREATE INDEX idx_archive_hash ON transaction_archive (tx_hash);
+
+CREATE INDEX idx_archive_time ON transaction_archive (time_stamp);
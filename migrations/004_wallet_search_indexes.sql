@@ -0,0 +1,8 @@
+-- Indexes behind GET /wallet/search: a plain index for address-prefix range scans
+-- (uk_wallet_net leads with network_id) and FULLTEXT indexes for label / owner tokens.
+
+CREATE INDEX idx_wallet_address ON wallet (address);
+
+CREATE FULLTEXT INDEX ft_wallet_label ON wallet (label);
+
+CREATE FULLTEXT INDEX ft_user_nama ON user (nama);
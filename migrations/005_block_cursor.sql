@@ -0,0 +1,12 @@
+-- Per-network position of the block-scanning ingestion engine (app/services/block_scanner.py).
+
+CREATE TABLE block_cursor (
+    network_id int  NOT NULL,
+    last_block bigint  NOT NULL,
+    updated_at datetime  NULL DEFAULT current_timestamp ON UPDATE current_timestamp,
+    CONSTRAINT block_cursor_pk PRIMARY KEY (network_id)
+) ENGINE InnoDB;
+
+ALTER TABLE block_cursor ADD CONSTRAINT FK_9 FOREIGN KEY FK_9 (network_id)
+    REFERENCES network (network_id)
+    ON DELETE CASCADE;
@@ -0,0 +1,24 @@
+-- Amounts move from DECIMAL(38,18) ETH to exact integer wei in DECIMAL(65,0), the widest DECIMAL
+-- MySQL accepts (about 1e65 wei; native ETH amounts are many orders of magnitude smaller).
+-- Existing rows are converted exactly; tx_fee_eth was never populated (always 0), so re-running
+-- ingestion for a wallet is what fills tx_fee_wei (gasPrice x gasUsed) for old rows.
+
+ALTER TABLE transaction
+    ADD COLUMN value_wei decimal(65,0)  NULL DEFAULT 0 AFTER to_address,
+    ADD COLUMN tx_fee_wei decimal(65,0)  NULL DEFAULT 0 AFTER gas_used;
+
+UPDATE transaction
+SET value_wei = value_eth * 1000000000000000000,
+    tx_fee_wei = tx_fee_eth * 1000000000000000000;
+
+ALTER TABLE transaction DROP COLUMN value_eth, DROP COLUMN tx_fee_eth;
+
+ALTER TABLE transaction_archive
+    ADD COLUMN value_wei decimal(65,0)  NULL DEFAULT 0 AFTER to_address,
+    ADD COLUMN tx_fee_wei decimal(65,0)  NULL DEFAULT 0 AFTER gas_used;
+
+UPDATE transaction_archive
+SET value_wei = value_eth * 1000000000000000000,
+    tx_fee_wei = tx_fee_eth * 1000000000000000000;
+
+ALTER TABLE transaction_archive DROP COLUMN value_eth, DROP COLUMN tx_fee_eth;
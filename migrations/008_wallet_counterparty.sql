@@ -0,0 +1,40 @@
+-- Per-(wallet, counterparty) aggregates kept current by ingest (app/services/ingest.py).
+-- The backfill below builds them once from existing links; self-transfers have no counterparty.
+
+CREATE TABLE wallet_counterparty (
+    wallet_id int  NOT NULL,
+    counterparty binary(20)  NOT NULL,
+    tx_count int  NOT NULL DEFAULT 0,
+    volume_in_wei decimal(65,0)  NULL DEFAULT 0,
+    volume_out_wei decimal(65,0)  NULL DEFAULT 0,
+    first_seen datetime  NULL,
+    last_seen datetime  NULL,
+    CONSTRAINT wallet_counterparty_pk PRIMARY KEY (wallet_id,counterparty)
+) ENGINE InnoDB;
+
+CREATE INDEX idx_counterparty_top ON wallet_counterparty (wallet_id,tx_count);
+
+CREATE INDEX idx_counterparty_address ON wallet_counterparty (counterparty);
+
+ALTER TABLE wallet_counterparty ADD CONSTRAINT FK_10 FOREIGN KEY FK_10 (wallet_id)
+    REFERENCES wallet (wallet_id)
+    ON DELETE CASCADE;
+
+INSERT INTO wallet_counterparty
+    (wallet_id, counterparty, tx_count, volume_in_wei, volume_out_wei, first_seen, last_seen)
+SELECT wt.wallet_id,
+       CASE WHEN wt.direction = 'in' THEN t.from_address ELSE t.to_address END AS counterparty,
+       COUNT(*),
+       SUM(CASE WHEN wt.direction = 'in' THEN t.value_wei ELSE 0 END),
+       SUM(CASE WHEN wt.direction = 'out' THEN t.value_wei ELSE 0 END),
+       MIN(wt.time_stamp),
+       MAX(wt.time_stamp)
+FROM wallet_transaction wt
+JOIN (
+    SELECT tx_id, from_address, to_address, value_wei FROM transaction
+    UNION ALL
+    SELECT tx_id, from_address, to_address, value_wei FROM transaction_archive
+) t ON t.tx_id = wt.tx_id
+WHERE wt.direction IN ('in', 'out')
+  AND (CASE WHEN wt.direction = 'in' THEN t.from_address ELSE t.to_address END) IS NOT NULL
+GROUP BY wt.wallet_id, counterparty;
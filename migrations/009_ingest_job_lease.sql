@@ -0,0 +1,8 @@
+-- Ingest jobs are claimed by one worker process at a time (app/services/ingest_jobs.py).
+-- A job stays `running` under its owner until lease_until; an expired lease means the owner
+-- died and the job may be claimed again. Rows already `running` have no lease and are
+-- treated as expired.
+
+ALTER TABLE ingest_job
+    ADD COLUMN owner varchar(100)  NULL AFTER error,
+    ADD COLUMN lease_until datetime  NULL AFTER owner;
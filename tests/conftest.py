@@ -7,3 +7,112 @@ os.environ.setdefault("ETHERSCAN_API_KEY", "test")
 os.environ.setdefault("RATE_LIMIT", "5")
 os.environ.setdefault("LOG_LEVEL", "INFO")
 
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    from app.database import Base
+    import app.models.sql_models  # noqa: F401  (registers tables on Base)
+    from app.services.archive import reset_watermark
+
+    reset_watermark()
+
+    # File-backed so the request thread and ingest workers get separate connections
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db_client(session_factory, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.config import settings
+    from app.database import get_db, get_read_db
+    from app.main import app
+    from app.rate_limit import limiter
+    from app.services.auto_import import auto_importer
+    from app.services.ingest_jobs import ingest_queue
+    from app.warmup import warmup
+
+    def _get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = _get_db
+    app.dependency_overrides[get_read_db] = _get_db
+    monkeypatch.setattr(ingest_queue, "session_factory", session_factory)
+    monkeypatch.setattr(auto_importer, "session_factory", session_factory)
+    monkeypatch.setattr(warmup, "session_factory", session_factory)
+    monkeypatch.setattr(settings, "WARMUP_HTTP", False)
+    limiter.reset()
+    with TestClient(app) as client:
+        yield client
+    app.dependency_overrides.clear()
+
+
+# In-process JSON-RPC node serving a fixed set of blocks; records every batch it receives
+class FakeNode:
+    def __init__(self):
+        self.blocks = {}
+        self.receipts = {}
+        self.batches = []
+
+    def add_block(self, number, txs, timestamp=1_700_000_000):
+        self.blocks[number] = {
+            "number": hex(number),
+            "timestamp": hex(timestamp + number),
+            "transactions": [{**tx, "blockNumber": hex(number)} for tx in txs],
+        }
+        for tx in txs:
+            self.receipts[tx["hash"]] = {
+                "transactionHash": tx["hash"],
+                "status": tx.get("receipt_status", "0x1"),
+                "gasUsed": hex(21000),
+                "effectiveGasPrice": tx.get("gasPrice", hex(10**9)),
+            }
+
+    def _answer(self, call):
+        method, params = call["method"], call.get("params", [])
+        if method == "eth_blockNumber":
+            result = hex(max(self.blocks, default=0))
+        elif method == "eth_getBlockByNumber":
+            result = self.blocks.get(int(params[0], 16))
+        elif method == "eth_getTransactionReceipt":
+            result = self.receipts.get(params[0])
+        else:
+            return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32601, "message": "method not found"}}
+        return {"jsonrpc": "2.0", "id": call["id"], "result": result}
+
+    async def handle(self, request):
+        from aiohttp import web
+
+        body = await request.json()
+        calls = body if isinstance(body, list) else [body]
+        self.batches.append([c["method"] for c in calls])
+        answers = [self._answer(c) for c in calls]
+        return web.json_response(answers if isinstance(body, list) else answers[0])
+
+
+@pytest_asyncio.fixture
+async def fake_node():
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+
+    node = FakeNode()
+    web_app = web.Application()
+    web_app.router.add_post("/", node.handle)
+    server = TestServer(web_app)
+    await server.start_server()
+    node.url = str(server.make_url("/"))
+    yield node
+    await server.close()
@@ -0,0 +1,63 @@
+from datetime import date, datetime, timezone
+
+from app.models.sql_models import Network, Transaction, TransactionArchive, User, Wallet
+from app.services.archive import archive_before, load_transactions, partition_name
+from app.services.ingest import ingest_transactions
+from app.services.processor import to_transaction_items
+
+
+ADDR = "0x1111111111111111111111111111111111111111"
+DAY = 86400
+
+
+def _raw(n: int):
+    return {
+        "hash": f"0x{n:064x}",
+        "blockNumber": str(100 + n),
+        "timeStamp": str(1700000000 + n * DAY),
+        "from": "0x2222222222222222222222222222222222222222",
+        "to": ADDR,
+        "value": "1",
+        "gasUsed": "21000",
+        "isError": "0",
+    }
+
+
+def _seed(db, raw):
+    net = Network(name="sepolia", chain_id=11155111)
+    user = User(nama="Tester")
+    db.add_all([net, user])
+    db.commit()
+    wallet = Wallet(user_id=user.user_id, network_id=net.network_id, address=ADDR)
+    db.add(wallet)
+    db.commit()
+    ingest_transactions(db, wallet, net.network_id, to_transaction_items(raw, ADDR))
+    return wallet, net
+
+
+def test_partition_names():
+    assert partition_name(date(2025, 2, 1)) == "p202501"
+    assert partition_name(date(2026, 1, 1)) == "p202512"
+
+
+def test_archive_moves_cold_rows_and_reads_route_to_archive(session_factory, db_client):
+    db = session_factory()
+    wallet, net = _seed(db, [_raw(n) for n in range(10)])
+    cutoff = datetime.fromtimestamp(1700000000 + 5 * DAY, tz=timezone.utc).replace(tzinfo=None)
+    assert archive_before(db, cutoff, batch_size=2) == 5
+    assert db.query(Transaction).count() == 5
+    assert db.query(TransactionArchive).count() == 5
+
+    # Recent-only lookups never need the archive
+    hot_ids = [t.tx_id for t in db.query(Transaction)]
+    assert len(load_transactions(db, hot_ids, oldest=cutoff)) == 5
+
+    body = db_client.get(f"/wallet/{ADDR}/transactions", params={"pageSize": 100}).json()
+    assert body["total"] == 10
+    assert len(body["items"]) == 10
+    assert body["items"][-1]["block_number"] == 100
+
+    # Re-ingesting archived history does not duplicate canonical rows
+    assert ingest_transactions(db, wallet, net.network_id, to_transaction_items([_raw(1)], ADDR)) == 0
+    assert db.query(Transaction).count() == 5
+    db.close()
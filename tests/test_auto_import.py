@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.models.sql_models import Network, Wallet, WalletTransaction
+from app.services.auto_import import AdmissionRejected, AutoImporter, auto_importer
+from app.services.etherscan_client import EtherscanClient
+
+
+ADDR = "0x3333333333333333333333333333333333333333"
+
+
+def _raw(n):
+    return {
+        "hash": f"0x{n:064x}",
+        "blockNumber": str(100 + n),
+        "timeStamp": str(1700000000 + n),
+        "from": "0x" + "4" * 40,
+        "to": ADDR,
+        "value": str(10**18),
+        "gasUsed": "21000",
+        "isError": "0",
+    }
+
+
+@pytest.mark.asyncio
+async def test_admission_bounds_in_flight_and_queue(monkeypatch):
+    importer = AutoImporter(max_in_flight=1, max_queue=1)
+    release = asyncio.Event()
+    started = []
+
+    async def _slow(address, network_id):
+        started.append(address)
+        await release.wait()
+        return len(started)
+
+    monkeypatch.setattr(importer, "import_wallet", _slow)
+    first = importer.submit("0x" + "1" * 40, 1)
+    second = importer.submit("0x" + "2" * 40, 1)
+    assert importer.submit("0x" + "1" * 40, 1) is first
+    with pytest.raises(AdmissionRejected):
+        importer.submit("0x" + "9" * 40, 1)
+
+    await asyncio.sleep(0)
+    metrics = importer.metrics()
+    assert (metrics["in_flight"], metrics["waiting"], metrics["rejected"], metrics["joined"]) == (1, 1, 1, 1)
+    assert len(started) == 1
+
+    release.set()
+    await asyncio.gather(first, second)
+    assert importer.metrics()["completed"] == 2
+    # Slots free up again once imports finish
+    importer.submit("0x" + "9" * 40, 1)
+
+
+def _seed_network(session_factory):
+    db = session_factory()
+    db.add(Network(name="sepolia", chain_id=11155111))
+    db.commit()
+    db.close()
+
+
+def test_unknown_wallet_is_imported(db_client, session_factory, monkeypatch):
+    _seed_network(session_factory)
+
+    async def _txlist(self, address, **kwargs):
+        return {"status": "1", "message": "OK", "result": [_raw(1), _raw(2)]}
+
+    monkeypatch.setattr(EtherscanClient, "get_txlist", _txlist)
+    r = db_client.get(f"/wallet/{ADDR}")
+    assert r.status_code == 200
+    assert r.json()["transactions"]["total"] == 2
+    db = session_factory()
+    assert db.query(Wallet).count() == 1
+    assert db.query(WalletTransaction).count() == 2
+    db.close()
+
+
+def test_slow_import_returns_202_then_503_when_full(db_client, session_factory, monkeypatch):
+    _seed_network(session_factory)
+
+    async def _slow(self, address, **kwargs):
+        await asyncio.sleep(0.5)
+        return {"status": "0", "message": "No transactions found", "result": []}
+
+    monkeypatch.setattr(EtherscanClient, "get_txlist", _slow)
+    monkeypatch.setattr(settings, "AUTO_IMPORT_WAIT", 0.01)
+    monkeypatch.setattr(auto_importer, "max_in_flight", 1)
+    monkeypatch.setattr(auto_importer, "max_queue", 0)
+
+    r = db_client.get(f"/wallet/{ADDR}")
+    assert r.status_code == 202
+    assert r.json()["status"] == "importing"
+    assert "Retry-After" in r.headers
+
+    r = db_client.get("/wallet/0x" + "5" * 40)
+    assert r.status_code == 503
+    assert "Retry-After" in r.headers
+    assert db_client.get("/health").json()["auto_import"]["rejected"] >= 1
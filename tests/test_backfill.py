@@ -0,0 +1,68 @@
+import pytest
+
+from app.models.sql_models import Wallet, WalletTransaction
+from app.services.backfill import Checkpoint, Progress, read_rows, run_backfill
+
+
+def _addr(n):
+    return "0x" + f"{n:040x}"
+
+
+def _raw(n, to):
+    return {
+        "hash": f"0x{n:064x}",
+        "blockNumber": str(100 + n),
+        "timeStamp": str(1700000000 + n),
+        "from": _addr(999),
+        "to": to,
+        "value": "1",
+        "gasUsed": "21000",
+        "gasPrice": "1",
+        "isError": "0",
+    }
+
+
+def test_read_rows_csv_and_jsonl(tmp_path):
+    csv_path = tmp_path / "w.csv"
+    csv_path.write_text(f"address,network,owner,label\n{_addr(1)},sepolia,Alice,main\n")
+    jsonl_path = tmp_path / "w.jsonl"
+    jsonl_path.write_text(f'{{"address": "{_addr(2)}", "network": "ethereum-mainnet", "owner": "Bob"}}\n\n')
+    (row,) = read_rows(str(csv_path))
+    assert (row.owner, row.label) == ("Alice", "main")
+    (row,) = read_rows(str(jsonl_path))
+    assert row.key == f"1:{_addr(2)}"
+
+
+@pytest.mark.asyncio
+async def test_interrupted_run_resumes(tmp_path, session_factory):
+    csv_path = tmp_path / "w.csv"
+    csv_path.write_text("address,network,owner,label\n" + "".join(f"{_addr(n)},sepolia,Owner{n % 2},w{n}\n" for n in range(1, 7)))
+    rows = read_rows(str(csv_path))
+    calls = []
+    broken = {_addr(3), _addr(5)}
+
+    async def _fetch(network, address):
+        calls.append(address)
+        if address in broken:
+            raise ConnectionError("upstream down")
+        n = int(address, 16)
+        return {"status": "1", "message": "OK", "result": [_raw(n * 10, address), _raw(n * 10 + 1, address)]}
+
+    quiet = Progress(len(rows), out=lambda msg: None)
+    checkpoint = Checkpoint(str(tmp_path / "w.checkpoint"))
+    progress = await run_backfill(rows, session_factory, checkpoint, concurrency=3, rate=0, fetch=_fetch, progress=quiet)
+    checkpoint.close()
+    assert (progress.done, progress.failed, progress.tx_added) == (4, 2, 8)
+
+    broken.clear()
+    calls.clear()
+    checkpoint = Checkpoint(str(tmp_path / "w.checkpoint"))
+    progress = await run_backfill(rows, session_factory, checkpoint, concurrency=3, rate=0, fetch=_fetch)
+    checkpoint.close()
+    assert sorted(calls) == sorted([_addr(3), _addr(5)])
+    assert progress.done == 2
+
+    db = session_factory()
+    assert db.query(Wallet).count() == 6
+    assert db.query(WalletTransaction).count() == 12
+    db.close()
@@ -0,0 +1,154 @@
+import asyncio
+import time
+
+import pytest
+
+from app.models.sql_models import BlockCursor, Network, Transaction, User, Wallet, WalletTransaction
+from app.services.block_scanner import AddressIndex, BlockScanner, BloomFilter
+
+
+A = "0x" + "a" * 40
+B = "0x" + "b" * 40
+STRANGER = "0x" + "c" * 40
+
+
+def _tx(n, frm, to):
+    return {"hash": "0x" + f"{n:064x}", "from": frm, "to": to, "value": hex(10**17), "gas": hex(21000), "gasPrice": hex(10**9)}
+
+
+def _seed(session_factory, url):
+    db = session_factory()
+    net = Network(name="devnet", chain_id=31337, api_base_url=url)
+    user = User(nama="Scanner Owner")
+    db.add_all([net, user])
+    db.flush()
+    wa = Wallet(user_id=user.user_id, network_id=net.network_id, address=A, label="a")
+    wb = Wallet(user_id=user.user_id, network_id=net.network_id, address=B, label="b")
+    db.add_all([wa, wb])
+    db.commit()
+    ids = net.network_id, wa.wallet_id, wb.wallet_id
+    db.close()
+    return ids
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=100)
+    keys = [f"0x{i:040x}" for i in range(100)]
+    for k in keys:
+        bloom.add(k)
+    assert all(k in bloom for k in keys)
+    misses = sum(f"0x{i:040x}" in bloom for i in range(1000, 3000))
+    assert misses < 20
+
+
+@pytest.mark.asyncio
+async def test_scanner_matches_blocks_against_all_wallets(session_factory, fake_node):
+    fake_node.add_block(10, [])
+    network_id, wa, wb = _seed(session_factory, fake_node.url)
+    index = AddressIndex()
+    scanner = BlockScanner(index, session_factory=session_factory, max_blocks=100)
+    assert scanner.refresh_index() == 2
+
+    # First pass only pins the cursor at the tip
+    assert await scanner.scan_once() == 0
+    fake_node.add_block(11, [_tx(1, A, B), _tx(2, STRANGER, STRANGER)])
+    fake_node.add_block(12, [_tx(3, STRANGER, A)])
+    fake_node.batches.clear()
+
+    assert await scanner.scan_once() == 3
+
+    db = session_factory()
+    assert db.query(Transaction).count() == 2
+    links = {(l.wallet_id, l.direction.value) for l in db.query(WalletTransaction)}
+    assert links == {(wa, "out"), (wb, "in"), (wa, "in")}
+    assert db.get(BlockCursor, network_id).last_block == 12
+    db.close()
+    # Blocks are read once per network regardless of wallet count, receipts only for matches
+    assert fake_node.batches[1] == ["eth_getBlockByNumber"] * 2
+    assert sorted(fake_node.batches[2]) == ["eth_getTransactionReceipt"] * 2
+
+    assert await scanner.scan_once() == 0
+
+
+@pytest.mark.asyncio
+async def test_cursor_stops_before_a_missing_block(session_factory, fake_node):
+    fake_node.add_block(10, [])
+    network_id, wa, _ = _seed(session_factory, fake_node.url)
+    scanner = BlockScanner(AddressIndex(), session_factory=session_factory, max_blocks=100)
+    scanner.refresh_index()
+    await scanner.scan_once()
+
+    # The node reports 13 as its tip but does not serve block 12 yet
+    fake_node.add_block(11, [_tx(1, STRANGER, A)])
+    fake_node.add_block(13, [_tx(3, STRANGER, A)])
+    assert await scanner.scan_once() == 1
+    db = session_factory()
+    assert db.get(BlockCursor, network_id).last_block == 11
+    db.close()
+
+    fake_node.add_block(12, [_tx(2, STRANGER, A)])
+    assert await scanner.scan_once() == 2
+    db = session_factory()
+    assert db.get(BlockCursor, network_id).last_block == 13
+    assert db.query(WalletTransaction).filter(WalletTransaction.wallet_id == wa).count() == 3
+    db.close()
+
+    # Nothing new at all: the cursor stays put
+    fake_node.blocks[14] = None
+    assert await scanner.scan_once() == 0
+    db = session_factory()
+    assert db.get(BlockCursor, network_id).last_block == 13
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_registration_updates_index(session_factory, fake_node):
+    fake_node.add_block(5, [])
+    network_id, _, _ = _seed(session_factory, fake_node.url)
+    index = AddressIndex()
+    scanner = BlockScanner(index, session_factory=session_factory)
+    scanner.refresh_index()
+    await scanner.scan_once()
+
+    db = session_factory()
+    late = Wallet(user_id=1, network_id=network_id, address=STRANGER, label="late")
+    db.add(late)
+    db.commit()
+    index.add(network_id, late.wallet_id, late.address)
+    db.close()
+
+    fake_node.add_block(6, [_tx(9, B, STRANGER)])
+    assert await scanner.scan_once() == 2
+
+
+@pytest.mark.asyncio
+async def test_wallets_registered_elsewhere_are_picked_up(session_factory, fake_node):
+    fake_node.add_block(20, [])
+    network_id, _, _ = _seed(session_factory, fake_node.url)
+    # The scanner's own index never hears about the new wallet through add()
+    scanner = BlockScanner(AddressIndex(), session_factory=session_factory, interval=0.02)
+    scanner.start()
+    try:
+        deadline = time.monotonic() + 5
+        while scanner.index.version is None and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+
+        other = session_factory()
+        late = Wallet(user_id=1, network_id=network_id, address=STRANGER, label="from another worker")
+        other.add(late)
+        other.commit()
+        late_id = late.wallet_id
+        other.close()
+        fake_node.add_block(21, [_tx(7, A, STRANGER)])
+
+        db = session_factory()
+        while time.monotonic() < deadline:
+            if db.query(WalletTransaction).filter(WalletTransaction.wallet_id == late_id).count():
+                break
+            db.rollback()
+            await asyncio.sleep(0.02)
+        assert db.query(WalletTransaction).filter(WalletTransaction.wallet_id == late_id).count() == 1
+        db.close()
+    finally:
+        await scanner.stop()
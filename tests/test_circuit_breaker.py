@@ -0,0 +1,155 @@
+import asyncio
+import re
+
+import pytest
+from aioresponses import aioresponses
+
+from app.config import settings
+from app.services import etherscan_client
+from app.services.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    backoff_delay,
+    parse_retry_after,
+    reset_breakers,
+)
+from app.services.etherscan_client import EtherscanClient
+from app.services.key_pool import reset_key_pools
+
+
+ADDR = "0x1111111111111111111111111111111111111111"
+URL = re.compile(r"^https://api\.etherscan\.io/v2/api.*$")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def _fresh_state(monkeypatch):
+    reset_breakers()
+    reset_key_pools()
+    etherscan_client._stale_cache.clear()
+    monkeypatch.setattr(settings, "ETHERSCAN_BACKOFF_BASE", 0.0)
+    monkeypatch.setattr(settings, "ETHERSCAN_KEY_COOLDOWN", 0.0)
+    monkeypatch.setattr(settings, "ETHERSCAN_BREAKER_THRESHOLD", 3)
+    yield
+    reset_breakers()
+    etherscan_client._stale_cache.clear()
+
+
+def test_breaker_opens_and_half_opens():
+    clock = FakeClock()
+    br = CircuitBreaker(failure_threshold=2, recovery_timeout=10, clock=clock)
+    br.record_failure()
+    assert br.state == CLOSED
+    br.record_failure()
+    assert br.state == OPEN
+    assert not br.allow_request()
+
+    clock.now = 10
+    assert br.state == HALF_OPEN
+    assert br.allow_request()
+    # Only a single probe is admitted while half-open
+    assert not br.allow_request()
+    br.record_success()
+    assert br.state == CLOSED
+
+
+def test_failed_probe_reopens():
+    clock = FakeClock()
+    br = CircuitBreaker(failure_threshold=1, recovery_timeout=5, clock=clock)
+    br.record_failure(retry_after=20)
+    clock.now = 6
+    assert br.state == OPEN
+    clock.now = 20
+    assert br.allow_request()
+    br.record_failure()
+    assert br.state == OPEN
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_does_not_wedge_half_open():
+    clock = FakeClock()
+    br = CircuitBreaker(failure_threshold=1, recovery_timeout=5, clock=clock)
+    br.record_failure()
+    clock.now = 5
+
+    async def _probe():
+        assert br.allow_request()
+        try:
+            await asyncio.sleep(10)
+        finally:
+            br.release_probe()
+
+    task = asyncio.create_task(_probe())
+    await asyncio.sleep(0)
+    assert not br.allow_request()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert br.state == HALF_OPEN
+    assert br.allow_request()
+
+
+def test_abandoned_probe_times_out():
+    clock = FakeClock()
+    br = CircuitBreaker(failure_threshold=1, recovery_timeout=5, clock=clock)
+    br.record_failure()
+    clock.now = 5
+    assert br.allow_request()
+    clock.now = 9
+    assert not br.allow_request()
+    # Nobody reported back within another recovery_timeout
+    clock.now = 10
+    assert br.allow_request()
+
+
+def test_backoff_respects_retry_after():
+    assert backoff_delay(5, 0.2, 1.0) <= 1.0
+    assert backoff_delay(0, 0.2, 1.0, retry_after=3) == 3
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("garbage") is None
+
+
+@pytest.mark.asyncio
+async def test_client_opens_circuit_and_fails_fast():
+    client = EtherscanClient("k")
+    with aioresponses() as m:
+        m.get(URL, status=503, repeat=True)
+        resp = await client.get_txlist(ADDR)
+        assert resp["message"] == "SERVER_ERROR"
+        with pytest.raises(CircuitOpenError):
+            await client.get_txlist(ADDR)
+
+
+@pytest.mark.asyncio
+async def test_client_rate_limit_payload_counts_as_failure():
+    client = EtherscanClient("k")
+    with aioresponses() as m:
+        m.get(URL, payload={"status": "0", "message": "NOTOK", "result": "Max rate limit reached"}, repeat=True)
+        resp = await client.get_txlist(ADDR)
+        assert resp["result"] == "Max rate limit reached"
+        with pytest.raises(CircuitOpenError):
+            await client.get_txlist(ADDR)
+
+
+@pytest.mark.asyncio
+async def test_client_serves_cache_while_open():
+    client = EtherscanClient("k")
+    good = {"status": "1", "message": "OK", "result": [{"hash": "0xabc"}]}
+    with aioresponses() as m:
+        m.get(URL, payload=good)
+        m.get(URL, status=500, repeat=True)
+        assert await client.get_txlist(ADDR) == good
+        await client.get_txlist(ADDR)
+        cached = await client.get_txlist(ADDR)
+        assert cached["cached"] is True
+        assert cached["result"] == good["result"]
@@ -0,0 +1,142 @@
+import threading
+import time
+
+from app.models.sql_models import Network, User, Wallet, WalletCounterparty
+from app.services.ingest import (
+    _add_counterparty,
+    _apply_counterparties,
+    direction_for,
+    ingest_matches,
+    ingest_transactions,
+)
+from app.services.processor import to_transaction_items
+
+
+A = "0x1111111111111111111111111111111111111111"
+B = "0x2222222222222222222222222222222222222222"
+C = "0x3333333333333333333333333333333333333333"
+D = "0x4444444444444444444444444444444444444444"
+
+
+def _raw(n: int, frm: str, to: str, value: int = 10 ** 18):
+    return {
+        "hash": f"0x{n:064x}",
+        "blockNumber": str(100 + n),
+        "timeStamp": str(1700000000 + n),
+        "from": frm,
+        "to": to,
+        "value": str(value),
+        "gasPrice": "1000000000",
+        "gasUsed": "21000",
+        "isError": "0",
+    }
+
+
+def _seed(session_factory):
+    db = session_factory()
+    net = Network(name="sepolia", chain_id=11155111)
+    user = User(nama="Tester")
+    db.add_all([net, user])
+    db.commit()
+    wallets = {}
+    for addr, label in ((A, "a"), (B, "b"), (C, "c")):
+        wallets[addr] = Wallet(user_id=user.user_id, network_id=net.network_id, address=addr, label=label)
+    db.add_all(wallets.values())
+    db.commit()
+    return db, net, wallets
+
+
+def test_ingest_updates_aggregates_incrementally(session_factory):
+    db, net, wallets = _seed(session_factory)
+    a = wallets[A]
+    big = 10 ** 30 + 7
+    ingest_transactions(db, a, net.network_id, to_transaction_items([_raw(1, B, A), _raw(2, A, B, big)], A))
+    # Replayed history must not be counted twice
+    ingest_transactions(db, a, net.network_id, to_transaction_items([_raw(2, A, B, big), _raw(3, B, A)], A))
+
+    row = db.get(WalletCounterparty, (a.wallet_id, B))
+    assert row.tx_count == 3
+    assert int(row.volume_in_wei) == 2 * 10 ** 18
+    assert int(row.volume_out_wei) == big
+    assert row.first_seen < row.last_seen
+
+    # Block-scan ingest feeds the same aggregates, for every matched wallet
+    ingest_matches(
+        db,
+        net.network_id,
+        [(a.wallet_id, A, item) for item in to_transaction_items([_raw(4, D, A)], A)]
+        + [(wallets[B].wallet_id, B, item) for item in to_transaction_items([_raw(5, B, C)], B)],
+    )
+    assert db.get(WalletCounterparty, (a.wallet_id, D)).tx_count == 1
+    assert db.get(WalletCounterparty, (wallets[B].wallet_id, C)).tx_count == 1
+    db.close()
+
+
+def _deltas(wallet_id, raw, address):
+    deltas = {}
+    for item in to_transaction_items(raw, address):
+        _add_counterparty(deltas, wallet_id, direction_for(address, item.from_address, item.to_address), item)
+    return deltas
+
+
+def test_concurrent_updates_do_not_lose_counts(session_factory):
+    db, net, wallets = _seed(session_factory)
+    wallet_id = wallets[A].wallet_id
+    ingest_transactions(db, wallets[A], net.network_id, to_transaction_items([_raw(1, B, A)], A))
+    db.close()
+
+    first, second = session_factory(), session_factory()
+    # The first writer has updated the aggregate but not committed yet
+    _apply_counterparties(first, _deltas(wallet_id, [_raw(2, B, A)], A))
+    first.flush()
+
+    def _other_writer():
+        _apply_counterparties(second, _deltas(wallet_id, [_raw(3, B, A)], A))
+        second.commit()
+
+    worker = threading.Thread(target=_other_writer)
+    worker.start()
+    time.sleep(0.3)
+    first.commit()
+    worker.join(10)
+    first.close()
+    second.close()
+
+    db = session_factory()
+    row = db.get(WalletCounterparty, (wallet_id, B))
+    assert row.tx_count == 3
+    assert int(row.volume_in_wei) == 3 * 10 ** 18
+    db.close()
+
+
+def test_counterparties_endpoint_and_graph(db_client, session_factory):
+    db, net, wallets = _seed(session_factory)
+    ingest_transactions(db, wallets[A], net.network_id, to_transaction_items([_raw(1, B, A), _raw(2, B, A), _raw(3, D, A)], A))
+    ingest_transactions(db, wallets[B], net.network_id, to_transaction_items([_raw(4, B, C)], B))
+    ids = {addr: w.wallet_id for addr, w in wallets.items()}
+    db.close()
+
+    body = db_client.get(f"/wallet/{A}/counterparties", params={"limit": 5}).json()
+    assert [(i["address"], i["tx_count"]) for i in body["items"]] == [(B, 2), (D, 1)]
+    assert body["items"][0]["label"] == "b"
+    assert body["items"][0]["volume_in"]["wei"] == str(2 * 10 ** 18)
+    assert body["items"][1]["wallet_id"] is None
+    assert "graph" not in body
+
+    assert len(db_client.get(f"/wallet/{A}/counterparties", params={"limit": 1}).json()["items"]) == 1
+
+    graph = db_client.get(f"/wallet/{A}/counterparties", params={"hops": 2}).json()["graph"]
+    hops = {n["address"]: n["hop"] for n in graph["nodes"]}
+    assert hops == {A: 0, B: 1, C: 2}
+    assert {(e["source"], e["target"]) for e in graph["edges"]} == {
+        (ids[A], ids[B]),
+        (ids[B], ids[C]),
+    }
+
+    one_hop = db_client.get(f"/wallet/{A}/counterparties", params={"hops": 1}).json()["graph"]
+    assert {n["address"] for n in one_hop["nodes"]} == {A, B}
+
+
+def test_counterparties_unknown_wallet(db_client):
+    assert db_client.get(f"/wallet/{D}/counterparties").status_code == 404
+    assert db_client.get("/wallet/0x12/counterparties").status_code == 400
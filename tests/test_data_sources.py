@@ -0,0 +1,85 @@
+import pytest
+
+from app.models.sql_models import Network
+from app.services.data_sources import (
+    EtherscanDataSource,
+    JsonRpcDataSource,
+    source_for_chain,
+    source_for_network,
+)
+
+
+ADDR = "0x" + "a" * 40
+OTHER = "0x" + "b" * 40
+
+
+def _tx(n, frm, to, value=10**18):
+    return {"hash": "0x" + f"{n:064x}", "from": frm, "to": to, "value": hex(value), "gas": hex(21000), "gasPrice": hex(10**9)}
+
+
+@pytest.mark.asyncio
+async def test_jsonrpc_source_batches_and_builds_records(fake_node):
+    for n in range(1, 8):
+        fake_node.add_block(n, [_tx(n, OTHER, OTHER)])
+    fake_node.add_block(8, [_tx(100, OTHER, ADDR, value=2 * 10**18)])
+    fake_node.add_block(9, [_tx(101, ADDR, OTHER), _tx(102, OTHER, OTHER)])
+
+    source = JsonRpcDataSource(fake_node.url, batch_size=4, scan_blocks=100)
+    resp = await source.get_txlist(ADDR)
+
+    assert resp["status"] == "1"
+    hashes = [r["hash"] for r in resp["result"]]
+    assert hashes == ["0x" + f"{101:064x}", "0x" + f"{100:064x}"]
+    incoming = resp["result"][1]
+    assert incoming["value"] == str(2 * 10**18)
+    assert incoming["blockNumber"] == "8"
+    assert incoming["gasUsed"] == "21000"
+    assert incoming["isError"] == "0"
+    # blockNumber call, then blocks 0..9 in batches of 4, then one receipt batch
+    assert fake_node.batches[0] == ["eth_blockNumber"]
+    assert [len(b) for b in fake_node.batches[1:4]] == [4, 4, 2]
+    assert fake_node.batches[-1] == ["eth_getTransactionReceipt"] * 2
+    assert "truncated" not in resp
+
+
+@pytest.mark.asyncio
+async def test_jsonrpc_source_scan_window_and_empty_result(fake_node):
+    fake_node.add_block(1, [_tx(1, ADDR, OTHER)])
+    for n in range(2, 6):
+        fake_node.add_block(n, [])
+
+    source = JsonRpcDataSource(fake_node.url, batch_size=10, scan_blocks=3)
+    resp = await source.get_txlist(ADDR)
+
+    assert resp["status"] == "0"
+    assert resp["result"] == []
+    assert "No transactions found" in resp["message"]
+    # Blocks 0-2 were never scanned, so the empty answer is not the whole history
+    assert (resp["truncated"], resp["scanned_from_block"]) == (True, 3)
+
+    fake_node.add_block(4, [_tx(2, OTHER, ADDR)])
+    resp = await source.get_txlist(ADDR)
+    assert resp["status"] == "1" and resp["truncated"]
+    assert "truncated" not in await source.get_txlist(ADDR, start_block=4)
+
+
+def test_network_row_selects_source(session_factory):
+    db = session_factory()
+    db.add_all(
+        [
+            Network(name="devnet", chain_id=999, api_base_url="http://127.0.0.1:8545"),
+            Network(name="scan", chain_id=998, api_base_url="https://api.etherscan.io/v2/api"),
+            Network(name="plain", chain_id=997),
+        ]
+    )
+    db.commit()
+
+    # Resolved from the row every time, not from whichever network was looked at before
+    rpc = source_for_chain(db, 999)
+    assert isinstance(rpc, JsonRpcDataSource)
+    assert source_for_chain(db, 999) is rpc
+    assert isinstance(source_for_chain(db, 998), EtherscanDataSource)
+    assert isinstance(source_for_chain(db, 997), EtherscanDataSource)
+    assert isinstance(source_for_chain(db, 12345), EtherscanDataSource)
+    assert isinstance(source_for_network(None), EtherscanDataSource)
+    db.close()
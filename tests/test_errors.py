@@ -12,7 +12,7 @@ class DummyError(Exception):
 
 
 def test_network_error(monkeypatch):
-    async def _fail(self, address: str):
+    async def _fail(self, address: str, **kwargs):
         raise DummyError("network")
 
     monkeypatch.setattr(EtherscanClient, "get_txlist", _fail)
@@ -24,7 +24,7 @@ def test_network_error(monkeypatch):
 
 
 def test_rate_limit_response(monkeypatch):
-    async def _rl(self, address: str):
+    async def _rl(self, address: str, **kwargs):
         return {"status": 0, "message": "NOTOK", "result": "Max rate limit reached"}
 
     monkeypatch.setattr(EtherscanClient, "get_txlist", _rl)
@@ -0,0 +1,239 @@
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+
+from app.models.sql_models import IngestJob, Network, Transaction, User, Wallet, WalletTransaction
+from app.services.etherscan_client import EtherscanClient
+from app.services.ingest import _commit_batch, _linked_ids, ingest_transactions
+from app.services.data_sources import iter_txlist
+from app.services.ingest_jobs import IngestQueue, _now, claim_job, enqueue_ingest_job, ingest_queue, job_to_dict
+from app.services.processor import to_transaction_items
+
+
+ADDR = "0x1111111111111111111111111111111111111111"
+
+
+def _raw(n: int, to: str = ADDR):
+    return {
+        "hash": f"0x{n:064x}",
+        "blockNumber": str(100 + n),
+        "timeStamp": str(1700000000 + n),
+        "from": "0x2222222222222222222222222222222222222222",
+        "to": to,
+        "value": str(10 ** 18),
+        "gasUsed": "21000",
+        "isError": "0",
+    }
+
+
+def _fake_txlist(items):
+    # Ingest jobs read the streaming path
+    async def _iter_txlist(self, address: str, chain_id: int = 11155111, start_block: int = 0):
+        for item in items:
+            yield item
+
+    return _iter_txlist
+
+
+def _seed_wallet(db):
+    net = Network(name="sepolia", chain_id=11155111)
+    user = User(nama="Tester")
+    db.add_all([net, user])
+    db.commit()
+    wallet = Wallet(user_id=user.user_id, network_id=net.network_id, address=ADDR)
+    db.add(wallet)
+    db.commit()
+    return wallet, net
+
+
+def test_ingest_transactions_batches_and_skips_existing(session_factory):
+    db = session_factory()
+    wallet, net = _seed_wallet(db)
+    items = to_transaction_items([_raw(n) for n in range(7)], ADDR)
+    batches = []
+    added = ingest_transactions(db, wallet, net.network_id, items, batch_size=3, on_batch=lambda p, a: batches.append(a))
+    assert added == 7
+    assert batches == [3, 6, 7]
+    assert ingest_transactions(db, wallet, net.network_id, items) == 0
+    directions = {link.direction.value for link in db.query(WalletTransaction).all()}
+    assert directions == {"in"}
+
+
+def test_shared_transactions_are_stored_once(session_factory):
+    db = session_factory()
+    receiver, net = _seed_wallet(db)
+    sender = Wallet(user_id=receiver.user_id, network_id=net.network_id, address="0x2222222222222222222222222222222222222222")
+    db.add(sender)
+    db.commit()
+    raw = [_raw(n) for n in range(4)]
+    assert ingest_transactions(db, receiver, net.network_id, to_transaction_items(raw, receiver.address)) == 4
+    assert ingest_transactions(db, sender, net.network_id, to_transaction_items(raw, sender.address)) == 4
+    assert db.query(Transaction).count() == 4
+    assert db.query(WalletTransaction).count() == 8
+    out = db.query(WalletTransaction).filter(WalletTransaction.wallet_id == sender.wallet_id).all()
+    assert {link.direction.value for link in out} == {"out"}
+
+
+def test_concurrent_ingest_of_same_wallet_retries_with_fresh_links(session_factory):
+    db = session_factory()
+    wallet, net = _seed_wallet(db)
+    network_id, wallet_id = net.network_id, wallet.wallet_id
+    items = to_transaction_items([_raw(n) for n in range(3)], ADDR)
+    # Session A has read the wallet's links, then session B ingests the same transactions
+    linked = _linked_ids(db, wallet)
+    other = session_factory()
+    assert ingest_transactions(other, other.get(Wallet, wallet_id), network_id, items) == 3
+    other.close()
+
+    assert _commit_batch(db, wallet, network_id, items, linked, len(items), 0) == 0
+    assert db.query(WalletTransaction).count() == 3
+    assert len(linked) == 3
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_duplicate_jobs_are_merged(session_factory, monkeypatch):
+    monkeypatch.setattr(ingest_queue, "session_factory", session_factory)
+    monkeypatch.setattr(EtherscanClient, "iter_txlist", _fake_txlist([_raw(1), _raw(2)]))
+    db = session_factory()
+    wallet, net = _seed_wallet(db)
+    try:
+        job, created = enqueue_ingest_job(db, wallet, net.network_id)
+        again, created_again = enqueue_ingest_job(db, wallet, net.network_id)
+        assert created and not created_again
+        assert again.job_id == job.job_id
+        await ingest_queue.join()
+        db.expire_all()
+        done = db.get(IngestJob, job.job_id)
+        assert (done.status, done.total, done.added) == ("done", 2, 2)
+    finally:
+        await ingest_queue.stop()
+        db.close()
+
+
+def test_register_returns_job_and_reports_progress(db_client, monkeypatch):
+    monkeypatch.setattr(EtherscanClient, "iter_txlist", _fake_txlist([_raw(n) for n in range(5)]))
+    r = db_client.post(
+        "/wallet/register",
+        json={"address": ADDR, "label": "main", "owner_name": "Tester", "network": "sepolia"},
+    )
+    assert r.status_code == 202
+    job_id = r.json()["job_id"]
+
+    deadline = time.time() + 5
+    while True:
+        job = db_client.get(f"/wallet/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed") or time.time() > deadline:
+            break
+        time.sleep(0.02)
+    assert job["status"] == "done"
+    assert job["added"] == 5
+    assert job["progress"] == 1.0
+    assert (job["total"], job["total_known"]) == (5, True)
+    assert db_client.get("/wallet/jobs/999").status_code == 404
+
+
+def test_streaming_job_reports_unknown_total():
+    running = job_to_dict(IngestJob(job_id=1, wallet_id=1, status="running", total=None, processed=500))
+    assert (running["total"], running["total_known"], running["progress"]) == (None, False, None)
+    assert running["processed"] == 500
+    queued = job_to_dict(IngestJob(job_id=1, wallet_id=1, status="queued", total=0))
+    assert (queued["total"], queued["progress"]) == (None, None)
+
+    known = job_to_dict(IngestJob(job_id=1, wallet_id=1, status="running", total=4, processed=1))
+    assert (known["total"], known["total_known"], known["progress"]) == (4, True, 0.25)
+
+
+class _BufferedSource:
+    name = "buffered"
+
+    async def get_txlist(self, address, chain_id=11155111, start_block=0):
+        return {"status": "1", "message": "OK", "result": [_raw(n) for n in range(3)]}
+
+
+@pytest.mark.asyncio
+async def test_buffered_source_reports_total_before_first_record():
+    totals = []
+    seen = []
+    async for record in iter_txlist(_BufferedSource(), ADDR, on_total=totals.append):
+        seen.append((list(totals), record["hash"]))
+    assert totals == [3]
+    assert all(t == [3] for t, _ in seen) and len(seen) == 3
+
+
+def test_job_is_claimed_by_one_worker_until_its_lease_expires(session_factory):
+    db = session_factory()
+    wallet, net = _seed_wallet(db)
+    job = IngestJob(wallet_id=wallet.wallet_id, network_id=net.network_id, status="queued")
+    db.add(job)
+    db.commit()
+
+    assert claim_job(db, job.job_id, "worker-a", 60)
+    assert not claim_job(db, job.job_id, "worker-b", 60)
+    db.refresh(job)
+    assert (job.status, job.owner) == ("running", "worker-a")
+
+    # worker-a died: its lease runs out and another worker may take over
+    job.lease_until = _now() - timedelta(seconds=1)
+    db.commit()
+    assert claim_job(db, job.job_id, "worker-b", 60)
+    db.refresh(job)
+    assert job.owner == "worker-b"
+
+    job.status = "done"
+    db.commit()
+    assert not claim_job(db, job.job_id, "worker-c", 60)
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_jobs_with_a_live_lease(session_factory, monkeypatch):
+    db = session_factory()
+    wallet, net = _seed_wallet(db)
+    now = _now()
+    jobs = [
+        IngestJob(wallet_id=wallet.wallet_id, network_id=net.network_id, status="queued"),
+        IngestJob(wallet_id=wallet.wallet_id, network_id=net.network_id, status="running", lease_until=now + timedelta(minutes=5)),
+        IngestJob(wallet_id=wallet.wallet_id, network_id=net.network_id, status="running", lease_until=now - timedelta(minutes=5)),
+        IngestJob(wallet_id=wallet.wallet_id, network_id=net.network_id, status="running"),
+        IngestJob(wallet_id=wallet.wallet_id, network_id=net.network_id, status="done"),
+    ]
+    db.add_all(jobs)
+    db.commit()
+    ids = [j.job_id for j in jobs]
+    db.close()
+
+    queue = IngestQueue(session_factory=session_factory)
+    submitted = []
+    monkeypatch.setattr(queue, "submit", submitted.append)
+    assert await queue.resume_pending() == 3
+    assert submitted == [ids[0], ids[2], ids[3]]
+
+
+@pytest.mark.asyncio
+async def test_two_workers_run_a_job_once(session_factory, monkeypatch):
+    calls = []
+
+    async def _iter_txlist(self, address, chain_id=11155111, start_block=0):
+        calls.append(address)
+        for n in range(3):
+            yield _raw(n)
+
+    monkeypatch.setattr(EtherscanClient, "iter_txlist", _iter_txlist)
+    db = session_factory()
+    wallet, net = _seed_wallet(db)
+    job = IngestJob(wallet_id=wallet.wallet_id, network_id=net.network_id, status="queued")
+    db.add(job)
+    db.commit()
+    job_id = job.job_id
+    db.close()
+
+    first, second = IngestQueue(session_factory=session_factory), IngestQueue(session_factory=session_factory)
+    await asyncio.gather(first.run_job(job_id), second.run_job(job_id))
+    assert len(calls) == 1
+    db = session_factory()
+    done = db.get(IngestJob, job_id)
+    assert (done.status, done.added, done.lease_until) == ("done", 3, None)
+    db.close()
@@ -0,0 +1,130 @@
+import json
+import re
+
+import pytest
+from aioresponses import aioresponses
+
+from app.services import etherscan_client
+from app.services.circuit_breaker import reset_breakers
+from app.services.data_sources import EtherscanDataSource, iter_txlist
+from app.services.etherscan_client import EtherscanClient, UpstreamResponseError
+from app.services.json_stream import TxListParser
+from app.services.key_pool import reset_key_pools
+from app.services.processor import stream_transaction_items
+
+
+ADDR = "0x1111111111111111111111111111111111111111"
+URL = re.compile(r"^https://api\.etherscan\.io/v2/api.*$")
+
+
+def _records(n):
+    return [
+        {
+            "hash": f"0x{i:064x}",
+            "blockNumber": str(100 + i),
+            "timeStamp": str(1700000000 + i),
+            "from": ADDR,
+            "to": "0x2222222222222222222222222222222222222222",
+            "value": str(10 ** 18 + i),
+            # Brackets and an escaped quote inside a string must not end the record
+            "input": ']}\\"',
+            "isError": "0",
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_state(monkeypatch):
+    reset_breakers()
+    reset_key_pools()
+    etherscan_client._stale_cache.clear()
+    monkeypatch.setattr(etherscan_client.settings, "ETHERSCAN_BACKOFF_BASE", 0.0)
+    monkeypatch.setattr(etherscan_client.settings, "ETHERSCAN_KEY_COOLDOWN", 0.0)
+    yield
+    reset_breakers()
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 64, 100000])
+def test_parser_yields_records_across_chunk_boundaries(chunk):
+    payload = json.dumps({"status": "1", "message": "OK", "result": _records(20)}, indent=1).encode()
+    parser = TxListParser()
+    out = []
+    for start in range(0, len(payload), chunk):
+        out.extend(parser.feed(payload[start : start + chunk]))
+    out.extend(parser.close())
+    assert out == _records(20)
+    assert parser.fields == {"status": "1", "message": "OK"}
+    assert parser.is_list and parser.count == 20
+
+
+def test_parser_keeps_scalar_result_and_rejects_truncation():
+    parser = TxListParser()
+    assert parser.feed(b'{"status":"0","message":"NOTOK","result":"Max rate limit reached"}') == []
+    parser.close()
+    assert parser.fields["result"] == "Max rate limit reached" and not parser.is_list
+
+    parser = TxListParser()
+    parser.feed(b'{"status":"1","result":[{"hash":"0x1"},')
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_parser_buffers_at_most_one_partial_record():
+    parser = TxListParser()
+    parser.feed(b'{"status":"1","message":"OK","result":[')
+    for record in _records(200):
+        parser.feed(json.dumps(record).encode() + b",")
+        assert len(parser._buf) < 400
+
+
+@pytest.mark.asyncio
+async def test_iter_txlist_streams_into_processor():
+    body = {"status": "1", "message": "OK", "result": _records(5)}
+    with aioresponses() as m:
+        m.get(URL, payload=body)
+        items = [i async for i in stream_transaction_items(EtherscanClient("k").iter_txlist(ADDR))]
+    assert [i.block_number for i in items] == [100, 101, 102, 103, 104]
+    assert items[0].value_wei == 10 ** 18
+
+
+@pytest.mark.asyncio
+async def test_iter_txlist_retries_rate_limit_then_raises():
+    limited = {"status": "0", "message": "NOTOK", "result": "Max rate limit reached"}
+    with aioresponses() as m:
+        m.get(URL, payload=limited, repeat=True)
+        with pytest.raises(UpstreamResponseError):
+            [r async for r in EtherscanClient("k").iter_txlist(ADDR)]
+
+    with aioresponses() as m:
+        m.get(URL, payload={"status": "0", "message": "No transactions found", "result": []})
+        assert [r async for r in iter_txlist(EtherscanDataSource("k"), ADDR)] == []
+
+
+@pytest.mark.asyncio
+async def test_get_txlist_still_returns_whole_payload():
+    body = {"status": "1", "message": "OK", "result": _records(3)}
+    with aioresponses() as m:
+        m.get(URL, payload=body)
+        assert await EtherscanClient("k").get_txlist(ADDR) == body
+
+
+@pytest.mark.asyncio
+async def test_body_cut_off_midway_is_retried_only_when_buffered():
+    body = {"status": "1", "message": "OK", "result": _records(3)}
+    cut = json.dumps(body).encode()[:-40]
+    with aioresponses() as m:
+        m.get(URL, body=cut)
+        m.get(URL, payload=body)
+        # The partial list is dropped and the whole history fetched again
+        assert await EtherscanClient("k").get_txlist(ADDR) == body
+
+    with aioresponses() as m:
+        m.get(URL, body=cut)
+        m.get(URL, payload=body)
+        seen = []
+        with pytest.raises(ValueError):
+            async for record in EtherscanClient("k").iter_txlist(ADDR):
+                seen.append(record)
+        # Streamed records were already handed over, so no retry replays them
+        assert seen == _records(3)[:2]
@@ -0,0 +1,165 @@
+import asyncio
+import re
+import time
+from collections import Counter
+
+import pytest
+from aioresponses import CallbackResult, aioresponses
+
+from app.config import settings
+from app.services import etherscan_client
+from app.services.circuit_breaker import CircuitOpenError, reset_breakers
+from app.services.etherscan_client import EtherscanClient
+from app.services.key_pool import KeyPool, get_key_pool, parse_keys, reset_key_pools
+
+
+ADDR = "0x1111111111111111111111111111111111111111"
+URL = re.compile(r"^https://api\.etherscan\.io/v2/api.*$")
+OK = {"status": "1", "message": "OK", "result": [{"hash": "0xabc"}]}
+LIMITED = {"status": "0", "message": "NOTOK", "result": "Max rate limit reached"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def _fresh_state(monkeypatch):
+    reset_breakers()
+    reset_key_pools()
+    etherscan_client._stale_cache.clear()
+    monkeypatch.setattr(settings, "ETHERSCAN_BACKOFF_BASE", 0.0)
+    yield
+    reset_breakers()
+    reset_key_pools()
+
+
+def _spread(pool, n):
+    used = Counter()
+    for _ in range(n):
+        key, _ = pool.try_acquire(1)
+        used[key.value] += 1
+        pool.release(key, 1, ok=True)
+    return used
+
+
+def test_parse_keys_and_weights():
+    assert parse_keys("aaa, bbb:3,", "ccc") == [("aaa", 1.0), ("bbb", 3.0), ("ccc", 1.0)]
+    assert parse_keys("aaa", "aaa") == [("aaa", 1.0)]
+    assert parse_keys("", "") == [("", 1.0)]
+    with pytest.raises(ValueError):
+        parse_keys("aaa:0")
+
+
+def test_calls_are_spread_by_weight():
+    assert _spread(KeyPool([("a", 1), ("b", 1)], rate=0), 4) == {"a": 2, "b": 2}
+    assert _spread(KeyPool([("a", 3), ("b", 1)], rate=0), 8) == {"a": 6, "b": 2}
+
+    # An in-flight call makes its key the more loaded one
+    pool = KeyPool([("a", 1), ("b", 1)], rate=0)
+    first, _ = pool.try_acquire(1)
+    second, _ = pool.try_acquire(1)
+    assert first.value != second.value
+
+
+def test_rate_budget_and_bench():
+    clock = FakeClock()
+    pool = KeyPool([("a", 1)], rate=2, cooldown=4, clock=clock)
+    for _ in range(2):
+        key, _ = pool.try_acquire(1)
+        pool.release(key, 1, ok=True)
+    assert pool.try_acquire(1) == (None, 0.5)
+
+    clock.now = 1
+    key, _ = pool.try_acquire(1)
+    pool.release(key, 1, ok=False, rate_limited=True)
+    assert pool.try_acquire(1) == (None, 4)
+    stats = pool.stats()[0]
+    assert stats["rate_limited"] == 1 and stats["benched_for"] == 4
+    assert stats["circuits"] == {1: "closed"}
+
+
+@pytest.mark.asyncio
+async def test_acquire_gives_up_past_max_wait():
+    pool = KeyPool([("a", 1)], rate=0, cooldown=60)
+    key = await pool.acquire(1, max_wait=0)
+    pool.release(key, 1, ok=False, rate_limited=True)
+    with pytest.raises(CircuitOpenError):
+        await pool.acquire(1, max_wait=1)
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_key_is_benched_and_call_moves_on():
+    pool = KeyPool([("key-limited", 1), ("key-good", 1)], rate=0, cooldown=60)
+    seen = []
+
+    def _respond(url, **kwargs):
+        key = url.query["apikey"]
+        seen.append(key)
+        return CallbackResult(payload=LIMITED if key == "key-limited" else OK)
+
+    client = EtherscanClient(pool=pool)
+    with aioresponses() as m:
+        m.get(URL, callback=_respond, repeat=True)
+        assert await client.get_txlist(ADDR) == OK
+        assert await client.get_txlist(ADDR) == OK
+        assert await client.get_txlist(ADDR) == OK
+    # The limited key was tried once, then stayed out while benched
+    assert seen[0] == "key-limited" and seen.count("key-limited") == 1
+    limited, good = pool.stats()
+    assert limited["key"] == "key-...ited" and limited["benched_for"] > 0
+    assert good["key"] == "********" and good["successes"] == 3
+
+
+def test_abandoned_probe_is_handed_back(monkeypatch):
+    monkeypatch.setattr(settings, "ETHERSCAN_BREAKER_THRESHOLD", 1)
+    monkeypatch.setattr(settings, "ETHERSCAN_BREAKER_COOLDOWN", 0.2)
+    pool = KeyPool([("a", 1)], rate=0)
+    key, _ = pool.try_acquire(1)
+    pool.release(key, 1, ok=False)
+    time.sleep(0.25)
+    # Half-open now; this acquire takes its only probe
+    probe, _ = pool.try_acquire(1)
+    pool.release(probe, 1, ok=None)
+    again, _ = pool.try_acquire(1)
+    assert again is probe and again.in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_call_releases_key_and_probe(monkeypatch):
+    monkeypatch.setattr(settings, "ETHERSCAN_BREAKER_THRESHOLD", 1)
+    monkeypatch.setattr(settings, "ETHERSCAN_BREAKER_COOLDOWN", 0.2)
+    pool = KeyPool([("a", 1)], rate=0)
+    key, _ = pool.try_acquire(11155111)
+    pool.release(key, 11155111, ok=False)
+    await asyncio.sleep(0.25)
+    started = asyncio.Event()
+
+    async def _hang_once(url, **kwargs):
+        if not started.is_set():
+            started.set()
+            await asyncio.sleep(30)
+        return CallbackResult(payload=OK)
+
+    client = EtherscanClient(pool=pool)
+    with aioresponses() as m:
+        m.get(URL, callback=_hang_once, repeat=True)
+        task = asyncio.create_task(client.get_txlist(ADDR))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert pool.stats()[0]["in_flight"] == 0
+        assert await client.get_txlist(ADDR) == OK
+
+
+def test_default_pool_comes_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, "ETHERSCAN_API_KEYS", "first-key-123:2,second-key-456")
+    monkeypatch.setattr(settings, "ETHERSCAN_API_KEY", "")
+    pool = get_key_pool()
+    assert pool is get_key_pool()
+    assert [(s["key"], s["weight"]) for s in pool.stats()] == [("firs...-123", 2.0), ("seco...-456", 1.0)]
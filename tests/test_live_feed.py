@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from app.models.schemas import TransactionItem
+from app.services.live_feed import WalletFeedHub
+
+
+ADDR = "0x1111111111111111111111111111111111111111"
+
+
+def _tx(n: int) -> TransactionItem:
+    return TransactionItem(
+        tx_hash=f"0x{n:064x}",
+        block_number=n,
+        timestamp="2025-01-01T00:00:00Z",
+        **{"from": ADDR, "to": "0x2222222222222222222222222222222222222222"},
+        value_eth=0.0,
+        status="success",
+        gas_used=21000,
+    )
+
+
+class FakeUpstream:
+    def __init__(self):
+        self.calls = 0
+        self.items = [_tx(1)]
+
+    async def __call__(self, address: str, chain_id: int):
+        self.calls += 1
+        return list(self.items)
+
+
+@pytest.mark.asyncio
+async def test_single_poller_fans_out_to_all_subscribers():
+    upstream = FakeUpstream()
+    hub = WalletFeedHub(fetch=upstream, interval=0.01)
+    q1 = hub.subscribe(ADDR, 1)
+    q2 = hub.subscribe(ADDR.upper().replace("0X", "0x"), 1)
+    assert hub.active_wallets == 1
+    assert hub.subscriber_count(ADDR, 1) == 2
+
+    await asyncio.sleep(0.03)
+    upstream.items = [_tx(3), _tx(2), _tx(1)]
+    first = await asyncio.wait_for(q1.get(), timeout=1)
+    second = await asyncio.wait_for(q1.get(), timeout=1)
+    assert [first.block_number, second.block_number] == [2, 3]
+    assert (await asyncio.wait_for(q2.get(), timeout=1)).block_number == 2
+
+    # Baseline tx 1 was never re-emitted and the poll count is per wallet, not per client
+    calls_before = upstream.calls
+    hub.unsubscribe(ADDR, 1, q1)
+    assert hub.active_wallets == 1
+    hub.unsubscribe(ADDR, 1, q2)
+    assert hub.active_wallets == 0
+    await asyncio.sleep(0.03)
+    assert upstream.calls == calls_before
+
+
+@pytest.mark.asyncio
+async def test_seen_hashes_stay_bounded():
+    upstream = FakeUpstream()
+    hub = WalletFeedHub(fetch=upstream, interval=10)
+    q = hub.subscribe(ADDR, 1)
+    poller = hub._pollers[(ADDR, 1)]
+    poller.seen_limit = 6
+    published = []
+    poller.publish = published.append
+    # A sliding newest-first window of three transactions, one new per poll
+    for head in range(1, 40):
+        upstream.items = [_tx(n) for n in range(head, max(0, head - 3), -1)]
+        await poller.poll_once()
+        assert len(poller.seen) <= 6
+    # An upstream blip returning nothing must not make the window look new afterwards
+    upstream.items = []
+    await poller.poll_once()
+    upstream.items = [_tx(n) for n in range(39, 36, -1)]
+    await poller.poll_once()
+    assert [it.block_number for it in published] == list(range(2, 40))
+    hub.unsubscribe(ADDR, 1, q)
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_drops_oldest():
+    upstream = FakeUpstream()
+    hub = WalletFeedHub(fetch=upstream, interval=10, queue_size=2)
+    q = hub.subscribe(ADDR, 1)
+    poller = hub._pollers[(ADDR, 1)]
+    for n in range(5):
+        poller.publish(_tx(n))
+    assert q.qsize() == 2
+    assert q.get_nowait().block_number == 3
+    hub.unsubscribe(ADDR, 1, q)
@@ -0,0 +1,107 @@
+from app.models.sql_models import Network, Transaction, User, Wallet
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.etherscan_client import EtherscanClient
+from app.services.ingest import ingest_transactions
+from app.services.processor import to_transaction_items
+
+
+ADDR = "0x1111111111111111111111111111111111111111"
+OTHER = "0x2222222222222222222222222222222222222222"
+
+
+def _raw(n: int):
+    return {
+        "hash": f"0x{n:064x}",
+        "blockNumber": str(100 + n),
+        "timeStamp": str(1700000000 + n),
+        "from": OTHER,
+        "to": ADDR,
+        "value": str(10 ** 18),
+        "gasPrice": "1000000000",
+        "gasUsed": "21000",
+        "isError": "0",
+    }
+
+
+def _seed(session_factory, raw, name="sepolia", chain_id=11155111):
+    db = session_factory()
+    net = Network(name=name, chain_id=chain_id)
+    user = User(nama="Tester")
+    db.add_all([net, user])
+    db.commit()
+    wallet = Wallet(user_id=user.user_id, network_id=net.network_id, address=ADDR, label="main")
+    db.add(wallet)
+    db.commit()
+    ingest_transactions(db, wallet, net.network_id, to_transaction_items(raw, ADDR))
+    db.close()
+
+
+def _fake_upstream(monkeypatch, result):
+    calls = []
+
+    async def _txlist(self, address, chain_id=11155111, start_block=0):
+        calls.append((chain_id, start_block))
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(EtherscanClient, "get_txlist", _txlist)
+    return calls
+
+
+def test_tracked_wallet_fetches_only_delta_and_stores_it(db_client, session_factory, monkeypatch):
+    _seed(session_factory, [_raw(n) for n in range(3)])
+    calls = _fake_upstream(monkeypatch, {"status": "1", "message": "OK", "result": [_raw(7)]})
+
+    body = db_client.get("/monitor/wallet", params={"address": ADDR}).json()
+    assert calls == [(11155111, 103)]
+    assert [it["block_number"] for it in body["data"]] == [107, 102, 101, 100]
+    assert body["metadata"]["source"] == "database+upstream"
+    assert body["data"][0]["fee_wei"] == str(21000 * 10 ** 9)
+
+    db = session_factory()
+    assert db.query(Transaction).count() == 4
+    db.close()
+    db_client.get("/monitor/wallet", params={"address": ADDR})
+    assert calls[-1] == (11155111, 108)
+
+
+def test_large_delta_is_stored_in_full(db_client, session_factory, monkeypatch):
+    _seed(session_factory, [_raw(0)])
+    _fake_upstream(monkeypatch, {"status": "1", "message": "OK", "result": [_raw(n) for n in range(1, 601)]})
+
+    body = db_client.get("/monitor/wallet", params={"address": ADDR}).json()
+    assert len(body["data"]) == 500 and body["data"][0]["block_number"] == 700
+    db = session_factory()
+    assert db.query(Transaction).count() == 601
+    db.close()
+
+
+def test_rate_limited_serves_stored_rows(db_client, session_factory, monkeypatch):
+    _seed(session_factory, [_raw(n) for n in range(2)])
+    _fake_upstream(monkeypatch, {"status": "0", "message": "NOTOK", "result": "Max rate limit reached"})
+    r = db_client.get("/monitor/wallet", params={"address": ADDR})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["metadata"]["stale"] is True
+    assert body["metadata"]["count"] == 2
+
+    _fake_upstream(monkeypatch, CircuitOpenError("etherscan:11155111", 10))
+    assert db_client.get("/monitor/wallet", params={"address": ADDR}).json()["metadata"]["source"] == "database"
+
+
+def test_other_network_from_registry(db_client, session_factory, monkeypatch):
+    _seed(session_factory, [_raw(1)], name="polygon-mainnet", chain_id=137)
+    calls = _fake_upstream(monkeypatch, {"status": "0", "message": "No transactions found", "result": []})
+    body = db_client.get("/monitor/wallet", params={"address": ADDR, "network": "polygon-mainnet"}).json()
+    assert calls == [(137, 102)]
+    assert body["metadata"]["network"] == "polygon-mainnet"
+    assert body["metadata"]["count"] == 1
+
+
+def test_untracked_wallet_and_unknown_network(db_client, monkeypatch):
+    calls = _fake_upstream(monkeypatch, {"status": "1", "message": "OK", "result": [_raw(1)]})
+    body = db_client.get("/monitor/wallet", params={"address": ADDR, "network": "ethereum-mainnet"}).json()
+    assert calls == [(1, 0)]
+    assert body["metadata"]["source"] == "upstream"
+    assert db_client.get("/monitor/wallet", params={"address": ADDR, "network": "nowhere"}).status_code == 400
@@ -0,0 +1,115 @@
+from sqlalchemy.dialects import mysql
+
+from app.models.sql_models import DirectionEnum, Network, User, Wallet
+from app.services.ingest import ingest_transactions
+from app.services.portfolio import _link_totals_stmt, _wallet_stats
+from app.services.processor import to_transaction_items
+
+
+A = "0x" + "a" * 40
+B = "0x" + "b" * 40
+OTHER = "0x" + "c" * 40
+
+
+def _raw(n, frm, to, eth=1):
+    return {
+        "hash": f"0x{n:064x}",
+        "blockNumber": str(100 + n),
+        "timeStamp": str(1700000000 + n),
+        "from": frm,
+        "to": to,
+        "value": str(eth * 10**18),
+        "gasUsed": "21000",
+        "isError": "0",
+    }
+
+
+def _seed(session_factory):
+    db = session_factory()
+    net = Network(name="sepolia", chain_id=11155111)
+    owner = User(nama="Owner")
+    db.add_all([net, owner, User(nama="Empty")])
+    db.commit()
+    wa = Wallet(user_id=owner.user_id, network_id=net.network_id, address=A, label="a")
+    wb = Wallet(user_id=owner.user_id, network_id=net.network_id, address=B, label="b")
+    db.add_all([wa, wb])
+    db.commit()
+    # a receives at 1, 3, 5; b sends at 2, 4; tx 6 goes a -> b and belongs to both
+    ingest_transactions(db, wa, net.network_id, to_transaction_items([_raw(n, OTHER, A) for n in (1, 3, 5)] + [_raw(6, A, B, 2)], A))
+    ingest_transactions(db, wb, net.network_id, to_transaction_items([_raw(n, B, OTHER) for n in (2, 4)] + [_raw(6, A, B, 2)], B))
+    ids = owner.user_id, wa.wallet_id, wb.wallet_id
+    db.close()
+    return ids
+
+
+def test_portfolio_aggregates_and_merges_activity(db_client, session_factory):
+    user_id, wa, wb = _seed(session_factory)
+    r = db_client.get(f"/users/{user_id}/portfolio", params={"limit": 4})
+    assert r.status_code == 200
+    body = r.json()
+
+    by_wallet = {w["wallet_id"]: w for w in body["wallets"]}
+    assert by_wallet[wa]["tx_count"] == 4
+    assert by_wallet[wa]["total_in_eth"] == 3.0
+    assert by_wallet[wa]["total_out_eth"] == 2.0
+    assert by_wallet[wb]["total_in_eth"] == 2.0
+    assert by_wallet[wb]["total_out_eth"] == 2.0
+    assert body["summary"]["wallet_count"] == 2
+    assert body["summary"]["tx_count"] == 7
+
+    activity = [(it["block_number"], it["wallet_id"]) for it in body["recent_activity"]]
+    assert [blk for blk, _ in activity] == [106, 106, 105, 104]
+    assert {w for blk, w in activity if blk == 106} == {wa, wb}
+
+
+def test_portfolio_empty_and_missing_user(db_client, session_factory):
+    _seed(session_factory)
+    db = session_factory()
+    empty = db.query(User).filter(User.nama == "Empty").one().user_id
+    db.close()
+    body = db_client.get(f"/users/{empty}/portfolio").json()
+    assert body["wallets"] == [] and body["recent_activity"] == []
+    assert body["summary"]["tx_count"] == 0
+    assert db_client.get("/users/9999/portfolio").status_code == 404
+
+
+def test_portfolio_wei_totals_stay_exact(db_client, session_factory):
+    db = session_factory()
+    net = Network(name="sepolia", chain_id=11155111)
+    owner = User(nama="Whale")
+    db.add_all([net, owner])
+    db.commit()
+    wallet = Wallet(user_id=owner.user_id, network_id=net.network_id, address=A, label="a")
+    db.add(wallet)
+    db.commit()
+    # Above 2^53 (float) and 2^63 (SQLite INTEGER); e.g. 100 ETH plus one wei
+    big = [10**20 + 1, 2**53 + 1]
+    raw = [{**_raw(n, OTHER, A), "value": str(v)} for n, v in enumerate(big, start=1)]
+    ingest_transactions(db, wallet, net.network_id, to_transaction_items(raw, A))
+    user_id = owner.user_id
+    db.close()
+
+    body = db_client.get(f"/users/{user_id}/portfolio").json()
+    assert body["wallets"][0]["total_in_wei"] == str(sum(big))
+    assert body["summary"]["total_in_wei"] == str(sum(big))
+
+
+def test_server_side_totals_match_the_per_row_sum(session_factory):
+    user_id, wa, wb = _seed(session_factory)
+    sql = str(_link_totals_stmt([wa, wb]).compile(dialect=mysql.dialect()))
+    assert "GROUP BY wallet_transaction.wallet_id, wallet_transaction.direction" in sql
+    assert "sum(coalesce(" in sql
+
+    # Whole-ETH values survive SQLite's REAL sums, so the grouped query can be checked here too
+    db = session_factory()
+    grouped = {(w, d): (n, v, f) for w, d, n, v, f, _, _ in db.execute(_link_totals_stmt([wa, wb]))}
+    by_wallet = {w["wallet_id"]: w for w in _wallet_stats(db, user_id)}
+    db.close()
+    assert grouped[(wa, DirectionEnum.in_)][:2] == (3, 3 * 10**18)
+    assert grouped[(wa, DirectionEnum.out)][:2] == (1, 2 * 10**18)
+    for wallet_id, w in by_wallet.items():
+        rows = [v for (wid, _), v in grouped.items() if wid == wallet_id]
+        assert w["tx_count"] == sum(n for n, _, _ in rows)
+        assert w["total_in_wei"] == grouped.get((wallet_id, DirectionEnum.in_), (0, 0, 0))[1]
+        assert w["total_out_wei"] == grouped.get((wallet_id, DirectionEnum.out), (0, 0, 0))[1]
+        assert w["fees_wei"] == grouped.get((wallet_id, DirectionEnum.out), (0, 0, 0))[2]
@@ -35,3 +35,16 @@ def test_wei_to_eth_and_status():
     assert res[1].value_eth == 0.5
     assert res[1].status == "failed"
 
+
+
+def test_exact_wei_and_fee():
+    big = 123456789012345678901234567
+    item = {**_make_item(1, big), "gasPrice": "1500000000"}
+    res = to_transaction_items([item], "0x1111111111111111111111111111111111111111")
+    assert res[0].value_wei == big
+    assert res[0].fee_wei == 1500000000 * 21000
+    dumped = res[0].model_dump(by_alias=True, context={"exact_eth": True})
+    assert dumped["value_eth"] == "123456789.012345678901234567"
+    assert dumped["value_wei"] == str(big)
+    assert dumped["fee_eth"] == "0.0000315"
+    assert res[0].model_dump()["value_eth"] == big / 10**18
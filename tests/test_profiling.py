@@ -0,0 +1,81 @@
+import asyncio
+import os
+import pstats
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import profiling
+from app.profiling import add_profiling_middleware
+
+
+def _app(tmp_path, secret="s3cret", rate=0.0):
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(0.2)
+        return {"ok": True}
+
+    @app.get("/work")
+    async def work():
+        return {"total": sum(i * i for i in range(20000))}
+
+    add_profiling_middleware(app, secret, rate, str(tmp_path / "profiles"))
+    return app
+
+
+def test_disabled_profiler_registers_nothing(tmp_path):
+    app = FastAPI()
+    before = len(app.user_middleware)
+    add_profiling_middleware(app, "", 0.0, str(tmp_path))
+    assert len(app.user_middleware) == before
+
+
+def test_profile_requires_secret(tmp_path):
+    client = TestClient(_app(tmp_path))
+    r = client.get("/work", headers={"X-Profile": "wrong"})
+    assert r.status_code == 200
+    assert "X-Profile-Report" not in r.headers
+    assert not (tmp_path / "profiles").exists()
+
+
+def test_on_demand_profile_returns_report(tmp_path):
+    client = TestClient(_app(tmp_path))
+    r = client.get("/work", headers={"X-Profile": "s3cret"})
+    assert r.json()["total"] > 0
+    report = r.headers["X-Profile-Report"]
+    assert (tmp_path / "profiles").exists()
+
+    r = client.get("/work", params={"__profile": "s3cret", "__profile_format": "text"})
+    assert r.status_code == 200
+    assert r.headers["X-Profiled-Status"] == "200"
+    assert "work" in r.text
+    prof = report + ".prof"
+    if os.path.exists(prof):
+        assert pstats.Stats(prof).total_calls > 0
+
+
+def test_random_sampling_writes_to_disk(tmp_path):
+    client = TestClient(_app(tmp_path, secret="", rate=1.0))
+    r = client.get("/work")
+    assert "X-Profile-Report" not in r.headers
+    assert list((tmp_path / "profiles").glob("*.txt"))
+
+
+@pytest.mark.asyncio
+async def test_overlapping_requests_are_not_profiled_together(tmp_path):
+    transport = httpx.ASGITransport(app=_app(tmp_path))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first, second = await asyncio.gather(
+            client.get("/slow", headers={"X-Profile": "s3cret"}),
+            client.get("/slow", headers={"X-Profile": "s3cret"}),
+        )
+    assert first.status_code == second.status_code == 200
+    reports = [r for r in (first, second) if "X-Profile-Report" in r.headers]
+    skipped = [r for r in (first, second) if r.headers.get("X-Profile-Skipped") == "busy"]
+    assert len(reports) == 1 and len(skipped) == 1
+    assert len(list((tmp_path / "profiles").glob("*.txt"))) == 1
+    assert not profiling._active.locked()
@@ -0,0 +1,46 @@
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+
+from app.config import settings
+from app.rate_limit import rate_limit_storage_uri
+from app.rate_limit_storage import SQLiteStorage
+
+
+def test_sqlite_scheme_is_registered(tmp_path):
+    storage = storage_from_string(f"sqlite://{tmp_path / 'rl.db'}")
+    assert isinstance(storage, SQLiteStorage)
+    assert storage.check()
+
+
+def test_counters_are_shared_between_instances(tmp_path):
+    uri = f"sqlite://{tmp_path / 'rl.db'}"
+    # Two storages on the same file stand in for two worker processes
+    worker_a = FixedWindowRateLimiter(storage_from_string(uri))
+    worker_b = FixedWindowRateLimiter(storage_from_string(uri))
+    limit = parse("3/minute")
+    assert worker_a.hit(limit, "127.0.0.1")
+    assert worker_b.hit(limit, "127.0.0.1")
+    assert worker_a.hit(limit, "127.0.0.1")
+    assert not worker_b.hit(limit, "127.0.0.1")
+    assert worker_b.hit(limit, "10.0.0.1")
+
+
+def test_expired_window_restarts(tmp_path):
+    storage = SQLiteStorage(f"sqlite://{tmp_path / 'rl.db'}")
+    assert storage.incr("k", expiry=0) == 1
+    assert storage.incr("k", expiry=60) == 1
+    assert storage.incr("k", expiry=60) == 2
+    assert storage.get("k") == 2
+    storage.clear("k")
+    assert storage.get("k") == 0
+
+
+def test_multi_worker_mode_switches_off_memory(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_STORAGE_URI", "memory://")
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 1)
+    assert rate_limit_storage_uri() == "memory://"
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 4)
+    assert rate_limit_storage_uri().startswith("sqlite://")
+    monkeypatch.setattr(settings, "RATE_LIMIT_STORAGE_URI", "redis://cache:6379")
+    assert rate_limit_storage_uri() == "redis://cache:6379"
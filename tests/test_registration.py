@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+from sqlalchemy.dialects import mysql
+
+from app.models.sql_models import IngestJob, Network, User, Wallet
+from app.services import registration
+from app.services.ingest_jobs import active_job_query, ingest_queue
+from app.services.registration import register_wallet, resolve_user, upsert_id
+
+
+ADDR = "0x" + "AbCd" * 10
+
+
+@pytest.fixture
+def no_submit(monkeypatch):
+    submitted = []
+    monkeypatch.setattr(ingest_queue, "submit", submitted.append)
+    return submitted
+
+
+def test_upsert_returns_same_id(session_factory):
+    db = session_factory()
+    first = upsert_id(db, Network, {"name": "sepolia", "chain_id": 11155111}, ["chain_id"])
+    second = upsert_id(db, Network, {"name": "sepolia", "chain_id": 11155111}, ["chain_id"])
+    db.commit()
+    assert first == second
+    assert db.query(Network).count() == 1
+    db.close()
+
+
+def test_owner_is_reused_by_name_without_merging_namesakes(session_factory):
+    db = session_factory()
+    # Two different people who happen to share a display name stay separate rows
+    db.add_all([User(nama="Alice"), User(nama="Alice")])
+    db.commit()
+    oldest = min(u.user_id for u in db.query(User))
+    assert resolve_user(db, "Alice") == oldest
+    fresh = resolve_user(db, "Carol")
+    db.commit()
+    assert resolve_user(db, "Carol") == fresh
+    assert db.query(User).count() == 3
+    db.close()
+
+
+def test_concurrent_registrations_share_one_job(session_factory, no_submit):
+    db = session_factory()
+    db.add(Network(name="sepolia", chain_id=11155111))
+    db.commit()
+    db.close()
+    barrier = threading.Barrier(2)
+    results = []
+
+    def _register(label):
+        session = session_factory()
+        try:
+            barrier.wait()
+            results.append(register_wallet(session, 11155111, "sepolia", "Alice", ADDR, label))
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=_register, args=(label,)) for label in ("a", "b")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+
+    assert len(results) == 2
+    assert results[0]["job_id"] == results[1]["job_id"]
+    assert sorted(r["merged"] for r in results) == [False, True]
+    db = session_factory()
+    assert db.query(IngestJob).count() == 1
+    db.close()
+
+
+def test_job_lookup_is_a_locking_read():
+    # Under InnoDB REPEATABLE READ a plain SELECT would miss a job committed by a concurrent registration
+    sql = str(active_job_query(1).compile(dialect=mysql.dialect()))
+    assert sql.rstrip().endswith("FOR UPDATE")
+
+
+def test_register_twice_updates_wallet_and_merges_job(session_factory, no_submit):
+    db = session_factory()
+    first = register_wallet(db, 11155111, "sepolia", "Alice", ADDR, "main")
+    second = register_wallet(db, 11155111, "sepolia", "Bob", ADDR, "renamed")
+
+    assert first["wallet_id"] == second["wallet_id"]
+    assert first["address"] == ADDR.lower()
+    assert (first["merged"], second["merged"]) == (False, True)
+    assert second["job_id"] == first["job_id"]
+    assert no_submit == [first["job_id"]]
+
+    wallet = db.query(Wallet).one()
+    assert wallet.label == "renamed"
+    assert db.get(User, wallet.user_id).nama == "Bob"
+    assert db.query(Network).count() == 1
+    db.close()
+
+
+def test_existing_network_is_reused_by_name(session_factory, no_submit):
+    db = session_factory()
+    db.add(Network(name="devnet", chain_id=31337))
+    db.commit()
+    result = register_wallet(db, 11155111, "devnet", "Alice", ADDR, None)
+    assert db.query(Network).count() == 1
+    assert result["network_id"] == db.query(Network).one().network_id
+    db.close()
+
+
+def test_failure_leaves_no_partial_state(session_factory, no_submit, monkeypatch):
+    def _boom(db, wallet_id, network_id):
+        raise RuntimeError("queue unavailable")
+
+    monkeypatch.setattr(registration, "claim_ingest_job", _boom)
+    db = session_factory()
+    with pytest.raises(RuntimeError):
+        register_wallet(db, 11155111, "sepolia", "Alice", ADDR, "main")
+    for model in (Network, User, Wallet, IngestJob):
+        assert db.query(model).count() == 0
+    assert no_submit == []
+    db.close()
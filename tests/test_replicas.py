@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine
+
+import app.database as database
+from app.database import ReplicaSet
+
+
+def _engine(path):
+    return create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+
+def test_pick_round_robins_healthy_replicas(tmp_path):
+    a, b = _engine(tmp_path / "a.db"), _engine(tmp_path / "b.db")
+    # Nothing is probed until the refresher has run; reads go to the primary meanwhile
+    assert ReplicaSet([a, b]).pick() is None
+    replicas = ReplicaSet([a, b])
+    replicas.check_all()
+    assert [replicas.pick() for _ in range(4)] == [a, b, a, b]
+
+
+def test_unreachable_or_lagging_replica_falls_back(tmp_path, monkeypatch):
+    good = _engine(tmp_path / "good.db")
+    broken = _engine(tmp_path / "missing" / "nope.db")
+    replicas = ReplicaSet([broken, good], max_lag=5.0)
+    replicas.check_all()
+    assert replicas.pick() is good
+    assert replicas.pick() is good
+    statuses = replicas.statuses()
+    assert [s["ok"] for s in statuses] == [False, True]
+    assert statuses[0]["error"]
+
+    monkeypatch.setattr(database, "replica_lag_seconds", lambda conn: 30.0)
+    lagging = ReplicaSet([good], max_lag=5.0)
+    lagging.check_all()
+    assert lagging.pick() is None
+    assert lagging.statuses()[0]["lag"] == 30.0
+
+
+def test_pick_and_statuses_never_probe(tmp_path, monkeypatch):
+    calls = []
+
+    def _lag(conn):
+        calls.append(1)
+        return 0.0
+
+    monkeypatch.setattr(database, "replica_lag_seconds", _lag)
+    replicas = ReplicaSet([_engine(tmp_path / "a.db"), _engine(tmp_path / "b.db")], check_interval=60)
+    assert [s["age"] for s in replicas.statuses()] == [None, None]
+    replicas.check_all()
+    assert len(calls) == 2
+    for _ in range(5):
+        assert replicas.pick() is not None
+        assert [s["ok"] for s in replicas.statuses()] == [True, True]
+    assert len(calls) == 2
+
+    # A result nobody renewed for several intervals stops routing reads to the replica
+    for status in replicas._status.values():
+        status["checked_at"] = time.monotonic() - 200
+    assert replicas.pick() is None
+
+
+@pytest.mark.asyncio
+async def test_background_refresher_probes_replicas(tmp_path, monkeypatch):
+    calls = []
+
+    def _lag(conn):
+        calls.append(1)
+        return 0.0
+
+    monkeypatch.setattr(database, "replica_lag_seconds", _lag)
+    replicas = ReplicaSet([_engine(tmp_path / "a.db")], check_interval=0.02)
+    replicas.start()
+    try:
+        deadline = time.monotonic() + 5
+        while len(calls) < 3 and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        assert len(calls) >= 3
+        assert replicas.pick() is replicas.engines[0]
+    finally:
+        await replicas.stop()
+
+
+def test_replica_engines_get_a_connect_timeout():
+    url = "mysql+pymysql://ro:pw@replica-1:3306/fp_basdat"
+    assert database._connect_args(url, 2) == {"connect_timeout": 2}
+    assert database._connect_args(url) == {}
+    assert database._connect_args("sqlite:///x.db", 2) == {"check_same_thread": False}
+
+
+def test_get_read_db_binds_replica_or_primary(tmp_path, monkeypatch):
+    replica = _engine(tmp_path / "r.db")
+    replicas = ReplicaSet([replica])
+    replicas.check_all()
+    monkeypatch.setattr(database, "replicas", replicas)
+    gen = database.get_read_db()
+    assert next(gen).get_bind() is replica
+    gen.close()
+
+    monkeypatch.setattr(database, "replicas", ReplicaSet([]))
+    gen = database.get_read_db()
+    assert next(gen).get_bind() is database.engine
+    gen.close()
@@ -0,0 +1,75 @@
+from app.models.sql_models import Network, User, Wallet
+from app.services.search import address_prefix_range, mysql_match_query, search_wallets
+
+
+def _seed(db):
+    net = Network(name="sepolia", chain_id=11155111)
+    alice = User(nama="Alice Wonder")
+    bob = User(nama="Bob Builder")
+    db.add_all([net, alice, bob])
+    db.commit()
+    db.add_all(
+        [
+            Wallet(user_id=alice.user_id, network_id=net.network_id, address="0xabc0" + "0" * 36, label="cold storage"),
+            Wallet(user_id=alice.user_id, network_id=net.network_id, address="0xabcf" + "1" * 36, label="trading hot"),
+            Wallet(user_id=bob.user_id, network_id=net.network_id, address="0x1234" + "2" * 36, label="savings"),
+        ]
+    )
+    db.commit()
+    return alice
+
+
+def test_prefix_range_bounds():
+    low, high = address_prefix_range("0xAB1")
+    assert low.hex() == "ab1" + "0" * 37
+    assert high.hex() == "ab1" + "f" * 37
+
+
+def test_address_prefix_search(session_factory):
+    db = session_factory()
+    _seed(db)
+    items, has_more = search_wallets(db, "0xABC", page_size=1)
+    assert has_more
+    assert items[0]["address"].startswith("0xabc0")
+    items, _ = search_wallets(db, "0xabcf")
+    assert [it["label"] for it in items] == ["trading hot"]
+
+
+def test_label_and_owner_token_search_tracks_updates(session_factory):
+    db = session_factory()
+    alice = _seed(db)
+    assert {it["label"] for it in search_wallets(db, "stor")[0]} == {"cold storage"}
+    assert {it["label"] for it in search_wallets(db, "alice")[0]} == {"cold storage", "trading hot"}
+    assert search_wallets(db, "bob savings")[0][0]["owner_name"] == "Bob Builder"
+    # One token from the owner, one from the label
+    assert {it["label"] for it in search_wallets(db, "alice cold")[0]} == {"cold storage"}
+
+    alice.nama = "Carol"
+    db.commit()
+    assert search_wallets(db, "alice")[0] == []
+    assert len(search_wallets(db, "carol")[0]) == 2
+
+
+def test_search_route(db_client, session_factory):
+    db = session_factory()
+    _seed(db)
+    db.close()
+    body = db_client.get("/wallet/search", params={"q": "builder"}).json()
+    assert body["hasMore"] is False
+    assert [it["label"] for it in body["items"]] == ["savings"]
+    assert db_client.get("/wallet/search", params={"q": ""}).status_code == 422
+
+
+def test_mysql_query_requires_every_token_in_label_or_owner():
+    from sqlalchemy.dialects import mysql
+
+    stmt, params = mysql_match_query(["alice", "main"], 21, 0)
+    sql = str(stmt.compile(dialect=mysql.dialect()))
+    assert params == {"q0": "alice*", "q1": "main*"}
+    for i in (0, 1):
+        # Each token may match either column...
+        assert f"MATCH (lw{i}.label) AGAINST (%s IN BOOLEAN MODE)" in sql
+        assert f"MATCH (ou{i}.nama) AGAINST (%s IN BOOLEAN MODE)" in sql
+    # ...and all tokens are required, with no single-column "+tok" terms
+    assert sql.count("wallet.wallet_id IN (") == 2 and " AND wallet.wallet_id IN (" in sql
+    assert "+" not in "".join(params.values()) and "UNION" in sql
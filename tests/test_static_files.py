@@ -0,0 +1,60 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.static_files import IMMUTABLE_CACHE, mount_spa
+
+
+@pytest.fixture
+def spa_client(tmp_path):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "index.html").write_text("<html>" + "x" * 1000 + "</html>")
+    (tmp_path / "assets" / "index-abc123.js").write_text("console.log('hi');" * 100)
+    (tmp_path / "assets" / "big-def456.js").write_text("y" * 5000)
+    (tmp_path / "assets" / "big-def456.js.gz").write_bytes(gzip.compress(b"y" * 5000))
+    (tmp_path / "favicon.ico").write_bytes(b"\x00\x01")
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    mount_spa(app, str(tmp_path), max_memory_bytes=2048)
+    return TestClient(app)
+
+
+def test_hashed_asset_is_immutable_and_compressed(spa_client):
+    r = spa_client.get("/assets/index-abc123.js", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["cache-control"] == IMMUTABLE_CACHE
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.text.startswith("console.log")
+
+
+def test_identity_when_client_refuses_compression(spa_client):
+    r = spa_client.get("/assets/index-abc123.js", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in r.headers
+    assert r.text.startswith("console.log")
+
+
+def test_large_file_uses_prebuilt_sibling(spa_client):
+    r = spa_client.get("/assets/big-def456.js", headers={"Accept-Encoding": "br, gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.text == "y" * 5000
+
+
+def test_index_etag_revalidation(spa_client):
+    r = spa_client.get("/some/client/route", headers={"Accept-Encoding": "identity"})
+    assert r.status_code == 200
+    assert r.headers["cache-control"] == "no-cache"
+    etag = r.headers["etag"]
+    r2 = spa_client.get("/", headers={"If-None-Match": etag})
+    assert r2.status_code == 304
+    assert r2.content == b""
+
+
+def test_missing_asset_is_404_and_api_wins(spa_client):
+    assert spa_client.get("/assets/missing-000.js").status_code == 404
+    assert spa_client.get("/health").json() == {"status": "ok"}
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.app_logging import add_timing_middleware
+from app.services.processor import to_transaction_items
+from app.tracing import (
+    JsonLinesExporter,
+    MemoryExporter,
+    add_trace_ids,
+    add_tracing_middleware,
+    instrument_sqlalchemy,
+    parse_traceparent,
+    tracer,
+)
+
+
+@pytest.fixture
+def spans():
+    exporter = MemoryExporter()
+    tracer.exporter = exporter
+    instrument_sqlalchemy()
+    yield exporter.spans
+    tracer.exporter = None
+
+
+def test_disabled_tracer_yields_none():
+    assert not tracer.enabled
+    with tracer.span("noop") as span:
+        assert span is None
+
+
+def test_nested_spans_share_trace(spans):
+    with tracer.span("outer") as outer:
+        with tracer.span("inner") as inner:
+            assert add_trace_ids(None, "info", {})["span_id"] == inner.span_id
+    assert [s.name for s in spans] == ["inner", "outer"]
+    assert inner.trace_id == outer.trace_id
+    assert inner.parent_span_id == outer.span_id
+    assert add_trace_ids(None, "info", {}) == {}
+
+
+def test_exception_marks_span(spans):
+    with pytest.raises(ValueError):
+        with tracer.span("boom"):
+            raise ValueError("bad")
+    assert spans[0].status == "ERROR"
+    assert spans[0].attributes["exception.type"] == "ValueError"
+
+
+def test_sqlalchemy_statements_are_child_spans(spans):
+    engine = create_engine("sqlite://")
+    with tracer.span("request") as root:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    db_spans = [s for s in spans if s.name == "db.statement"]
+    assert db_spans and db_spans[-1].parent_span_id == root.span_id
+    assert db_spans[-1].attributes["db.statement"] == "SELECT 1"
+
+
+def test_processor_span(spans):
+    raw = [{"hash": "0x1", "blockNumber": "1", "timeStamp": "1700000000", "from": "0xa", "to": "0xb", "value": "1"}]
+    with tracer.span("request"):
+        to_transaction_items(raw, "0xa")
+    assert spans[0].name == "processor.to_transaction_items"
+    assert spans[0].attributes["raw_count"] == 1
+
+
+def test_middleware_continues_incoming_trace(spans):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"id": item_id}
+
+    add_timing_middleware(app)
+    add_tracing_middleware(app)
+    parent = "00-" + "a" * 32 + "-" + "b" * 16 + "-01"
+    r = TestClient(app).get("/items/3", headers={"traceparent": parent})
+    assert r.status_code == 200
+    server = spans[-1]
+    assert server.kind == "SERVER"
+    assert server.name == "GET /items/{item_id}"
+    assert server.trace_id == "a" * 32 and server.parent_span_id == "b" * 16
+    assert r.headers["traceparent"].startswith("00-" + "a" * 32 + "-" + server.span_id)
+
+
+def test_parse_traceparent_rejects_garbage():
+    assert parse_traceparent("nope") == (None, None)
+    assert parse_traceparent(None) == (None, None)
+
+
+def test_file_exporter_writes_json_lines(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    tracer.exporter = JsonLinesExporter(path=str(path))
+    try:
+        with tracer.span("one", wallet="0xabc"):
+            pass
+    finally:
+        tracer.exporter = None
+    record = json.loads(path.read_text().splitlines()[0])
+    assert record["name"] == "one"
+    assert record["attributes"]["wallet"] == "0xabc"
+    assert len(record["trace_id"]) == 32 and len(record["span_id"]) == 16
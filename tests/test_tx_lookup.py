@@ -0,0 +1,95 @@
+import re
+
+import pytest
+from aioresponses import aioresponses
+
+from app.models.sql_models import Network, User, Wallet
+from app.services.circuit_breaker import reset_breakers
+from app.services.data_sources import EtherscanDataSource
+from app.services.ingest import ingest_transactions
+from app.services.processor import to_transaction_items
+from app.services.tx_lookup import TxCache, tx_cache
+
+
+ADDR = "0x1111111111111111111111111111111111111111"
+OTHER = "0x2222222222222222222222222222222222222222"
+HASH = "0x" + "ab" * 32
+URL = re.compile(r"^https://api\.etherscan\.io/v2/api.*$")
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    tx_cache.clear()
+    reset_breakers()
+    yield
+    tx_cache.clear()
+
+
+def _seed(session_factory):
+    db = session_factory()
+    net = Network(name="sepolia", chain_id=11155111)
+    user = User(nama="Tester")
+    db.add_all([net, user])
+    db.commit()
+    receiver = Wallet(user_id=user.user_id, network_id=net.network_id, address=ADDR, label="recv")
+    sender = Wallet(user_id=user.user_id, network_id=net.network_id, address=OTHER, label="send")
+    db.add_all([receiver, sender])
+    db.commit()
+    raw = [{"hash": HASH, "blockNumber": "100", "timeStamp": "1700000000", "from": OTHER, "to": ADDR, "value": "5"}]
+    ingest_transactions(db, receiver, net.network_id, to_transaction_items(raw, ADDR))
+    ingest_transactions(db, sender, net.network_id, to_transaction_items(raw, OTHER))
+    db.close()
+
+
+def test_stored_hash_lists_involved_wallets_and_is_cached(db_client, session_factory):
+    _seed(session_factory)
+    body = db_client.get("/tx/0x" + HASH[2:].upper()).json()
+    assert body["source"] == "database"
+    assert body["transactions"][0]["network_name"] == "sepolia"
+    assert body["transactions"][0]["value_wei"] == "5"
+    assert [(w["label"], w["direction"]) for w in body["wallets"]] == [("recv", "in"), ("send", "out")]
+
+    hits = tx_cache.hits
+    assert db_client.get(f"/tx/{HASH}").json() == body
+    assert tx_cache.hits == hits + 1
+
+
+def test_unknown_hash_falls_back_to_upstream(db_client, monkeypatch):
+    record = {"hash": HASH, "blockNumber": "7", "timeStamp": "1700000000", "from": OTHER, "to": ADDR, "value": "9"}
+
+    async def _get_transaction(self, tx_hash, chain_id=11155111):
+        return record if chain_id == 1 else None
+
+    monkeypatch.setattr(EtherscanDataSource, "get_transaction", _get_transaction)
+    assert db_client.get(f"/tx/{HASH}").status_code == 404
+    body = db_client.get(f"/tx/{HASH}", params={"network": "ethereum-mainnet"}).json()
+    assert body["source"] == "upstream" and body["wallets"] == []
+    assert body["transactions"][0]["chain_id"] == 1
+    # The mainnet answer is cached for mainnet only
+    assert db_client.get(f"/tx/{HASH}").status_code == 404
+    assert db_client.get(f"/tx/{HASH}", params={"network": "ethereum-mainnet"}).json() == body
+    assert db_client.get("/tx/0x1234").status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_etherscan_proxy_lookup():
+    tx = {"hash": HASH, "blockNumber": "0x10", "from": OTHER, "to": ADDR, "value": "0x2a", "gasPrice": "0x3"}
+    with aioresponses() as m:
+        m.get(URL, payload={"jsonrpc": "2.0", "id": 1, "result": tx})
+        m.get(URL, payload={"jsonrpc": "2.0", "id": 1, "result": {"status": "0x1", "gasUsed": "0x5208"}})
+        m.get(URL, payload={"jsonrpc": "2.0", "id": 1, "result": {"number": "0x10", "timestamp": "0x64"}})
+        record = await EtherscanDataSource("k").get_transaction(HASH)
+    assert (record["blockNumber"], record["timeStamp"], record["value"], record["gasUsed"]) == ("16", "100", "42", "21000")
+
+
+def test_cache_evicts_and_expires():
+    now = [0.0]
+    cache = TxCache(max_size=2, ttl=10, clock=lambda: now[0])
+    cache.put(("a", False, None), {"n": 1})
+    cache.put(("b", False, None), {"n": 2})
+    cache.get(("a", False, None))
+    cache.put(("c", False, None), {"n": 3})
+    assert cache.get(("b", False, None)) is None
+    assert cache.get(("a", False, None)) == {"n": 1}
+    now[0] = 11
+    assert cache.get(("a", False, None)) is None
@@ -0,0 +1,107 @@
+import pytest
+from sqlalchemy import select
+
+from app.models.sql_models import Network, User, Wallet
+from app.models.types import WEI_MAX, hex_to_bytes
+
+
+ADDR = "0xAbCdEf0123456789aBcDeF0123456789AbCdEf01"
+
+
+def test_hex_codec_normalizes_case():
+    assert hex_to_bytes(ADDR, 20) == hex_to_bytes(ADDR.lower(), 20)
+    assert len(hex_to_bytes("0x" + "ab" * 32, 32)) == 32
+    with pytest.raises(ValueError):
+        hex_to_bytes("0x1234", 20)
+
+
+def test_address_column_round_trip_and_case_insensitive_lookup(session_factory):
+    db = session_factory()
+    net = Network(name="sepolia", chain_id=11155111)
+    user = User(nama="Tester")
+    db.add_all([net, user])
+    db.commit()
+    db.add(Wallet(user_id=user.user_id, network_id=net.network_id, address=ADDR))
+    db.commit()
+
+    raw = db.execute(select(Wallet.__table__.c.address).where(Wallet.address == ADDR.upper().replace("0X", "0x"))).scalar()
+    assert raw == ADDR.lower()
+    stored = db.connection().exec_driver_sql("SELECT address FROM wallet").scalar()
+    assert isinstance(stored, bytes) and len(stored) == 20
+    db.close()
+
+
+def test_wei_column_is_exact(session_factory):
+    from app.models.sql_models import Transaction
+    from datetime import datetime
+
+    db = session_factory()
+    net = Network(name="sepolia", chain_id=11155111)
+    db.add(net)
+    db.commit()
+    big = WEI_MAX
+    db.add(
+        Transaction(
+            network_id=net.network_id,
+            tx_hash="0x" + "1" * 64,
+            block_number=1,
+            time_stamp=datetime(2024, 1, 1),
+            from_address=ADDR,
+            value_wei=big,
+            tx_fee_wei=21000 * 10**9,
+        )
+    )
+    db.commit()
+    db.expire_all()
+    tx = db.query(Transaction).one()
+    assert tx.value_wei == big
+    assert tx.tx_fee_wei == 21000 * 10**9
+    db.close()
+
+
+def test_wei_rejects_values_wider_than_the_column():
+    from sqlalchemy.dialects import mysql as mysql_dialect
+
+    from app.models.types import Wei
+
+    with pytest.raises(ValueError):
+        Wei().process_bind_param(WEI_MAX + 1, mysql_dialect.dialect())
+    assert Wei().process_bind_param(WEI_MAX, mysql_dialect.dialect()) == WEI_MAX
+
+
+def test_mysql_ddl_uses_accepted_precision():
+    from sqlalchemy.dialects import mysql as mysql_dialect
+    from sqlalchemy.schema import CreateTable
+
+    from app.database import Base
+
+    ddl = "\n".join(str(CreateTable(t).compile(dialect=mysql_dialect.dialect())) for t in Base.metadata.sorted_tables)
+    assert "NUMERIC(65, 0)" in ddl
+    # MySQL refuses DECIMAL precision above 65 (ER_TOO_BIG_PRECISION)
+    assert "(78" not in ddl
+
+
+
+def test_schema_files_use_accepted_precision():
+    import re
+    from pathlib import Path
+
+    root = Path(__file__).resolve().parents[1]
+    for path in [root / "contohDatabase.sql", *sorted((root / "migrations").glob("*.sql"))]:
+        for precision in re.findall(r"decimal\((\d+)", path.read_text(), re.IGNORECASE):
+            assert int(precision) <= 65, path.name
+
+
+def test_schema_file_creates_every_model_table():
+    import re
+    from pathlib import Path
+
+    from app.database import Base
+
+    schema = (Path(__file__).resolve().parents[1] / "contohDatabase.sql").read_text()
+    created = set(re.findall(r"CREATE TABLE (\w+)", schema))
+    assert set(Base.metadata.tables) <= created
+    archive = schema[schema.index("CREATE TABLE transaction_archive") :]
+    assert "ROW_FORMAT=COMPRESSED" in archive.split(";")[0]
+    for index in ("idx_archive_hash", "idx_archive_time"):
+        assert f"CREATE INDEX {index} ON transaction_archive" in schema
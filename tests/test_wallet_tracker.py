@@ -0,0 +1,51 @@
+from app.models.sql_models import Network, User, Wallet
+from app.services.ingest import ingest_transactions
+from app.services.processor import to_transaction_items
+
+
+ADDR = "0x1111111111111111111111111111111111111111"
+OTHER = "0x2222222222222222222222222222222222222222"
+
+
+def _raw(n: int, frm: str = OTHER, to: str = ADDR):
+    return {
+        "hash": f"0x{n:064x}",
+        "blockNumber": str(100 + n),
+        "timeStamp": str(1700000000 + n),
+        "from": frm,
+        "to": to,
+        "value": str(10 ** 18),
+        "gasUsed": "21000",
+        "isError": "0",
+    }
+
+
+def _seed(session_factory, raw):
+    db = session_factory()
+    net = Network(name="sepolia", chain_id=11155111)
+    user = User(nama="Tester")
+    db.add_all([net, user])
+    db.commit()
+    wallet = Wallet(user_id=user.user_id, network_id=net.network_id, address=ADDR, label="main")
+    db.add(wallet)
+    db.commit()
+    ingest_transactions(db, wallet, net.network_id, to_transaction_items(raw, ADDR))
+    db.close()
+
+
+def test_transactions_page_newest_first(db_client, session_factory):
+    _seed(session_factory, [_raw(n) for n in range(5)] + [_raw(9, frm=ADDR, to=OTHER)])
+    r = db_client.get(f"/wallet/{ADDR}/transactions", params={"page": 1, "pageSize": 2})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["total"] == 6
+    assert [it["block_number"] for it in body["items"]] == [109, 104]
+    assert [it["direction"] for it in body["items"]] == ["out", "in"]
+
+
+def test_wallet_info_includes_owner_and_page(db_client, session_factory):
+    _seed(session_factory, [_raw(n) for n in range(3)])
+    body = db_client.get(f"/wallet/{ADDR}").json()
+    assert body["wallet"]["owner_name"] == "Tester"
+    assert body["wallet"]["network_name"] == "sepolia"
+    assert body["transactions"]["total"] == 3
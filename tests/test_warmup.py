@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+
+from app.models.sql_models import Network
+from app.services import data_sources
+from app.warmup import Warmup, validate_frontend
+
+
+def _dist(tmp_path, assets=("index-abc.js",)):
+    dist = tmp_path / "dist"
+    (dist / "assets").mkdir(parents=True)
+    (dist / "index.html").write_text(
+        '<script type="module" src="/assets/index-abc.js"></script><link href="/assets/index-def.css">'
+    )
+    for name in assets:
+        (dist / "assets" / name).write_text("x")
+    return str(dist)
+
+
+def test_validate_frontend_reports_missing_assets(tmp_path):
+    with pytest.raises(FileNotFoundError, match="index-def.css"):
+        validate_frontend(_dist(tmp_path))
+
+
+def test_validate_frontend_ok(tmp_path):
+    assert validate_frontend(_dist(tmp_path, ("index-abc.js", "index-def.css"))) == {"assets": 2}
+
+
+@pytest.mark.asyncio
+async def test_warmup_primes_networks_and_pool(session_factory, monkeypatch):
+    monkeypatch.setattr(data_sources, "_rpc_sources", {})
+    db = session_factory()
+    db.add(Network(name="devnet", chain_id=31337, api_base_url="http://127.0.0.1:8545"))
+    db.commit()
+    db.close()
+
+    warm = Warmup(session_factory=session_factory, db_connections=3)
+    assert not warm.ready
+    await warm.run()
+    assert warm.ready
+    assert warm.steps["db_pool"]["connections"] == 3
+    assert warm.steps["networks"]["networks"] == 1
+    assert isinstance(data_sources._rpc_sources["http://127.0.0.1:8545"], data_sources.JsonRpcDataSource)
+
+
+@pytest.mark.asyncio
+async def test_broken_frontend_does_not_block_readiness(session_factory, tmp_path):
+    warm = Warmup(session_factory=session_factory, static_path=str(tmp_path / "nope"))
+    await warm.run()
+    assert warm.ready
+    assert warm.steps["frontend"]["ok"] is False
+
+
+@pytest.mark.asyncio
+async def test_failed_critical_step_is_retried(session_factory):
+    warm = Warmup(session_factory=session_factory, retry_base=0.01, retry_max=0.02)
+    calls = []
+    prime = warm._prime_networks
+
+    def _flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("database starting")
+        return prime()
+
+    warm._prime_networks = _flaky
+    warm.start()
+    deadline = time.monotonic() + 5
+    while not warm.ready and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+        if not warm.ready and warm.finished:
+            assert warm.status()["phase"] == "retrying"
+    await warm.wait()
+    assert warm.ready and len(calls) == 3
+    assert warm.status()["phase"] == "done" and warm.status()["retries"] == 2
+    assert warm.steps["db_pool"]["ok"] and warm.steps["networks"]["ok"]
+
+
+def test_health_ready_after_warmup(db_client):
+    deadline = time.monotonic() + 5
+    r = db_client.get("/health")
+    while r.status_code == 503 and time.monotonic() < deadline:
+        time.sleep(0.05)
+        r = db_client.get("/health")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["status"] == "ok"
+    assert body["warmup"]["ready"] and body["warmup"]["import_ms"] is not None